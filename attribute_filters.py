@@ -0,0 +1,291 @@
+"""
+Structured attribute filters over catalog columns.
+
+Queries such as "Christopher Nolan movies with high ratings" or "Movies
+starring Brad Pitt from 2000s" carry constraints that TF-IDF can only
+approximate by matching words. AttributeIndex holds one domain's filterable
+columns in forms built once per catalog:
+
+- numeric columns (years, ratings, times, calories) as a sorted index: the
+  row order that sorts the column and the sorted values, so a range is two
+  binary searches and a slice of row ids;
+- categorical columns (genre, director, author, artist, cast) as postings:
+  the sorted rows of every distinct lowercase value, and the values of
+  every row, so memory follows the number of cells rather than values times
+  rows, which matters for high-cardinality columns like director or
+  author; fields that list several people, like cast, hold each person.
+
+parse() turns the constraints a query states into hashable RangeFilter and
+ValueFilter tuples, which the query plan caches, and mask() ANDs them into
+one boolean row mask; passes() checks a given set of rows against them
+without touching the rest of the catalog. filtered_top_k ranks only the allowed rows: a small
+candidate set is scored directly, with the domain retriever's own model
+(exact TF-IDF, LSA vectors or the probed clusters), so a selective filter
+makes the query cheaper without changing how it is ranked, and a broad one
+is passed to the retriever as an exclude mask.
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from query_matchers import split_people, tokenize
+from ranking import top_k_unique
+
+# Inclusive bounds on a numeric column; None leaves that side open
+RangeFilter = namedtuple('RangeFilter', 'column low high')
+# Rows whose (lowercase) column value is any of values
+ValueFilter = namedtuple('ValueFilter', 'column values')
+
+# Numeric column behind each kind of range constraint, per domain
+NUMERIC_FILTER_COLUMNS = {
+    'movies': {'year': 'release_year', 'rating': 'rating', 'duration': 'duration'},
+    'books': {'year': 'published_year', 'rating': 'average_rating', 'pages': 'pages'},
+    'food': {'rating': 'rating', 'cooking_time': 'cooking_time', 'calories': 'calories'},
+    'music': {'year': 'release_year', 'rating': 'popularity'},
+    'tv_shows': {'year': 'release_year', 'rating': 'rating'},
+}
+
+# Categorical columns with postings, per domain; their values are also the
+# vocabularies (genres, moods) that mentioned() looks for in queries
+CATEGORICAL_FILTER_COLUMNS = {
+    'movies': ('genre', 'mood', 'director', 'cast'),
+    'books': ('genre', 'mood', 'author'),
+    'food': ('cuisine_type', 'category', 'mood'),
+    'music': ('genre', 'mood', 'artist'),
+    'tv_shows': ('genre', 'mood', 'director', 'cast'),
+}
+
+# Fields listing several people, split into single names
+SPLIT_FILTER_COLUMNS = ('cast',)
+
+# "high ratings" keeps rows at or above this quantile of the rating column
+HIGH_RATING_QUANTILE = 0.75
+
+# Candidate share of the catalog up to which allowed rows are scored directly
+FILTER_SCAN_FRACTION = 0.25
+
+_DECADE_RE = re.compile(r"\b(?P<century>19|20)?(?P<decade>\d)0'?s\b")
+_YEAR_RE = re.compile(r'\b(?P<op>after|since|from|before|in)\s+(?P<year>(?:19|20)\d\d)\b(?!s)')
+_YEAR_SPAN_RE = re.compile(r'\bbetween\s+(?P<low>(?:19|20)\d\d)\s+and\s+(?P<high>(?:19|20)\d\d)\b')
+_HIGH_RATING_RE = re.compile(r'\b(?:high(?:ly)?[\s-]+rat(?:ed|ings?)|(?:top|best|well)[\s-]+rated|acclaimed)\b')
+_RATED_ABOVE_RE = re.compile(r'\brat(?:ed|ings?)\s+(?:above|over|of at least|at least)\s+(?P<value>\d+(?:\.\d+)?)')
+_MINUTES_RE = re.compile(
+    r'\b(?:(?:under|less than|within|at most|in)\s+(?P<limit>\d+)\s*(?:min(?:ute)?s?)\b|(?P<span>\d+)[\s-]min(?:ute)?\b)'
+)
+_CALORIES_RE = re.compile(r'\b(?:under|less than|below|at most)\s+(?P<limit>\d+)\s*(?:cal(?:orie)?s?|kcal)\b')
+_GENRE_RE = re.compile(r'\bgenres?\b')
+
+
+class SortedColumn:
+    """A numeric column as its sorting row order and sorted values, NaN last"""
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.values = values
+        self.n_rows = len(values)
+        self.order = np.argsort(values, kind='stable')
+        self.sorted = values[self.order]
+        self.n_valid = self.n_rows - int(np.count_nonzero(np.isnan(values)))
+
+    def rows(self, low=None, high=None):
+        """Row ids with low <= value <= high, in value order"""
+        start = 0 if low is None else np.searchsorted(self.sorted[:self.n_valid], low, side='left')
+        end = self.n_valid if high is None else np.searchsorted(self.sorted[:self.n_valid], high, side='right')
+        return self.order[start:end]
+
+    def quantile(self, q):
+        """Value at quantile q of the non-missing values"""
+        if not self.n_valid:
+            return None
+        # Rounded like displayed numbers, so a float32 column yields its catalog value (7.9, not 7.900000095)
+        return round(float(self.sorted[int(q * (self.n_valid - 1))]), 6)
+
+
+class ColumnPostings:
+    """A categorical column as the sorted rows of each distinct lowercase value, and the value codes of each row"""
+    def __init__(self, values, split=False):
+        # Rows grouped by distinct value, so each value is lowercased and split only once
+        codes, uniques = pd.factorize(pd.Series(values))
+        self.n_rows = len(codes)
+        order = np.argsort(codes, kind='stable')
+        starts = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self.codes = {}
+        name_codes, cell_rows = [np.empty(0, dtype=np.int32)], [np.empty(0, dtype=np.int32)]
+        for code, value in enumerate(uniques):
+            value = str(value).lower()
+            rows = order[starts[code]:starts[code + 1]]
+            for name in (split_people(value) if split else [value]):
+                name_codes.append(np.full(len(rows), self.codes.setdefault(name, len(self.codes)), dtype=np.int32))
+                cell_rows.append(rows.astype(np.int32))
+        self.values = tuple(self.codes)
+        n_values = len(self.codes)
+
+        # Value -> rows, sorted and without repeats (values differing only in case share a name)
+        name_codes, cell_rows = np.concatenate(name_codes), np.concatenate(cell_rows)
+        order = np.lexsort((cell_rows, name_codes))
+        name_codes, cell_rows = name_codes[order], cell_rows[order]
+        distinct = np.ones(len(order), dtype=bool)
+        distinct[1:] = (name_codes[1:] != name_codes[:-1]) | (cell_rows[1:] != cell_rows[:-1])
+        name_codes, self.rows = name_codes[distinct], cell_rows[distinct]
+        self.indptr = np.searchsorted(name_codes, np.arange(n_values + 1)).astype(np.int32)
+        # Row -> values, the same cells in row order
+        order = np.argsort(self.rows, kind='stable')
+        self.row_values = name_codes[order]
+        self.row_indptr = np.searchsorted(self.rows[order], np.arange(self.n_rows + 1)).astype(np.int32)
+
+    def mask(self, values):
+        """Rows holding any of values"""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for value in values:
+            code = self.codes.get(value)
+            if code is not None:
+                mask[self.rows[self.indptr[code]:self.indptr[code + 1]]] = True
+        return mask
+
+    def test(self, rows, values):
+        """Which of rows hold any of values, reading only those rows' values"""
+        codes = [self.codes[value] for value in values if value in self.codes]
+        if not codes:
+            return np.zeros(len(rows), dtype=bool)
+        starts = self.row_indptr[rows]
+        lengths = self.row_indptr[np.asarray(rows) + 1] - starts
+        # Positions of every value of the given rows, row after row
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        held = np.isin(self.row_values[np.repeat(starts, lengths) + offsets], codes)
+        keep = np.zeros(len(rows), dtype=bool)
+        keep[np.repeat(np.arange(len(rows)), lengths)[held]] = True
+        return keep
+
+
+class AttributeIndex:
+    """Sorted indexes and value postings over one domain's filterable columns"""
+    def __init__(self, df, numeric_columns, categorical_columns, split_columns=SPLIT_FILTER_COLUMNS):
+        self.n_rows = len(df)
+        # Constraint kind -> column, for the kinds this catalog has
+        self.kinds = {kind: column for kind, column in numeric_columns.items() if column in df.columns}
+        self.numeric = {column: SortedColumn(df[column]) for column in set(self.kinds.values())}
+        self.categorical = {
+            column: ColumnPostings(df[column], split=column in split_columns)
+            for column in categorical_columns if column in df.columns
+        }
+
+    def parse(self, query, entities=()):
+        """Filters stated by a query, as a tuple of RangeFilter and ValueFilter.
+
+        entities are (domain, field, name) mentions found by the entity matcher;
+        those naming a categorical column become value filters.
+        """
+        query = query.lower()
+        filters = []
+        year = self.kinds.get('year')
+        if year:
+            span = _YEAR_SPAN_RE.search(query)
+            decade = _DECADE_RE.search(query)
+            bound = _YEAR_RE.search(query)
+            if span:
+                filters.append(RangeFilter(year, int(span['low']), int(span['high'])))
+            elif decade:
+                century = decade['century'] or ('19' if int(decade['decade']) >= 3 else '20')
+                start = int(century + decade['decade'] + '0')
+                filters.append(RangeFilter(year, start, start + 9))
+            elif bound:
+                value = int(bound['year'])
+                low, high = {'after': (value + 1, None), 'since': (value, None), 'from': (value, None),
+                             'before': (None, value - 1), 'in': (value, value)}[bound['op']]
+                filters.append(RangeFilter(year, low, high))
+
+        rating = self.kinds.get('rating')
+        if rating:
+            above = _RATED_ABOVE_RE.search(query)
+            if above:
+                filters.append(RangeFilter(rating, float(above['value']), None))
+            elif _HIGH_RATING_RE.search(query):
+                threshold = self.numeric[rating].quantile(HIGH_RATING_QUANTILE)
+                if threshold is not None:
+                    filters.append(RangeFilter(rating, threshold, None))
+
+        minutes = _MINUTES_RE.search(query)
+        if minutes and 'cooking_time' in self.kinds:
+            filters.append(RangeFilter(self.kinds['cooking_time'], None, int(minutes['limit'] or minutes['span'])))
+        calories = _CALORIES_RE.search(query)
+        if calories and 'calories' in self.kinds:
+            filters.append(RangeFilter(self.kinds['calories'], None, int(calories['limit'])))
+
+        # Genres are a hard constraint only when the query says "genre";
+        # otherwise genre words stay soft text matches
+        if _GENRE_RE.search(query):
+            genres = self.mentioned('genre', query)
+            if genres:
+                filters.append(ValueFilter('genre', genres))
+
+        people = {}
+        for _, field, name in entities:
+            if field in self.categorical:
+                people.setdefault(field, []).append(name)
+        filters.extend(ValueFilter(field, tuple(names)) for field, names in people.items())
+        return tuple(filters)
+
+    def mentioned(self, column, query):
+        """Values of a categorical column whose words all occur in the query"""
+        if column not in self.categorical:
+            return ()
+        words = set(tokenize(query))
+        return tuple(value for value in self.categorical[column].values if set(tokenize(value)) <= words)
+
+    def passes(self, rows, filters):
+        """Boolean array: which of rows pass every filter"""
+        keep = np.ones(len(rows), dtype=bool)
+        for spec in filters:
+            if isinstance(spec, RangeFilter):
+                values = self.numeric[spec.column].values[rows]
+                if spec.low is not None:
+                    keep &= values >= spec.low
+                if spec.high is not None:
+                    keep &= values <= spec.high
+            else:
+                keep &= self.categorical[spec.column].test(rows, spec.values)
+        return keep
+
+    def mask(self, filters):
+        """Boolean mask of the rows passing every filter, or None when there are none"""
+        if not filters:
+            return None
+        allowed = np.ones(self.n_rows, dtype=bool)
+        for spec in filters:
+            if isinstance(spec, RangeFilter):
+                passing = np.zeros(self.n_rows, dtype=bool)
+                passing[self.numeric[spec.column].rows(spec.low, spec.high)] = True
+            else:
+                passing = self.categorical[spec.column].mask(spec.values)
+            allowed &= passing
+        return allowed
+
+
+def filtered_top_k(retriever, matrix, query_vec, k, groups, allowed, exclude=None):
+    """Best k allowed rows as (rows, scores), one per group, as PostingsIndex.top_k.
+
+    When few rows are allowed, they are scored directly and ties go to the
+    earlier row: by the retriever's score_rows when it has one (LSA or
+    cluster retrieval), otherwise from their TF-IDF rows (l2-normalized, as
+    the vectorizer outputs them). When many are, the retriever ranks with
+    the disallowed rows excluded. Allowed rows without a matching term are
+    returned with score 0 after the matches, as the retriever's
+    position-order padding does.
+    """
+    if exclude is not None:
+        allowed = allowed & ~exclude
+    rows = np.flatnonzero(allowed)
+    if len(rows) > FILTER_SCAN_FRACTION * len(allowed):
+        return retriever.top_k(query_vec, k, groups, ~allowed)
+    score_rows = getattr(retriever, 'score_rows', None)
+    if score_rows is not None:
+        scores = score_rows(query_vec, rows)
+    else:
+        # A dense query makes the row scores one sparse-matrix-by-vector product
+        query = np.zeros(matrix.shape[1])
+        query[query_vec.indices] = query_vec.data
+        scores = matrix[rows] @ query
+    best = top_k_unique(scores, k, groups[rows])
+    return rows[best], scores[best]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Scaling of the audio-feature k-NN index.
+
+Builds an AudioIndex over synthetic catalogs of increasing size, with
+features drawn from the shipped music.csv, and compares the per-query
+cost of batched tree queries with a brute-force scan of the standardized
+matrix. Results are checked against the scan.
+
+    python benchmarks/bench_audio.py --sizes 10000,100000,1000000 --k 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from audio_index import AUDIO_FEATURES, TREE_TYPES, AudioIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audio-feature k-NN benchmark')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--tree', default='kd_tree', choices=TREE_TYPES)
+    args = parser.parse_args()
+
+    music = pd.read_csv(os.path.join(ROOT, 'music.csv'), usecols=list(AUDIO_FEATURES))
+    rng = np.random.default_rng(0)
+    print(f"{'tracks':>9} {'build s':>8} {'tree us/q':>10} {'scan us/q':>10} {'agree':>6}")
+    for size in (int(size) for size in args.sizes.split(',')):
+        # Resample the shipped tracks and jitter them so rows are distinct
+        frame = music.iloc[rng.integers(0, len(music), size)].reset_index(drop=True)
+        frame = frame * rng.normal(1.0, 0.05, frame.shape)
+
+        start = time.perf_counter()
+        index = AudioIndex(frame, tree=args.tree)
+        build = time.perf_counter() - start
+
+        targets = index.vectors[rng.integers(0, size, args.queries)]
+        start = time.perf_counter()
+        results = index.query(targets, args.k)
+        tree_time = (time.perf_counter() - start) / args.queries
+
+        scanned = min(args.queries, 50)
+        start = time.perf_counter()
+        agree = 0
+        for target, (rows, _) in zip(targets[:scanned], results):
+            distances = ((index.vectors - target) ** 2).sum(axis=1)
+            nearest = np.argpartition(distances, args.k)[:args.k]
+            agree += len(set(nearest) & set(rows)) == args.k
+        scan_time = (time.perf_counter() - start) / scanned
+        print(f"{size:>9} {build:>8.2f} {tree_time * 1e6:>10.1f} {scan_time * 1e6:>10.1f} {agree / scanned:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
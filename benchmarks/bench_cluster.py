@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Recall, latency and work of cluster-pruned TF-IDF search against exact search.
+
+For each catalog scale, every domain gets a ClusterPrunedIndex over the
+clusters in its *_processed.csv, and the benchmark corpus is ranked by
+exact TF-IDF through the postings index (the reference) and by the pruned
+index at every n_probe from 1 to the number of clusters. It prints recall@k
+in distinct titles against the exact ranking, the median latency per query
+and the share of posting entries the pruned index scores (work).
+
+    python benchmarks/bench_cluster.py --scales 1,10 --k 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from bench_dense import recall, timed
+from bench_detect_domain import QUERIES
+from bench_suite import QUERY_CORPUS, synthetic_catalog
+from catalog_store import CatalogCache
+from cluster_index import ClusterPrunedIndex, read_cluster_labels
+from recommender_core import DOMAINS, ID_COLUMNS, AdvancedRecommender
+
+
+def entries(postings, terms):
+    """Posting entries a query with these terms touches"""
+    return int(np.sum(postings.indptr[terms + 1] - postings.indptr[terms]))
+
+
+def bench_scale(recommender, data_path, queries, k):
+    recalls, latency, work = {}, {'exact': []}, {}
+    build, n_clusters = 0.0, 0
+    for domain in DOMAINS:
+        domain_queries = [text for d, text, *_ in queries if d == domain]
+        if not domain_queries:
+            continue
+        df = getattr(recommender, f"{domain}_df")
+        clusters = read_cluster_labels(data_path, domain, ID_COLUMNS[domain], df[ID_COLUMNS[domain]])
+        start = time.perf_counter()
+        index = ClusterPrunedIndex(recommender.tfidf_matrices[domain], clusters)
+        build += time.perf_counter() - start
+        n_clusters = max(n_clusters, index.n_clusters)
+        codes = recommender._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+        postings = recommender.postings[domain]
+        for text in domain_queries:
+            query_vec = recommender.tfidf_vectorizers[domain].transform([text])
+            _, exact = timed(latency['exact'], postings.top_k, query_vec, k, codes)
+            if not exact.any():
+                continue
+            tfidf_scores = (postings.matrix @ query_vec.T).toarray().ravel()
+            full = entries(postings, query_vec.indices)
+            for n_probe in range(1, index.n_clusters + 1):
+                index.n_probe = n_probe
+                found, _ = timed(latency.setdefault(n_probe, []), index.top_k, query_vec, k, codes)
+                recalls.setdefault(n_probe, []).append(recall(found, tfidf_scores, exact, codes))
+                probed = index.score(query_vec)[0]
+                probed = int(np.count_nonzero(postings.matrix[probed][:, query_vec.indices].toarray()))
+                work.setdefault(n_probe, []).append(probed / full)
+    return build, n_clusters, recalls, latency, work
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cluster-pruned TF-IDF recall and latency benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated catalog multipliers')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept')
+    args = parser.parse_args()
+
+    corpus = list(dict.fromkeys(QUERY_CORPUS + QUERIES))
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for scale in (int(scale) for scale in args.scales.split(',')):
+            data_path = synthetic_catalog(scale, workdir)
+            catalog = CatalogCache(data_path, cache_dir=os.path.join(tmp, f"catalog_x{scale}"))
+            recommender = AdvancedRecommender(*catalog.load(), catalog=catalog)
+            queries = [recommender.plan_query(query) for query in corpus]
+            build, n_clusters, recalls, latency, work = bench_scale(recommender, data_path, queries, args.k)
+
+            rows = sum(len(getattr(recommender, f"{domain}_df")) for domain in DOMAINS)
+            print(f"\n== {scale}x catalog ({rows} rows, {n_clusters} clusters), indexes built in {build:.2f} s, "
+                  f"{len(recalls[1])} queries")
+            print(f"  {'n_probe':>7} {f'recall@{args.k}':>10} {'work':>6} {'us/q':>8}")
+            print(f"  {'exact':>7} {1.0:>10.3f} {1.0:>6.0%} {statistics.median(latency['exact']) * 1e6:>8.1f}")
+            for n_probe in range(1, n_clusters + 1):
+                print(f"  {n_probe:>7} {statistics.fmean(recalls[n_probe]):>10.3f} "
+                      f"{statistics.fmean(work[n_probe]):>6.0%} {statistics.median(latency[n_probe]) * 1e6:>8.1f}")
+            del recommender
+
+
+if __name__ == "__main__":
+    main()
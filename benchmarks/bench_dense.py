@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of dense LSA + ANN retrieval against exact TF-IDF.
+
+For each catalog scale, every domain gets a DenseIndex and the benchmark
+corpus is ranked three ways: exact TF-IDF cosine through the postings
+index (the reference), exhaustive LSA (every row's dense vector scored)
+and the ANN index. It prints recall@k in distinct titles of LSA and of the
+ANN against exact TF-IDF, the ANN's recall against exhaustive LSA (the
+part lost to approximate search alone), and the median latency per query.
+The ANN latency includes projecting the query; the exhaustive LSA one does not.
+
+    python benchmarks/bench_dense.py --scales 1,10 --k 10
+    python benchmarks/bench_dense.py --method ivf --n-probe 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from bench_detect_domain import QUERIES
+from bench_suite import QUERY_CORPUS, synthetic_catalog
+from catalog_store import CatalogCache
+from dense_index import ANN_METHODS, DEFAULT_N_PROBE, DenseIndex
+from ranking import top_k_unique
+from recommender_core import DOMAINS, AdvancedRecommender
+
+
+def recall(found, scores, reference, codes):
+    """Share of the reference's matched titles that found titles match or beat.
+
+    A found title counts by its best row's score, and any title scoring at
+    least the reference's k-th best is a hit, so titles tied with the
+    reference results (common in the synthetic catalogs) are not misses.
+    """
+    reference = reference[reference > 0]
+    if not len(reference):
+        return None
+    title_scores = np.full(codes.max() + 1, -np.inf)
+    np.maximum.at(title_scores, codes, scores)
+    hits = np.count_nonzero(title_scores[codes[found]] >= reference[-1] - 1e-6)
+    return min(hits, len(reference)) / len(reference)
+
+
+def timed(samples, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def bench_scale(recommender, queries, k, method, n_probe):
+    recalls = {'lsa': [], 'ann': [], 'ann_vs_lsa': []}
+    latency = {'tfidf': [], 'lsa': [], 'ann': []}
+    build = 0.0
+    for domain in DOMAINS:
+        domain_queries = [text for d, text, *_ in queries if d == domain]
+        if not domain_queries:
+            continue
+        start = time.perf_counter()
+        dense = DenseIndex(recommender.tfidf_matrices[domain], method=method, n_probe=n_probe)
+        build += time.perf_counter() - start
+        df = getattr(recommender, f"{domain}_df")
+        codes = recommender._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+        postings = recommender.postings[domain]
+        for text in domain_queries:
+            query_vec = recommender.tfidf_vectorizers[domain].transform([text])
+            _, exact = timed(latency['tfidf'], postings.top_k, query_vec, k, codes)
+            if not exact.any():
+                continue
+            query = dense.projection.transform(query_vec)[0]
+
+            def exhaustive():
+                lsa_scores = dense.vectors @ query
+                return top_k_unique(lsa_scores, k, codes), lsa_scores
+            lsa, lsa_scores = timed(latency['lsa'], exhaustive)
+            ann, _ = timed(latency['ann'], dense.top_k, query_vec, k, codes)
+            # Exact cosine of every row, to judge the dense results by
+            tfidf_scores = (postings.matrix @ query_vec.T).toarray().ravel()
+            recalls['lsa'].append(recall(lsa, tfidf_scores, exact, codes))
+            recalls['ann'].append(recall(ann, tfidf_scores, exact, codes))
+            recalls['ann_vs_lsa'].append(recall(ann, lsa_scores, lsa_scores[lsa], codes))
+    return dense.method, build, recalls, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dense LSA + ANN recall and latency benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated catalog multipliers')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--method', default='auto', choices=ANN_METHODS)
+    parser.add_argument('--n-probe', type=int, default=DEFAULT_N_PROBE)
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept')
+    args = parser.parse_args()
+
+    corpus = list(dict.fromkeys(QUERY_CORPUS + QUERIES))
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for scale in (int(scale) for scale in args.scales.split(',')):
+            data_path = synthetic_catalog(scale, workdir)
+            catalog = CatalogCache(data_path, cache_dir=os.path.join(tmp, f"catalog_x{scale}"))
+            recommender = AdvancedRecommender(*catalog.load(), catalog=catalog)
+            queries = [recommender.plan_query(query) for query in corpus]
+            method, build, recalls, latency = bench_scale(recommender, queries, args.k, args.method, args.n_probe)
+
+            rows = sum(len(getattr(recommender, f"{domain}_df")) for domain in DOMAINS)
+            print(f"\n== {scale}x catalog ({rows} rows), {method} index built in {build:.2f} s, "
+                  f"{len(recalls['ann'])} queries")
+            for name, label in (('lsa', 'LSA exhaustive vs TF-IDF'), ('ann', f"LSA {method} vs TF-IDF"),
+                                ('ann_vs_lsa', f"LSA {method} vs LSA exhaustive")):
+                print(f"  recall@{args.k} {label:<30} {statistics.fmean(recalls[name]):.3f}")
+            for name, label in (('tfidf', 'TF-IDF postings'), ('lsa', 'LSA exhaustive'), ('ann', f"LSA {method}")):
+                print(f"  latency {label:<32} {statistics.median(latency[name]) * 1e6:8.1f} us median")
+            del recommender
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for detect_domain keyword scoring.
+
+Compares the precompiled DomainKeywordScorer against the previous approach
+of one re.search per keyword, checks that both produce identical scores on
+the query corpus plus randomized queries, and prints per-query cost.
+
+    python benchmarks/bench_detect_domain.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender_core import DOMAIN_KEYWORDS
+from query_matchers import DomainKeywordScorer
+
+QUERIES = [
+    "Suggest movies with a slow-burn romance",
+    "Recommend animated series for adults",
+    "Share nostalgic 2000s hits",
+    "Recommend books with poetic writing styles",
+    "What are some easy vegetarian dishes?",
+    "Taylor Swift songs for workout",
+    "quick and easy weeknight pasta recipes",
+    "some good comedy shows on netflix",
+    "a scary horror novel with plot twists",
+    "romcom movies",
+]
+
+
+def regex_scores(query_lower):
+    """Reference implementation: one regex search per keyword"""
+    domain_scores = {domain: 0 for domain in DOMAIN_KEYWORDS}
+    for domain, keywords in DOMAIN_KEYWORDS.items():
+        for keyword in keywords:
+            if re.search(r'\b' + re.escape(keyword) + r'\b', query_lower):
+                domain_scores[domain] += 2
+            elif len(keyword) > 3 and keyword in query_lower:
+                domain_scores[domain] += 1
+    return domain_scores
+
+
+def random_queries(n, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [kw for keywords in DOMAIN_KEYWORDS.values() for kw in keywords]
+    fillers = ['a', 'the', 'x', '-', ' ', '2000s', 'ish', 'un', 'for', '!']
+    queries = []
+    for _ in range(n):
+        parts = [rng.choice(vocabulary if rng.random() < 0.6 else fillers) for _ in range(rng.randint(1, 6))]
+        joiner = rng.choice([' ', '', '-', ' '])
+        queries.append(joiner.join(parts))
+    return queries
+
+
+def main():
+    build_time = timeit.timeit(lambda: DomainKeywordScorer(DOMAIN_KEYWORDS), number=5) / 5
+    scorer = DomainKeywordScorer(DOMAIN_KEYWORDS)
+
+    corpus = [q.lower() for q in QUERIES] + random_queries(2000)
+    mismatches = [q for q in corpus if scorer.score(q) != regex_scores(q)]
+    if mismatches:
+        print(f"MISMATCH on {len(mismatches)} queries, e.g. {mismatches[:3]}")
+        sys.exit(1)
+
+    queries = [q.lower() for q in QUERIES]
+    rounds = 200
+    regex_time = timeit.timeit(lambda: [regex_scores(q) for q in queries], number=rounds)
+    automaton_time = timeit.timeit(lambda: [scorer.score(q) for q in queries], number=rounds)
+    per_query = rounds * len(queries)
+
+    print(f"scores identical on {len(corpus)} queries")
+    print(f"automaton build:        {build_time * 1e3:8.2f} ms (once per recommender)")
+    print(f"regex per keyword:      {regex_time / per_query * 1e6:8.1f} us/query")
+    print(f"keyword automaton:      {automaton_time / per_query * 1e6:8.1f} us/query")
+    print(f"speedup:                {regex_time / automaton_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
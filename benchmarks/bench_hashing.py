@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Hashed TF-IDF features against the fitted 2000-term vocabularies.
+
+For each catalog scale and domain, the combined text is fitted by
+TfidfVectorizer(**TFIDF_PARAMS) and by HashedTfidfVectorizer at every
+bucket count. It prints the fit time, the peak memory allocated while
+fitting (tracemalloc, in a second fit, as tracing slows Python code) and
+the size of the fitted model, the median time to vectorize one query, and
+the agreement of the rankings: recall@k in distinct titles of the top k
+against the vocabulary ranking, scored by the vocabulary model (as in
+bench_dense, titles tied with its results count as hits), over the queries
+that match anything in that ranking.
+
+    python benchmarks/bench_hashing.py --scales 1,10 --buckets 65536,262144,1048576
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from bench_dense import recall
+from bench_detect_domain import QUERIES
+from bench_suite import QUERY_CORPUS, synthetic_catalog
+from catalog_store import CatalogCache
+from hashed_features import HashedTfidfVectorizer
+from postings import PostingsIndex
+from recommender_core import COMBINED_TEXT_COLUMNS, DOMAINS, TFIDF_PARAMS, AdvancedRecommender, _combined_text
+
+
+def fitted(make, texts):
+    """Fit a new vectorizer; returns it, its matrix, seconds and peak bytes allocated"""
+    start = time.perf_counter()
+    vectorizer = make()
+    matrix = vectorizer.fit_transform(texts)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    make().fit_transform(texts)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return vectorizer, matrix, seconds, peak
+
+
+def model_bytes(vectorizer):
+    """Bytes held by a fitted model: vocabulary dict and IDF, or bucket counts and IDF"""
+    if isinstance(vectorizer, HashedTfidfVectorizer):
+        return vectorizer.doc_freq.nbytes + vectorizer.idf_.nbytes + vectorizer._seen_idf.nbytes
+    vocabulary = vectorizer.vocabulary_
+    return (sys.getsizeof(vocabulary) + sum(sys.getsizeof(term) for term in vocabulary)
+            + vectorizer.idf_.nbytes)
+
+
+def rankings(vectorizer, matrix, queries, k, codes):
+    """Top k rows of each query, and the median seconds to vectorize one"""
+    index = PostingsIndex(matrix)
+    ranked, times = [], []
+    for text in queries:
+        start = time.perf_counter()
+        query_vec = vectorizer.transform([text])
+        times.append(time.perf_counter() - start)
+        ranked.append(index.top_k(query_vec, k, codes))
+    return ranked, statistics.median(times)
+
+
+def bench_domain(recommender, domain, queries, buckets, k):
+    df = getattr(recommender, f"{domain}_df")
+    texts = _combined_text(df, COMBINED_TEXT_COLUMNS[domain])
+    codes = recommender._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+    params = {key: value for key, value in TFIDF_PARAMS.items() if key != 'max_features'}
+    reference_model, reference_matrix, seconds, peak = fitted(lambda: TfidfVectorizer(**TFIDF_PARAMS), texts)
+    reference, latency = rankings(reference_model, reference_matrix, queries, k, codes)
+    rows = [('vocabulary', seconds, peak, model_bytes(reference_model), latency, 1.0)]
+    reference_scores = [(reference_matrix @ reference_model.transform([text]).T).toarray().ravel() for text in queries]
+    for n_buckets in buckets:
+        vectorizer, matrix, seconds, peak = fitted(lambda: HashedTfidfVectorizer(n_buckets, **params), texts)
+        ranked, latency = rankings(vectorizer, matrix, queries, k, codes)
+        recalls = [recall(rows_found, scores, expected, codes)
+                   for (rows_found, _), scores, (_, expected) in zip(ranked, reference_scores, reference)]
+        recalls = [value for value in recalls if value is not None]
+        rows.append((f"hashing {n_buckets}", seconds, peak, model_bytes(vectorizer), latency,
+                     statistics.fmean(recalls) if recalls else float('nan')))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hashed vs vocabulary TF-IDF features benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated catalog multipliers')
+    parser.add_argument('--buckets', default='65536,262144,1048576', help='comma-separated bucket counts')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept')
+    args = parser.parse_args()
+
+    buckets = [int(n) for n in args.buckets.split(',')]
+    corpus = list(dict.fromkeys(QUERY_CORPUS + QUERIES))
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for scale in (int(scale) for scale in args.scales.split(',')):
+            data_path = synthetic_catalog(scale, workdir)
+            catalog = CatalogCache(data_path, cache_dir=os.path.join(tmp, f"catalog_x{scale}"))
+            recommender = AdvancedRecommender(*catalog.load(), catalog=catalog)
+            plans = [recommender.plan_query(query) for query in corpus]
+            for domain in DOMAINS:
+                queries = [plan.query for plan in plans if plan.domain == domain]
+                if not queries:
+                    continue
+                rows = len(getattr(recommender, f"{domain}_df"))
+                print(f"\n== {scale}x catalog, {domain} ({rows} rows, {len(queries)} queries)")
+                print(f"  {'features':<16} {'fit s':>7} {'peak MB':>8} {'model MB':>9} {'us/query':>9} "
+                      f"{f'recall@{args.k}':>11}")
+                for name, seconds, peak, size, latency, agreement in bench_domain(recommender, domain, queries,
+                                                                                buckets, args.k):
+                    print(f"  {name:<16} {seconds:>7.2f} {peak / 2 ** 20:>8.1f} {size / 2 ** 20:>9.2f} "
+                          f"{latency * 1e6:>9.1f} {agreement:>11.3f}")
+            del recommender
+
+
+if __name__ == "__main__":
+    main()
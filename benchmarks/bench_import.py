@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Cold import cost of the recommender core versus the Streamlit app.
+
+Each module is imported in a fresh interpreter with -X importtime and the
+cumulative time of the top-level import is reported. The core must not
+pull in Streamlit, pandas, numpy, scikit-learn or difflib at import time.
+
+    python benchmarks/bench_import.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('streamlit', 'pandas', 'numpy', 'sklearn', 'scipy', 'difflib')
+ROUNDS = 5
+
+
+def import_time_us(module):
+    """Cumulative -X importtime microseconds for importing module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def loaded_heavy_modules(module):
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    # Warm the bytecode cache so every round measures a cold interpreter, not compilation
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', ROOT], check=True)
+
+    heavy = loaded_heavy_modules('recommender_core')
+    if heavy:
+        print(f"recommender_core imports heavy modules eagerly: {', '.join(heavy)}")
+        sys.exit(1)
+
+    for module in ('recommender_core', 'recommendation_app'):
+        times = [import_time_us(module) for _ in range(ROUNDS)]
+        print(f"import {module:<20} {statistics.median(times) / 1e3:8.1f} ms (median of {ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Memory footprint of the recommender by domain and component.
+
+For each catalog scale the recommender is built twice: from frames parsed
+by pandas.read_csv with inferred dtypes and models fitted in process, and
+from the columnar catalog with memory-mapped index artifacts. It prints
+AdvancedRecommender.memory_report() after a few queries (resident bytes per
+component and domain, then the mapped file bytes), the size the read_csv
+frames had before they were cast to the declared catalog dtypes, and the
+process RSS.
+
+    python benchmarks/bench_memory.py --scales 1,10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from bench_suite import QUERY_CORPUS, synthetic_catalog
+from catalog_store import CatalogCache
+from recommender_core import DOMAINS, AdvancedRecommender
+
+
+def rss_bytes():
+    """Resident set size of this process, or None off Linux"""
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def print_report(report):
+    columns = list(DOMAINS) + ['shared']
+    print(f"  {'MB':<24}" + ''.join(f"{column:>10}" for column in columns))
+    for title, table in (('resident', report['resident']), ('mapped', report['mapped'])):
+        components = list(dict.fromkeys(component for domain in columns for component in table.get(domain, {})))
+        for component in components:
+            sizes = [table.get(domain, {}).get(component) for domain in columns]
+            print(f"  {f'{title} {component}':<24}"
+                  + ''.join(f"{size / 2 ** 20:>10.2f}" if size is not None else f"{'':>10}" for size in sizes))
+    print(f"  resident total {report['resident_total'] / 2 ** 20:.1f} MB, "
+          f"mapped total {report['mapped_total'] / 2 ** 20:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommender memory footprint benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated catalog multipliers')
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for scale in (int(scale) for scale in args.scales.split(',')):
+            data_path = synthetic_catalog(scale, workdir)
+            frames = [pd.read_csv(os.path.join(data_path, f"{domain}.csv")) for domain in DOMAINS]
+            inferred = sum(int(df.memory_usage(deep=True).sum()) for df in frames)
+            recommender = AdvancedRecommender(*frames)
+            del frames
+            for query in QUERY_CORPUS:
+                recommender.process_query(query)
+            print(f"\n== {scale}x catalog, read_csv frames, fitted in process (RSS {rss_bytes() / 2 ** 20:.0f} MB)")
+            print(f"  frames with inferred dtypes {inferred / 2 ** 20:.1f} MB")
+            print_report(recommender.memory_report())
+            del recommender
+
+            catalog = CatalogCache(data_path, cache_dir=os.path.join(tmp, f"catalog_x{scale}"))
+            index_dir = os.path.join(tmp, f"index_x{scale}")
+            AdvancedRecommender(*catalog.load(), catalog=catalog, index_dir=index_dir)
+            recommender = AdvancedRecommender(*catalog.load(), catalog=catalog, index_dir=index_dir)
+            for query in QUERY_CORPUS:
+                recommender.process_query(query)
+            print(f"\n== {scale}x catalog, columnar catalog and mapped index (RSS {rss_bytes() / 2 ** 20:.0f} MB)")
+            print_report(recommender.memory_report())
+            del recommender
+
+
+if __name__ == "__main__":
+    main()
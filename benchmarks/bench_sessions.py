@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Memory and cost of per-session seen-title tracking.
+
+Simulates many distinct sessions, each asking a few queries through
+get_recommendations, and prints the session store's size and the process
+RSS as sessions accumulate. Once the store reaches its session cap the
+byte count must stop growing. Also times the seen-mask lookup.
+
+    python benchmarks/bench_sessions.py --sessions 15000 --max-sessions 5000
+"""
+
+import argparse
+import os
+import resource
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_detect_domain import QUERIES
+from recommender_core import OptimizedMultiDomainRecommendationSystem
+from session_state import SessionStore
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-session seen-title tracking benchmark')
+    parser.add_argument('--sessions', type=int, default=15000)
+    parser.add_argument('--queries-per-session', type=int, default=2)
+    parser.add_argument('--max-sessions', type=int, default=5000)
+    args = parser.parse_args()
+
+    system = OptimizedMultiDomainRecommendationSystem(data_path=ROOT)
+    if not system.load_preprocessed_data():
+        sys.exit("could not load the catalogs")
+    recommender = system.recommender
+    recommender.sessions = SessionStore(max_sessions=args.max_sessions)
+    plans = [recommender.cached_plan(q.lower()) for q in QUERIES]
+    plans = [(domain, text) for domain, text, *_ in plans if domain]
+
+    checkpoint = max(1, args.sessions // 6)
+    print(f"{'sessions':>9} {'stored':>7} {'store KiB':>10} {'max RSS MiB':>12}")
+    for i in range(args.sessions):
+        for j in range(args.queries_per_session):
+            domain, text = plans[(i + j) % len(plans)]
+            recommender.get_recommendations(domain, text, 3, session_id=f"session-{i}")
+        if (i + 1) % checkpoint == 0:
+            stats = recommender.sessions.stats()
+            print(f"{i + 1:>9} {stats['sessions']:>7} {stats['bytes'] / 1024:>10.1f} {rss_mb():>12.1f}")
+
+    domain, text = plans[0]
+    df = getattr(recommender, f"{domain}_df")
+    codes = recommender._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+    session = f"session-{args.sessions - 1}"
+    recommender.get_recommendations(domain, text, 3, session_id=session)
+    per_call = timeit.timeit(lambda: recommender._seen_mask(domain, codes, session), number=2000) / 2000
+    print(f"seen mask over {len(codes)} {domain} rows: {per_call * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
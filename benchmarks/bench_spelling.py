@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for correct_spelling.
+
+Compares SpellingCorrector against the previous implementation, which ran
+the misspelling replacements and then difflib.get_close_matches for every
+word. It checks that the corrections are identical, including the
+misspelling table and randomly mutated domain terms, and prints per-query
+cost with a cold and a warm token cache. Long words that match no term
+are timed on their own with a cold cache, the costliest case per word;
+the script exits with status 1 if one takes LONG_WORD_LIMIT_MS or more.
+
+    python benchmarks/bench_spelling.py
+"""
+
+import os
+import random
+import sys
+import timeit
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender_core import SPELLING_TERMS
+from spelling import SpellingCorrector
+from bench_detect_domain import QUERIES
+
+MISSPELLINGS = {
+    'romcom': 'romcom', 'romcoms': 'romcom', 'romcom mobies': 'romcom movies',
+    'romcom moveis': 'romcom movies', 'romcom moives': 'romcom movies', 'mobies': 'movies',
+    'moveis': 'movies', 'moives': 'movies', 'muvi': 'movie', 'muvies': 'movies', 'bok': 'book',
+    'boks': 'books', 'recepie': 'recipe', 'recipie': 'recipe', 'reciepe': 'recipe', 'musik': 'music',
+    'muzik': 'music', 'musick': 'music', 'tvshow': 'tv show', 'tvshows': 'tv shows', 'television': 'tv',
+}
+
+
+# Long words of real queries ("recommend..." from the sidebar prompts) that correct to nothing
+LONG_WORDS = ['recommendation', 'recommendations', 'documentaries', 'entertainment', 'comfortable',
+              'thoughtprovoking', 'internationally', 'heartwarming']
+LONG_WORD_LIMIT_MS = 1.0
+
+
+def reference_correct(query):
+    """Previous correct_spelling implementation"""
+    query_lower = query.lower()
+    for misspelling, correction in MISSPELLINGS.items():
+        if misspelling in query_lower:
+            query_lower = query_lower.replace(misspelling, correction)
+    corrected_words = []
+    for word in query_lower.split():
+        if len(word) <= 2:
+            corrected_words.append(word)
+            continue
+        close_matches = get_close_matches(word, SPELLING_TERMS, n=1, cutoff=0.7)
+        corrected_words.append(close_matches[0] if close_matches else word)
+    return ' '.join(corrected_words)
+
+
+def mutate(word, rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    chars = list(word)
+    for _ in range(rng.randint(1, 3)):
+        op = rng.randrange(4)
+        i = rng.randrange(len(chars) + 1)
+        if op == 0 and chars:
+            del chars[min(i, len(chars) - 1)]
+        elif op == 1:
+            chars.insert(i, rng.choice(letters))
+        elif op == 2 and chars:
+            chars[min(i, len(chars) - 1)] = rng.choice(letters)
+        elif len(chars) > 1:
+            j = min(i, len(chars) - 2)
+            chars[j], chars[j + 1] = chars[j + 1], chars[j]
+    return ''.join(chars)
+
+
+def main():
+    rng = random.Random(0)
+    corpus = list(QUERIES) + list(MISSPELLINGS)
+    corpus += [' '.join(mutate(rng.choice(SPELLING_TERMS), rng) for _ in range(rng.randint(1, 4))) for _ in range(3000)]
+    corpus += [mutate(word, rng) * rng.randint(1, 2) for word in ' '.join(QUERIES).lower().split() for _ in range(5)]
+
+    corrector = SpellingCorrector(SPELLING_TERMS, MISSPELLINGS)
+    mismatches = [q for q in corpus if corrector.correct(q) != reference_correct(q)]
+    if mismatches:
+        print(f"MISMATCH on {len(mismatches)} queries, e.g. {mismatches[:3]}")
+        sys.exit(1)
+
+    queries = list(QUERIES)
+    rounds = 200
+    per_query = rounds * len(queries)
+    reference_time = timeit.timeit(lambda: [reference_correct(q) for q in queries], number=rounds)
+    cold_time = timeit.timeit(
+        lambda: [corrector.correct_word.cache_clear() or corrector.correct(q) for q in queries], number=rounds
+    )
+    warm_time = timeit.timeit(lambda: [corrector.correct(q) for q in queries], number=rounds)
+
+    print(f"corrections identical on {len(corpus)} queries")
+    print(f"get_close_matches loop: {reference_time / per_query * 1e6:8.1f} us/query")
+    print(f"spelling index (cold):  {cold_time / per_query * 1e6:8.1f} us/query")
+    print(f"spelling index (warm):  {warm_time / per_query * 1e6:8.1f} us/query")
+
+    print(f"\ncold long words, ms/word  {'index':>8} {'get_close_matches':>18}")
+    slow = []
+    for word in LONG_WORDS:
+        index_time = timeit.timeit(lambda: corrector.correct_word.cache_clear() or corrector.correct(word),
+                                   number=rounds) / rounds
+        reference_time = timeit.timeit(lambda: get_close_matches(word, SPELLING_TERMS, n=1, cutoff=0.7),
+                                       number=rounds) / rounds
+        print(f"  {word:<22} {index_time * 1e3:8.3f} {reference_time * 1e3:18.3f}")
+        if index_time * 1e3 >= LONG_WORD_LIMIT_MS:
+            slow.append(word)
+    if slow:
+        print(f"SLOW: {slow} take {LONG_WORD_LIMIT_MS} ms or more per cold word")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Cold-start and per-query benchmark suite with regression thresholds.
+
+For each catalog scale (1x is the shipped CSVs, 10x and 100x are synthetic
+catalogs built from them) this times the cold path - loading the catalog,
+prepare_domain_data, train_tfidf_models, building the postings, saving and
+restoring the index artifacts, and whole recommender start-up with and
+without artifacts - and the query path: every stage of process_query on its
+own plus process_query end to end, with and without the query cache, over
+the test_enhanced_recommendations corpus and the sidebar prompts.
+
+Results are written as JSON. With --baseline they are compared to a stored
+run and the script exits with status 1 if any timing regressed by more
+than its relative threshold (--threshold for query medians, the looser
+--cold-threshold for best-of-N cold stages) and by more than a small
+absolute floor, so jitter on microsecond stages is not reported.
+
+    python benchmarks/bench_suite.py --scales 1,10 --output results.json
+    python benchmarks/bench_suite.py --scales 1,10 --baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --scales 1,10 --save-baseline benchmarks/baseline.json
+
+Baselines are machine specific; regenerate one with --save-baseline on the
+machine that runs the comparison. The 100x catalogs hold 500k rows per
+domain and need several GB of memory to fit; pass --workdir to keep the
+generated CSVs between runs.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import CatalogCache, read_source_csv
+from recommender_core import DOMAINS, TFIDF_PARAMS, AdvancedRecommender
+from test_enhanced_recommendations import TEST_QUERIES
+
+SCALES = (1, 10, 100)
+
+# The example prompts shown in the sidebar of recommendation_app.main
+SIDEBAR_PROMPTS = [
+    "Suggest movies with a slow-burn romance",
+    "Recommend animated series for adults",
+    "Share nostalgic 2000s hits",
+    "Recommend books with poetic writing styles",
+    "What are some easy vegetarian dishes?",
+]
+
+QUERY_CORPUS = TEST_QUERIES + SIDEBAR_PROMPTS
+
+# Regressions smaller than these absolute differences are treated as noise
+COLD_FLOOR_MS = 5.0
+QUERY_FLOOR_MS = 0.01
+
+
+def synthetic_catalog(scale, workdir, seed=0):
+    """Directory holding the five domain CSVs at scale times the shipped row count.
+
+    Each extra copy of a catalog resamples its rows, gives them new ids,
+    suffixes the titles with the copy number and shuffles the keywords
+    between rows, so copies are distinct documents with realistic vocabulary.
+    A {domain}_processed.csv with each row's id and its source row's cluster
+    is written next to each catalog.
+    """
+    if scale == 1:
+        return ROOT
+    path = os.path.join(workdir, f"catalog_x{scale}")
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for domain in DOMAINS:
+        target = os.path.join(path, f"{domain}.csv")
+        processed = os.path.join(path, f"{domain}_processed.csv")
+        if os.path.exists(target) and os.path.exists(processed):
+            continue
+        source = pd.read_csv(os.path.join(ROOT, f"{domain}.csv"))
+        clusters = pd.read_csv(os.path.join(ROOT, f"{domain}_processed.csv"), usecols=['cluster'])['cluster']
+        id_col = source.columns[0]
+        title_col = 'title' if domain != 'food' else 'name'
+        copies = [source]
+        copy_clusters = [clusters.to_numpy()]
+        for copy in range(1, scale):
+            sample = rng.integers(0, len(source), len(source))
+            copy_clusters.append(clusters.to_numpy()[sample])
+            df = source.iloc[sample].reset_index(drop=True)
+            # Rows drawn twice in one copy still get distinct ids
+            if pd.api.types.is_numeric_dtype(df[id_col]):
+                df[id_col] = np.arange(len(df)) + copy * max(int(source[id_col].max()) + 1, len(df))
+            else:
+                df[id_col] = df[id_col].astype(str) + f"-{copy}-" + pd.Series(range(len(df))).astype(str)
+            df[title_col] = df[title_col].astype(str) + f" ({copy})"
+            if 'keywords' in df.columns:
+                df['keywords'] = df['keywords'].to_numpy()[rng.permutation(len(df))]
+            copies.append(df)
+        catalog = pd.concat(copies, ignore_index=True)
+        catalog.to_csv(target + '.tmp', index=False)
+        os.replace(target + '.tmp', target)
+        pd.DataFrame({id_col: catalog[id_col], 'cluster': np.concatenate(copy_clusters)}).to_csv(processed, index=False)
+    return path
+
+
+def best_of(fn, repeats):
+    """Fastest of repeats calls in ms, and the last call's result"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def summarize(samples):
+    """median/p95/mean in ms of a list of durations in seconds"""
+    samples = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(samples) * 1e3, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1e3, 4),
+        'mean_ms': round(statistics.fmean(samples) * 1e3, 4),
+        'count': len(samples),
+    }
+
+
+def bench_cold(data_path, workdir, repeats):
+    """Cold-path timings in ms; also returns a ready recommender for the query benchmarks"""
+    from index_artifacts import fingerprint_frames
+    cold = {}
+    paths = {domain: os.path.join(data_path, f"{domain}.csv") for domain in DOMAINS}
+    # load_data itself fetches from GitHub through Streamlit's cache; time the
+    # local CSV parse it falls back to
+    cold['load_data'], _ = best_of(
+        lambda: [read_source_csv(path, domain) for domain, path in paths.items()], repeats)
+    catalog = CatalogCache(data_path, cache_dir=os.path.join(workdir, 'catalog_cache'))
+    cold['catalog_build'], _ = best_of(catalog.build, repeats)
+    cold['catalog_load'], _ = best_of(catalog.load, repeats)
+
+    cold['init_cold'], recommender = best_of(lambda: AdvancedRecommender(*catalog.load(), catalog=catalog), repeats)
+    cold['prepare_domain_data'], texts = best_of(recommender.prepare_domain_data, repeats)
+    cold['train_tfidf_models'], _ = best_of(lambda: recommender.train_tfidf_models(texts), repeats)
+    cold['build_postings'], _ = best_of(recommender.build_postings, repeats)
+
+    index_dir = os.path.join(workdir, 'index_artifacts')
+    fingerprint = fingerprint_frames(recommender.domain_frames(), TFIDF_PARAMS)
+    recommender.index_dir, recommender.index_fingerprint = index_dir, fingerprint
+    cold['save_index'], _ = best_of(recommender.save_index, repeats)
+    cold['load_index'], _ = best_of(recommender.load_index, repeats)
+    cold['init_warm'], _ = best_of(
+        lambda: AdvancedRecommender(*catalog.load(), index_dir=index_dir, fingerprint=fingerprint, catalog=catalog),
+        repeats)
+    recommender.build_postings()
+    return {stage: round(ms, 3) for stage, ms in cold.items()}, recommender
+
+
+def bench_queries(recommender, queries, repeats):
+    """Per-stage and end-to-end query timings over the corpus"""
+    samples = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    pool = recommender.query_cache.candidate_pool
+    for _ in range(repeats):
+        for query in queries:
+            timed('correct_spelling', recommender.correct_spelling, query)
+            domain = timed('detect_domain', recommender.detect_domain, query)
+            if domain:
+                enhanced = timed('enhance_query', recommender.enhance_query, query, domain)
+                df = getattr(recommender, f"{domain}_df")
+                codes = recommender._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+                query_vec = timed('vectorize', recommender.tfidf_vectorizers[domain].transform, [enhanced])
+                timed('score', recommender.retrievers[domain].top_k, query_vec, pool, codes)
+
+                recommender.query_cache.invalidate()
+                recommender.reset_session()
+                recs = timed('get_recommendations', recommender.get_recommendations, domain, enhanced, 3)
+                timed('format', recommender._format_recommendations, recs, domain)
+
+            # End to end on a fresh session, first with empty caches, then served from them
+            recommender.query_cache.invalidate()
+            recommender.reset_session()
+            timed('process_query', recommender.process_query, query)
+            recommender.reset_session()
+            timed('process_query_cached', recommender.process_query, query)
+    return {stage: summarize(values) for stage, values in samples.items()}
+
+
+def run(scales, workdir, cold_repeats, query_repeats):
+    results = {}
+    for scale in scales:
+        data_path = synthetic_catalog(scale, workdir)
+        # The recommender reads display columns from the scratch catalog cache
+        with tempfile.TemporaryDirectory(dir=workdir) as scratch:
+            cold, recommender = bench_cold(data_path, scratch, cold_repeats if scale == 1 else 1)
+            query = bench_queries(recommender, QUERY_CORPUS, query_repeats)
+        rows = sum(len(getattr(recommender, f"{domain}_df")) for domain in DOMAINS)
+        results[f"x{scale}"] = {'rows': rows, 'cold': cold, 'query': query}
+        print_scale(scale, results[f"x{scale}"])
+        del recommender
+    return results
+
+
+def print_scale(scale, result):
+    out = sys.stderr
+    print(f"\n== {scale}x catalog ({result['rows']} rows)", file=out)
+    for stage, ms in result['cold'].items():
+        print(f"  {stage:<24} {ms:>10.1f} ms", file=out)
+    for stage, stats in result['query'].items():
+        print(f"  {stage:<24} {stats['median_ms']:>10.3f} ms median  {stats['p95_ms']:>8.3f} ms p95", file=out)
+
+
+def timings(results):
+    """Flatten results to {'x1.cold.stage': ms, 'x1.query.stage': median ms}"""
+    flat = {}
+    for scale, result in results.items():
+        for stage, ms in result['cold'].items():
+            flat[f"{scale}.cold.{stage}"] = ms
+        for stage, stats in result['query'].items():
+            flat[f"{scale}.query.{stage}"] = stats['median_ms']
+    return flat
+
+
+def compare(report, baseline, threshold, cold_threshold):
+    """Timings slower than the baseline by more than their threshold and the noise floor"""
+    if baseline['meta'].get('machine') != report['meta'].get('machine'):
+        print("note: baseline was recorded on a different machine", file=sys.stderr)
+    current, previous = timings(report['results']), timings(baseline['results'])
+    regressions = []
+    for key, ms in current.items():
+        if key not in previous:
+            continue
+        base = previous[key]
+        cold = '.cold.' in key
+        floor = COLD_FLOOR_MS if cold else QUERY_FLOOR_MS
+        if ms > base * (1 + (cold_threshold if cold else threshold)) and ms - base > floor:
+            regressions.append((key, base, ms))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommender benchmark suite')
+    parser.add_argument('--scales', default=','.join(map(str, SCALES)),
+                        help='comma-separated catalog multipliers (default: %(default)s)')
+    parser.add_argument('--query-repeats', type=int, default=5, help='passes over the query corpus')
+    parser.add_argument('--cold-repeats', type=int, default=5, help='runs per cold stage at 1x (best is kept)')
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept (default: a temp dir)')
+    parser.add_argument('--output', default='-', help='JSON results file, - for stdout')
+    parser.add_argument('--baseline', default=None, help='stored results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative slowdown of query stages (default: 0.25)')
+    parser.add_argument('--cold-threshold', type=float, default=0.5,
+                        help='allowed relative slowdown of cold-path stages, which are noisier (default: 0.5)')
+    parser.add_argument('--save-baseline', default=None, help='also write the results here as the new baseline')
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        results = run(scales, workdir, args.cold_repeats, args.query_repeats)
+
+    import sklearn
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': ' '.join(filter(None, (platform.machine(), platform.processor(), f"{os.cpu_count()} cpu"))),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'queries': len(QUERY_CORPUS),
+            'query_repeats': args.query_repeats,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.cold_threshold)
+        for key, base, ms in regressions:
+            print(f"REGRESSION {key}: {base:.3f} ms -> {ms:.3f} ms (+{(ms / base - 1) * 100:.0f}%)",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Latency of incremental catalog updates against a full refit.
+
+For each catalog scale, batches of new items (copies of catalog rows under
+new ids) are upserted into one domain until its delta segment is merged,
+then some items are deleted. It prints the median upsert and delete time
+per batch, the merge time with the IDF refresh, query latency with and
+without a delta segment, and the time of a full prepare + fit + index build.
+
+    python benchmarks/bench_updates.py --scales 1,10 --domain movies --batch 300
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_suite import QUERY_CORPUS, synthetic_catalog
+from catalog_store import CatalogCache
+from catalog_updates import DELTA_MERGE_FRACTION
+from recommender_core import DOMAINS, ID_COLUMNS, AdvancedRecommender
+
+
+def query_latency(recommender, domain, queries, k):
+    """Median seconds per query ranked through the domain's retriever"""
+    codes = recommender._title_codes(domain, getattr(recommender, f"{domain}_df"),
+                                     'title' if domain != 'food' else 'name')
+    vectors = recommender.tfidf_vectorizers[domain].transform(queries)
+    times = []
+    for i in range(vectors.shape[0]):
+        start = time.perf_counter()
+        recommender.retrievers[domain].top_k(vectors[i], k, codes)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_scale(recommender, domain, batch, k):
+    df = getattr(recommender, f"{domain}_df")
+    id_column = ID_COLUMNS[domain]
+    n_base = recommender.postings[domain].n_rows
+    queries = [text for text in QUERY_CORPUS if recommender.plan_query(text).domain == domain] or QUERY_CORPUS
+    before = query_latency(recommender, domain, queries, k)
+
+    # Stop one batch short of the automatic merge, to time queries over a full delta segment
+    upserts = []
+    for i in range(max(1, int(DELTA_MERGE_FRACTION * n_base) // batch - 1)):
+        records = df.sample(batch, random_state=i).copy()
+        records[id_column] = [f"update-{i}-{j}" for j in range(batch)]
+        start = time.perf_counter()
+        recommender.upsert(domain, records)
+        upserts.append(time.perf_counter() - start)
+    delta = recommender.tfidf_matrices[domain].shape[0] - n_base
+    with_delta = query_latency(recommender, domain, queries, k)
+
+    deletes = []
+    for i in range(5):
+        ids = df[id_column].sample(batch // 10 or 1, random_state=100 + i)
+        start = time.perf_counter()
+        recommender.delete(domain, ids)
+        deletes.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    recommender.merge_updates(domain)
+    merge = time.perf_counter() - start
+    merged = query_latency(recommender, domain, queries, k)
+    return upserts, deletes, merge, delta, (before, with_delta, merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental catalog update benchmark')
+    parser.add_argument('--scales', default='1,10', help='comma-separated catalog multipliers')
+    parser.add_argument('--domain', default='movies', choices=DOMAINS)
+    parser.add_argument('--batch', type=int, default=300, help='items per upsert')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--workdir', default=None, help='where synthetic catalogs are kept')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for scale in (int(scale) for scale in args.scales.split(',')):
+            data_path = synthetic_catalog(scale, workdir)
+            catalog = CatalogCache(data_path, cache_dir=os.path.join(tmp, f"catalog_x{scale}"))
+            recommender = AdvancedRecommender(*catalog.load(), catalog=catalog)
+            rows = len(getattr(recommender, f"{args.domain}_df"))
+            upserts, deletes, merge, delta, latency = bench_scale(recommender, args.domain, args.batch, args.k)
+
+            start = time.perf_counter()
+            recommender.train_tfidf_models(recommender.prepare_domain_data())
+            recommender.build_postings()
+            refit = time.perf_counter() - start
+
+            print(f"\n== {scale}x catalog, {args.domain} ({rows} rows)")
+            print(f"  upsert {args.batch} items   {statistics.median(upserts) * 1e3:8.1f} ms  "
+                  f"(median of {len(upserts)})")
+            print(f"  delete {args.batch // 10 or 1} items    {statistics.median(deletes) * 1e3:8.1f} ms")
+            print(f"  merge + IDF refresh {merge * 1e3:8.1f} ms")
+            print(f"  full refit          {refit * 1e3:8.1f} ms  (all domains)")
+            print(f"  query us/q: base {latency[0] * 1e6:.1f}, with {delta}-row delta {latency[1] * 1e6:.1f}, "
+                  f"merged {latency[2] * 1e6:.1f}")
+            del recommender
+
+
+if __name__ == "__main__":
+    main()
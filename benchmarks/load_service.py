@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load test for recommendation_service.
+
+Opens --concurrency keep-alive connections, each sending POST /recommend
+requests with queries from the benchmark corpus until --requests have been
+sent in total, and prints throughput, latency percentiles and how many
+requests the server scored per batch. Without --port, a service is started
+in this process on --local-port and shares its event loop with the client.
+
+    python benchmarks/load_service.py --concurrency 32 --requests 2000
+    python benchmarks/load_service.py --port 8000 --max-wait-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_detect_domain import QUERIES
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def worker(host, port, queries, k, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for query in queries:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, 'POST', '/recommend', {'query': query, 'k': k})
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, total, k):
+    queries = [QUERIES[i % len(QUERIES)] for i in range(total)]
+    latencies, errors = [], []
+    reader, writer = await asyncio.open_connection(host, port)
+    _, before = await request(reader, writer, host, 'GET', '/health')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(host, port, queries[i::concurrency], k, latencies, errors) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    _, after = await request(reader, writer, host, 'GET', '/health')
+    _, debug = await request(reader, writer, host, 'GET', '/debug/metrics')
+    writer.close()
+    batches = after['batches'] - before['batches']
+    batched = after['batched_requests'] - before['batched_requests']
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1e3
+    print(f"requests:     {len(latencies)} ({len(errors)} errors), concurrency {concurrency}")
+    print(f"throughput:   {len(latencies) / elapsed:8.1f} req/s")
+    print(f"latency ms:   p50 {pct(50):.2f}  p95 {pct(95):.2f}  p99 {pct(99):.2f}  "
+          f"mean {statistics.mean(latencies) * 1e3:.2f}")
+    print(f"batching:     {batches} batches, {batched / max(batches, 1):.1f} requests/batch")
+    if debug.get('enabled'):
+        # Server-side stages with the highest p99 (bucket upper bounds), cumulative over the server's life
+        stages = sorted(debug['stages'].items(), key=lambda item: item[1]['p99_ms'] or float('inf'), reverse=True)
+        print("slowest stages (server p99 ms, bucketed):")
+        for name, stats in stages[:8]:
+            print(f"  {name:<32} p99 {stats['p99_ms']}  mean {stats['mean_ms']}  n={stats['count']}")
+
+
+async def run_local(args):
+    from recommendation_service import RecommendationService, load_recommender
+    service = RecommendationService(load_recommender(), args.max_batch_size, args.max_wait_ms)
+    ready = asyncio.Event()
+    server = asyncio.create_task(service.serve(args.host, args.local_port, ready))
+    await ready.wait()
+    try:
+        await run_load(args.host, args.local_port, args.concurrency, args.requests, args.k)
+    finally:
+        server.cancel()
+        try:
+            await server
+        except asyncio.CancelledError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for recommendation_service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None, help='running service to test; omit to start one here')
+    parser.add_argument('--local-port', type=int, default=8765, help='port for the in-process service')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.port is None:
+        asyncio.run(run_local(args))
+    else:
+        asyncio.run(run_load(args.host, args.port, args.concurrency, args.requests, args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Columnar on-disk cache of the domain catalogs.
+
+Each domain CSV is parsed once with declared dtypes (categoricals for
+low-cardinality strings, compact ints, float32) and written as:
+
+  <domain>.parquet        ranking columns, read on the hot path
+  <domain>.display.arrow  display-only columns (descriptions, lyrics, URLs),
+                          memory-mapped and fetched only for rendered rows
+
+pyarrow is optional: without it the catalog is read straight from the CSVs
+with the same declared dtypes.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the deployment image
+    pa = None
+    pq = None
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Declared dtypes per domain; columns missing here fall back to inference
+CATALOG_SCHEMAS = {
+    'movies': {
+        'movie_id': 'string', 'title': 'string', 'release_year': 'int16', 'genre': 'category',
+        'rating': 'float32', 'votes': 'int32', 'duration': 'int16', 'description': 'string',
+        'director': 'category', 'cast': 'category', 'country': 'category', 'language': 'category',
+        'certificate': 'category', 'budget': 'int64', 'revenue': 'int64', 'keywords': 'string',
+        'mood': 'category', 'weather_suitable': 'category', 'time_suitable': 'category',
+        'imdb_id': 'string', 'poster_url': 'string',
+    },
+    'books': {
+        'book_id': 'string', 'title': 'string', 'author': 'category', 'genre': 'category',
+        'published_year': 'int16', 'pages': 'int16', 'description': 'string', 'publisher': 'category',
+        'language': 'category', 'average_rating': 'float32', 'ratings_count': 'int32',
+        'isbn13': 'int64', 'isbn10': 'int64', 'thumbnail_url': 'string', 'downloads': 'int32',
+        'mood': 'category', 'reading_condition': 'category', 'keywords': 'string',
+    },
+    'food': {
+        'recipe_id': 'string', 'name': 'string', 'author': 'category', 'description': 'string',
+        'category': 'category', 'cuisine_type': 'category', 'keywords': 'string', 'ingredients': 'string',
+        'cooking_time': 'int16', 'prep_time': 'int16', 'total_time': 'int16', 'servings': 'int8',
+        'calories': 'int16', 'rating': 'float32', 'review_count': 'int32', 'difficulty_level': 'category',
+        'mood': 'category', 'occasion': 'category', 'instructions': 'string', 'image_urls': 'string',
+    },
+    'music': {
+        'track_id': 'string', 'title': 'string', 'artist': 'category', 'genre': 'category',
+        'release_year': 'int16', 'album': 'string', 'lyrics': 'string', 'tempo': 'int16',
+        'energy': 'float32', 'danceability': 'float32', 'valence': 'float32', 'acousticness': 'float32',
+        'instrumentalness': 'float32', 'loudness': 'float32', 'speechiness': 'float32',
+        'liveness': 'float32', 'popularity': 'int8', 'key': 'int8', 'mode': 'int8',
+        'time_signature': 'int8', 'duration': 'int16', 'language': 'category', 'mood': 'category',
+        'activity': 'category', 'weather_mood': 'category', 'keywords': 'string',
+    },
+    'tv_shows': {
+        'show_id': 'string', 'title': 'string', 'type': 'category', 'genre': 'category',
+        'release_year': 'int16', 'end_year': 'float32', 'episodes': 'int16', 'seasons': 'int8',
+        'duration': 'int16', 'rating': 'float32', 'votes': 'int32', 'description': 'string',
+        'director': 'category', 'cast': 'category', 'network': 'category', 'country': 'category',
+        'language': 'category', 'certificate': 'category', 'status': 'category', 'imdb_id': 'string',
+        'poster_url': 'string', 'mood': 'category', 'viewing_condition': 'category', 'keywords': 'string',
+    },
+}
+
+# Columns only needed to render a recommendation, never to rank one
+DISPLAY_COLUMNS = {
+    'movies': ['description', 'imdb_id', 'poster_url'],
+    'books': ['description', 'isbn13', 'isbn10', 'thumbnail_url'],
+    'food': ['instructions', 'image_urls'],
+    'music': ['lyrics'],
+    'tv_shows': ['description', 'imdb_id', 'poster_url'],
+}
+
+
+def compact_frame(df, domain):
+    """df with the domain's declared dtypes, for frames parsed without them.
+
+    A column whose values do not fit its declared dtype (missing values in
+    an integer column, text in a numeric one) keeps the dtype it has.
+    """
+    schema = CATALOG_SCHEMAS.get(domain, {})
+    # Only columns present and not already declared, so a cached frame is returned as it is
+    casts = {col: dtype for col, dtype in schema.items() if col in df.columns and df[col].dtype != dtype}
+    if not casts:
+        return df
+    try:
+        return df.astype(casts)
+    except (TypeError, ValueError):
+        pass
+    df = df.copy(deep=False)
+    for col, dtype in casts.items():
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def read_source_csv(path, domain, columns=None):
+    """Parse one domain CSV with its declared dtypes, optionally projected to columns"""
+    return compact_frame(pd.read_csv(path, usecols=columns), domain)
+
+
+def _temp_path(path):
+    """Per-process scratch name next to path, renamed over it once complete"""
+    return f"{path}.tmp-{os.getpid()}"
+
+
+class CatalogCache:
+    """Columnar cache of the five domain catalogs under cache_dir"""
+    def __init__(self, data_path=DATA_DIR, cache_dir=None, domains=tuple(CATALOG_SCHEMAS)):
+        self.data_path = data_path
+        self.cache_dir = cache_dir or os.path.join(data_path, 'catalog_cache')
+        self.domains = tuple(domains)
+        self._display_tables = {}
+
+    def source_paths(self):
+        return {domain: os.path.join(self.data_path, f"{domain}.csv") for domain in self.domains}
+
+    def available(self):
+        """True if the source CSVs exist locally"""
+        return all(os.path.exists(path) for path in self.source_paths().values())
+
+    def source_stamp(self):
+        """Size and mtime of each source CSV; changes whenever a source file is rewritten"""
+        stamp = {}
+        for domain, path in self.source_paths().items():
+            stat = os.stat(path)
+            stamp[domain] = [stat.st_size, stat.st_mtime_ns]
+        return stamp
+
+    def is_fresh(self):
+        """True if the cache exists and was built from the current source files"""
+        if pq is None:
+            return False
+        try:
+            with open(os.path.join(self.cache_dir, MANIFEST_FILE), encoding='utf-8') as f:
+                manifest = json.load(f)
+            stamp = self.source_stamp()
+        except (OSError, ValueError):
+            return False
+        return manifest.get('version') == CACHE_VERSION and manifest.get('sources') == stamp
+
+    def build(self):
+        """Parse the CSVs once and write the ranking and display column files.
+
+        Each file is written aside and renamed over the old one, so a process
+        still mapping the previous display file keeps reading it intact.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stamp = self.source_stamp()
+        for domain, path in self.source_paths().items():
+            df = read_source_csv(path, domain)
+            display_cols = [col for col in DISPLAY_COLUMNS.get(domain, []) if col in df.columns]
+            ranking = df.drop(columns=display_cols)
+            target = os.path.join(self.cache_dir, f"{domain}.parquet")
+            ranking.to_parquet(_temp_path(target), index=False)
+            os.replace(_temp_path(target), target)
+            display = pa.Table.from_pandas(df[display_cols], preserve_index=False)
+            target = os.path.join(self.cache_dir, f"{domain}.display.arrow")
+            with pa.OSFile(_temp_path(target), 'wb') as sink:
+                with pa.ipc.new_file(sink, display.schema) as writer:
+                    writer.write_table(display)
+            os.replace(_temp_path(target), target)
+        # The manifest is replaced last so a partial rebuild never validates
+        target = os.path.join(self.cache_dir, MANIFEST_FILE)
+        with open(_temp_path(target), 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'sources': stamp}, f, indent=2)
+        os.replace(_temp_path(target), target)
+        self._display_tables = {}
+
+    def load(self, columns=None):
+        """Return the domain frames in order, ranking columns only unless columns are given.
+
+        columns may map a domain to an explicit column list. Without pyarrow the
+        full CSVs are parsed and every column is returned.
+        """
+        columns = columns or {}
+        if pq is None:
+            return tuple(read_source_csv(path, domain) for domain, path in self.source_paths().items())
+        if not self.is_fresh():
+            self.build()
+        return tuple(
+            pd.read_parquet(os.path.join(self.cache_dir, f"{domain}.parquet"), columns=columns.get(domain))
+            for domain in self.domains
+        )
+
+    def _display_table(self, domain):
+        table = self._display_tables.get(domain)
+        if table is None:
+            source = pa.memory_map(os.path.join(self.cache_dir, f"{domain}.display.arrow"), 'r')
+            table = pa.ipc.open_file(source).read_all()
+            self._display_tables[domain] = table
+        return table
+
+    def loaded_display_tables(self):
+        """Display tables opened so far, by domain"""
+        return dict(self._display_tables)
+
+    def display_rows(self, domain, positions):
+        """Fetch the display-only columns for the given row positions"""
+        if pq is None or not DISPLAY_COLUMNS.get(domain):
+            return pd.DataFrame(index=range(len(positions)))
+        rows = self._display_table(domain).take(pa.array(positions, type=pa.int64()))
+        return rows.to_pandas().astype(
+            {col: CATALOG_SCHEMAS[domain][col] for col in rows.column_names if col in CATALOG_SCHEMAS[domain]}
+        )
+
+    def append_display_rows(self, domain, records):
+        """Add the display columns of rows appended to a loaded domain frame, in memory only"""
+        if pq is None or not DISPLAY_COLUMNS.get(domain):
+            return
+        table = self._display_table(domain)
+        # Columns the records lack are null; object dtype lets the schema convert missing values
+        display = records.reindex(columns=table.column_names).astype(object)
+        appended = pa.Table.from_pandas(display, schema=table.schema, preserve_index=False)
+        self._display_tables[domain] = pa.concat_tables([table, appended])
+
+    def attach_display_columns(self, domain, recs, positions):
+        """Join display columns onto result rows taken from the given catalog row positions"""
+        if pq is None or len(recs) == 0:
+            return recs
+        display = self.display_rows(domain, positions)
+        display.index = recs.index
+        return recs.join(display[[col for col in display.columns if col not in recs.columns]])
@@ -0,0 +1,156 @@
+"""
+Incremental catalog updates: appended rows, tombstones and merges.
+
+Rows are only ever appended to a domain frame, so row positions never
+change and everything keyed by them (title codes, session bitmaps, cached
+candidates) stays valid. Upserting an item deletes its current row and
+appends the new version; deleting sets the row's tombstone bit.
+
+Appended rows are vectorized with the fitted vectorizer, so the vocabulary
+and IDF stay those of the last fit. They are stacked onto the domain's
+TF-IDF matrix and, until the next merge, kept out of the domain's
+retriever: SegmentedIndex ranks them with exact TF-IDF postings over
+the appended rows only (the delta segment, rebuilt at a cost proportional
+to its size) and merges the two top-k lists. It also skips deleted rows.
+
+A merge folds the delta into the domain's main retriever, rebuilt over the
+full matrix with deleted rows emptied, after refresh_idf has recomputed
+the IDF over the live rows. Rows of a TfidfVectorizer's output are
+l2-normalized tf * idf, so rescaling the columns by new / old idf and
+renormalizing gives exactly the weights a refit with the same vocabulary
+would; terms outside that vocabulary need a full refit.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from hashed_features import HashedTfidfVectorizer
+from postings import PostingsIndex
+
+# A domain's delta segment is merged once it holds this share of the rows
+# its main retriever was built over
+DELTA_MERGE_FRACTION = 0.1
+# ... but never for fewer rows than this
+DELTA_MERGE_MIN_ROWS = 256
+
+
+def append_rows(df, records):
+    """df with records appended below it, in df's columns and dtypes.
+
+    Categorical columns gain the records' new values as categories; columns
+    the records lack are missing in the new rows, columns df lacks are dropped.
+    """
+    records = records.reindex(columns=df.columns)
+    head = df
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = records[column].dropna()
+            new = pd.unique(values[~values.isin(dtype.categories)])
+            if len(new):
+                if head is df:
+                    head = df.copy(deep=False)
+                head[column] = head[column].cat.add_categories(new)
+        try:
+            records[column] = records[column].astype(head[column].dtype)
+        except (TypeError, ValueError):
+            # e.g. missing values in an integer column: concat picks a wider dtype
+            pass
+    return pd.concat([head, records], ignore_index=True)
+
+
+def without_rows(matrix, deleted):
+    """matrix with the deleted rows emptied; row positions are unchanged"""
+    if deleted is None or not deleted.any():
+        return matrix
+    matrix = sp.diags((~deleted).astype(np.float64)) @ sp.csr_matrix(matrix)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def refresh_idf(vectorizer, matrix, deleted=None):
+    """matrix reweighted with the IDF of its live rows; vectorizer.idf_ is updated to match"""
+    matrix = sp.csr_matrix(matrix)
+    live = without_rows(matrix, deleted)
+    n_docs = matrix.shape[0] - (int(np.count_nonzero(deleted)) if deleted is not None else 0)
+    # Column indices are distinct within a row, so a count per column is its document frequency
+    doc_freq = np.bincount(live.indices, minlength=matrix.shape[1])
+    smooth = int(vectorizer.smooth_idf)
+    idf = np.log((n_docs + smooth) / (doc_freq + smooth)) + 1
+    scaled = matrix @ sp.diags(idf / np.asarray(vectorizer.idf_))
+    if isinstance(vectorizer, HashedTfidfVectorizer):
+        # Its IDF follows the counts, which later partial_fit calls add to
+        vectorizer.set_document_counts(doc_freq, n_docs)
+    else:
+        vectorizer.idf_ = idf
+    return normalize(scaled, norm=vectorizer.norm, copy=False)
+
+
+class SegmentedIndex:
+    """A domain retriever over its first n_base rows, exact postings over the rows appended since,
+    and the deleted rows, which are never returned.
+
+    Exposes top_k and top_k_batch with the semantics of PostingsIndex: one
+    row per group, ties and zero-score padding in row order.
+    """
+    def __init__(self, base, delta_matrix, deleted):
+        self.base = base
+        self.n_base = base.n_rows
+        self.delta = PostingsIndex(delta_matrix) if delta_matrix.shape[0] else None
+        self.delta_matrix = delta_matrix
+        self.n_rows = self.n_base + delta_matrix.shape[0]
+        self.deleted = deleted
+        # Filtered scans score rows with the base's own model when it has one
+        # (see attribute_filters.filtered_top_k); otherwise they are exact TF-IDF
+        if hasattr(base, 'score_rows'):
+            self.score_rows = self._score_rows
+
+    def top_k(self, query_vec, k, groups=None, exclude=None):
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        exclude = self.deleted if exclude is None else exclude | self.deleted
+        n = self.n_base
+        rows, scores = self.base.top_k(query_vec, k, groups[:n], exclude[:n])
+        if self.delta is None:
+            return rows, scores
+        delta_rows, delta_scores = self.delta.top_k(query_vec, k, groups[n:], exclude[n:])
+        return self._merge(rows, scores, delta_rows + n, delta_scores, k, groups)
+
+    def top_k_batch(self, query_matrix, k, groups=None):
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        query_matrix = sp.csr_matrix(query_matrix)
+        n = self.n_base
+        results = self.base.top_k_batch(query_matrix, k, groups[:n])
+        if self.delta is not None:
+            delta = self.delta.top_k_batch(query_matrix, k, groups[n:])
+            results = [self._merge(rows, scores, delta_rows + n, delta_scores, k, groups)
+                       for (rows, scores), (delta_rows, delta_scores) in zip(results, delta)]
+        # Deleted rows come back as padding, or scored by a retriever built
+        # before they were deleted; such queries are ranked alone with them excluded
+        return [self.top_k(query_matrix[i], k, groups) if self.deleted[rows].any() else (rows, scores)
+                for i, (rows, scores) in enumerate(results)]
+
+    def _score_rows(self, query_vec, rows):
+        # Appended rows are scored as their exact postings segment scores them
+        scores = np.zeros(len(rows))
+        base = rows < self.n_base
+        scores[base] = self.base.score_rows(query_vec, rows[base])
+        if not base.all():
+            appended = self.delta_matrix[rows[~base] - self.n_base]
+            scores[~base] = (appended @ sp.csr_matrix(query_vec).T).toarray().ravel()
+        return scores
+
+    @staticmethod
+    def _merge(rows, scores, more_rows, more_scores, k, groups):
+        # Each segment holds the best row of every group in its own top k, so
+        # the best k groups overall are among the two lists
+        rows = np.concatenate([rows, more_rows])
+        scores = np.concatenate([scores, more_scores])
+        order = np.lexsort((rows, -scores))
+        rows, scores = rows[order], scores[order]
+        _, first = np.unique(groups[rows], return_index=True)
+        first = np.sort(first)[:k]
+        return rows[first], scores[first]
@@ -0,0 +1,106 @@
+"""
+Cluster-pruned (IVF-style) TF-IDF search using the precomputed clusters.
+
+Every *_processed.csv assigns each catalog row to a cluster. The rows are
+stored cluster by cluster in one column-major matrix, so each posting list
+is sorted by cluster and a cluster's entries are one slice of it, and each
+cluster gets a centroid: the normalized mean of its rows' TF-IDF vectors.
+A query is scored against the centroids first, and then only the posting
+slices of its n_probe best clusters are scored, so with c clusters of
+similar size per-query work drops by about c / n_probe. n_probe equal to
+the number of clusters is exhaustive.
+
+Results follow PostingsIndex.top_k: one row per group, excluded rows
+skipped, best first, padded with unscored rows in position order.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from postings import PostingsIndex
+from ranking import fill_by_position, top_k_unique
+
+DEFAULT_N_PROBE = 2
+
+
+def read_cluster_labels(data_path, domain, id_column, ids):
+    """Cluster of each row from {domain}_processed.csv, aligned to ids; -1 where unknown"""
+    processed = pd.read_csv(os.path.join(data_path, f"{domain}_processed.csv"), usecols=[id_column, 'cluster'])
+    positions = pd.Index(processed[id_column]).get_indexer(ids)
+    labels = processed['cluster'].to_numpy()[positions]
+    return np.where(positions >= 0, labels, -1)
+
+
+class ClusterPrunedIndex:
+    """Posting lists over rows ordered by cluster, with a centroid per cluster"""
+    def __init__(self, tfidf_matrix, clusters, n_probe=DEFAULT_N_PROBE):
+        matrix = normalize(sp.csr_matrix(tfidf_matrix), norm='l2', copy=True)
+        self.n_rows = matrix.shape[0]
+        self.n_probe = n_probe
+        cluster_ids, labels = np.unique(np.asarray(clusters), return_inverse=True)
+        self.n_clusters = len(cluster_ids)
+        # Row ids ordered by cluster, so within every posting list a cluster is one slice
+        self.ids = np.argsort(labels, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=self.n_clusters))])
+        self.postings = PostingsIndex(matrix[self.ids])
+        assignment = sp.csr_matrix((np.ones(self.n_rows), (labels, np.arange(self.n_rows))),
+                                   shape=(self.n_clusters, self.n_rows))
+        self.centroids = normalize(assignment @ matrix, norm='l2').toarray()
+
+    def probe(self, query_vec, n_probe=None):
+        """The n_probe clusters whose centroids are most similar to the query, best first"""
+        similarities = np.asarray(sp.csr_matrix(query_vec) @ self.centroids.T).ravel()
+        return np.argsort(-similarities, kind='stable')[:n_probe or self.n_probe]
+
+    def score(self, query_vec, n_probe=None):
+        """Scores of the rows in the probed clusters that share a term with the query, as (rows, scores)"""
+        query_vec = sp.csr_matrix(query_vec)
+        probed = np.sort(self.probe(query_vec, n_probe))
+        starts, ends = self.offsets[probed], self.offsets[probed + 1]
+        rows, contributions = [], []
+        for term, query_weight in zip(query_vec.indices, query_vec.data):
+            term_rows, weights = self.postings.postings(term)
+            for lo, hi in zip(np.searchsorted(term_rows, starts), np.searchsorted(term_rows, ends)):
+                rows.append(term_rows[lo:hi])
+                contributions.append(weights[lo:hi] * query_weight)
+        if not rows:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+        # Back to catalog row ids, in position order as PostingsIndex.score returns them
+        candidates = self.ids[candidates]
+        order = np.argsort(candidates, kind='stable')
+        return candidates[order], scores[order]
+
+    def score_rows(self, query_vec, rows):
+        """Scores of the given (sorted) rows as top_k ranks them: 0 outside the probed clusters"""
+        found, found_scores = self.score(query_vec)
+        scores = np.zeros(len(rows))
+        positions = np.minimum(np.searchsorted(found, rows), max(len(found) - 1, 0))
+        hit = found[positions] == rows if len(found) else np.zeros(len(rows), dtype=bool)
+        scores[hit] = found_scores[positions[hit]]
+        return scores
+
+    def top_k(self, query_vec, k, groups=None, exclude=None):
+        """Best k rows within the probed clusters as (rows, scores), as PostingsIndex.top_k"""
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        rows, scores = self.score(query_vec)
+        if exclude is not None:
+            keep = ~exclude[rows]
+            rows, scores = rows[keep], scores[keep]
+        best = top_k_unique(scores, k, groups[rows])
+        rows, scores = rows[best], scores[best]
+        if len(rows) < k:
+            rows = fill_by_position(rows, k, self.n_rows, groups, exclude)
+            scores = np.concatenate([scores, np.zeros(len(rows) - len(scores))])
+        return rows, scores
+
+    def top_k_batch(self, query_matrix, k, groups=None):
+        """top_k for every row of a (queries x terms) matrix"""
+        query_matrix = sp.csr_matrix(query_matrix)
+        return [self.top_k(query_matrix[i], k, groups) for i in range(query_matrix.shape[0])]
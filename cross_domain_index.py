@@ -0,0 +1,74 @@
+"""
+One shared TF-IDF index over all five domains, built from cross_domain_features.csv.
+
+The features file has one row per catalog item of every domain, with a
+preprocessed description. Its rows are indexed with a single vectorizer
+(one vocabulary) into one matrix, and a domain id per row records which
+domain each row belongs to. A mixed query such as "a movie and a dinner
+for a rainy night" is vectorized once and scored in one pass over the
+shared postings; grouped_top_k then takes the best k titles of each
+requested domain from those scores, instead of five separate fits and
+searches.
+"""
+
+import numpy as np
+import pandas as pd
+
+from postings import PostingsIndex
+from ranking import grouped_top_k
+
+CROSS_DOMAIN_FILE = 'cross_domain_features.csv'
+
+# Columns the shared vocabulary is learned from
+CROSS_DOMAIN_TEXT_COLUMNS = ('title', 'genre', 'processed_description')
+
+# More features than a single domain's vectorizer, since five domains share them
+CROSS_DOMAIN_TFIDF_PARAMS = {'max_features': 5000, 'stop_words': 'english', 'ngram_range': (1, 2)}
+
+
+def read_cross_domain_features(path):
+    """The columns of the features file the shared index needs"""
+    return pd.read_csv(path, usecols=['domain', 'id', *CROSS_DOMAIN_TEXT_COLUMNS], dtype='string')
+
+
+class CrossDomainIndex:
+    """Shared vocabulary and TF-IDF matrix over every domain's items, with a domain id per row"""
+    def __init__(self, features, domains, vectorizer_params=CROSS_DOMAIN_TFIDF_PARAMS):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        self.domains = tuple(domains)
+        domain_ids = pd.Index(self.domains).get_indexer(features['domain'])
+        # Rows of domains the recommender does not serve are left out
+        features = features[domain_ids >= 0]
+        self.domain_ids = domain_ids[domain_ids >= 0].astype(np.int8)
+        self.ids = features['id'].to_numpy()
+        self.n_rows = len(features)
+        # One title code per row, so each domain returns distinct titles
+        self.title_codes = pd.factorize(features['title'], use_na_sentinel=False)[0]
+
+        text = features[CROSS_DOMAIN_TEXT_COLUMNS[0]].fillna('')
+        for column in CROSS_DOMAIN_TEXT_COLUMNS[1:]:
+            text = text + ' ' + features[column].fillna('')
+        self.vectorizer = TfidfVectorizer(**vectorizer_params)
+        self.postings = PostingsIndex(self.vectorizer.fit_transform(text))
+
+    def domain_rows(self, domain):
+        """Rows of the shared index that belong to one domain"""
+        return np.flatnonzero(self.domain_ids == self.domains.index(domain))
+
+    def search(self, query, k, domains=None, exclude=None):
+        """Best k rows of each requested domain for one query, from a single scoring pass.
+
+        exclude is an optional boolean mask over the shared rows. Returns
+        {domain: (rows, scores)} with the domain holding the best match first;
+        domains without any matching row are left out.
+        """
+        wanted = np.zeros(len(self.domains), dtype=bool)
+        wanted[[self.domains.index(domain) for domain in (domains or self.domains)]] = True
+        rows, scores = self.postings.score(self.vectorizer.transform([query]))
+        keep = wanted[self.domain_ids[rows]]
+        if exclude is not None:
+            keep &= ~exclude[rows]
+        rows, scores = rows[keep], scores[keep]
+        best = grouped_top_k(scores, k, self.domain_ids[rows], self.title_codes[rows])
+        ranked = sorted(best.items(), key=lambda item: -scores[item[1][0]])
+        return {self.domains[domain_id]: (rows[top], scores[top]) for domain_id, top in ranked}
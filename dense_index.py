@@ -0,0 +1,188 @@
+"""
+Dense LSA retrieval over TF-IDF matrices with an approximate nearest-neighbour index.
+
+Each domain's TF-IDF matrix is projected to a low-dimensional space with
+truncated SVD (latent semantic analysis, 128 dimensions by default). The row vectors are L2-normalized
+and kept as one contiguous float32 array, so cosine similarity is an inner
+product. Queries are TF-IDF vectors from the domain's vectorizer, projected
+with the same SVD.
+
+Search goes through an ANN index instead of scoring every row:
+
+- 'ivf' (numpy only): rows are bucketed by their nearest k-means centroid,
+  about sqrt(n) buckets, and stored bucket by bucket. A query scores the
+  centroids and then only the rows of its n_probe best buckets, so the
+  cost grows with sqrt(n) rather than n.
+- 'hnsw' (needs faiss): a faiss HNSW graph with inner-product metric, with
+  logarithmic search cost.
+
+'auto' picks hnsw when faiss is installed and ivf otherwise. Results follow
+PostingsIndex.top_k: at most one row per group (title), excluded rows
+skipped, best first.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+from ranking import fill_by_position, top_k_unique
+
+try:
+    import faiss
+except ImportError:  # optional; the numpy IVF index is used instead
+    faiss = None
+
+ANN_METHODS = ('auto', 'ivf', 'hnsw')
+DEFAULT_COMPONENTS = 128
+DEFAULT_N_PROBE = 8
+# k-means training rows per IVF list
+IVF_TRAIN_PER_LIST = 64
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 128
+
+
+class LsaProjection:
+    """Truncated SVD of a TF-IDF matrix, mapping sparse vectors to unit float32 vectors"""
+    def __init__(self, n_components=DEFAULT_COMPONENTS, random_state=0):
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit_transform(self, matrix):
+        from sklearn.decomposition import TruncatedSVD
+        matrix = sp.csr_matrix(matrix)
+        # Only terms some row has get a projection row: hashed features leave
+        # most buckets empty. positions maps a term to its row, -1 if none
+        used = np.bincount(matrix.indices, minlength=matrix.shape[1]) > 0
+        self.positions = None
+        if not used.all():
+            self.positions = np.where(used, np.cumsum(used) - 1, -1)
+            matrix = self._used_terms(matrix)
+        n_components = max(1, min(self.n_components, min(matrix.shape) - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+        vectors = self.svd.fit_transform(matrix)
+        # Projection matrix (terms x components) for queries, float32 like the rows
+        self.components = np.ascontiguousarray(self.svd.components_.T, dtype=np.float32)
+        return _unit_rows(vectors)
+
+    def transform(self, query_matrix):
+        query_matrix = sp.csr_matrix(query_matrix, dtype=np.float32)
+        if self.positions is not None:
+            query_matrix = self._used_terms(query_matrix)
+        return _unit_rows(query_matrix @ self.components)
+
+    def _used_terms(self, matrix):
+        # Entries of unused terms become zeros in column 0
+        positions = self.positions[matrix.indices]
+        return sp.csr_matrix((np.where(positions >= 0, matrix.data, 0), np.maximum(positions, 0), matrix.indptr),
+                             shape=(matrix.shape[0], int(self.positions.max()) + 1))
+
+
+class IvfIndex:
+    """Inverted-file index: rows grouped by nearest k-means centroid, stored list by list"""
+    def __init__(self, vectors, n_lists=None, n_probe=DEFAULT_N_PROBE, random_state=0):
+        from sklearn.cluster import KMeans
+        n_rows = len(vectors)
+        n_lists = min(n_lists or max(1, int(np.sqrt(n_rows))), n_rows)
+        # Centroids are trained on a sample, as faiss does, then every row joins
+        # the list whose centroid has the highest inner product with it
+        rng = np.random.default_rng(random_state)
+        sample = vectors[rng.choice(n_rows, min(n_rows, IVF_TRAIN_PER_LIST * n_lists), replace=False)]
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, max_iter=25, random_state=random_state).fit(sample)
+        self.centroids = _unit_rows(kmeans.cluster_centers_)
+        labels = np.concatenate([
+            np.argmax(vectors[start:start + 8192] @ self.centroids.T, axis=1)
+            for start in range(0, n_rows, 8192)
+        ])
+        self.n_probe = n_probe
+        # Row ids ordered by list, and the vectors in that order, so a list is one slice
+        self.ids = np.argsort(labels, kind='stable')
+        self.vectors = np.ascontiguousarray(vectors[self.ids])
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))])
+
+    def search(self, query, k, groups, exclude=None):
+        """Best k rows (one per group) among the probed lists, probing more lists while short"""
+        list_order = np.argsort(-(self.centroids @ query), kind='stable')
+        n_probe = self.n_probe
+        while True:
+            probed = list_order[:n_probe]
+            positions = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in probed])
+            rows = self.ids[positions]
+            if exclude is not None:
+                keep = ~exclude[rows]
+                positions, rows = positions[keep], rows[keep]
+            scores = self.vectors[positions] @ query
+            best = top_k_unique(scores, k, groups[rows])
+            if len(best) >= k or n_probe >= len(list_order):
+                return rows[best], scores[best]
+            n_probe *= 2
+
+
+class HnswIndex:
+    """faiss HNSW graph over the row vectors, inner-product metric"""
+    def __init__(self, vectors, neighbors=HNSW_NEIGHBORS, ef_search=HNSW_EF_SEARCH):
+        if faiss is None:
+            raise ImportError("the hnsw index needs faiss (pip install faiss-cpu)")
+        self.index = faiss.IndexHNSWFlat(vectors.shape[1], neighbors, faiss.METRIC_INNER_PRODUCT)
+        self.index.add(vectors)
+        self.ef_search = ef_search
+        self.n_rows = len(vectors)
+
+    def search(self, query, k, groups, exclude=None):
+        """Best k rows (one per group), widening the graph search until k distinct groups are found"""
+        fetch = k
+        while True:
+            self.index.hnsw.efSearch = max(self.ef_search, fetch)
+            scores, rows = self.index.search(query[None, :], min(fetch, self.n_rows))
+            found = rows[0] >= 0
+            rows, scores = rows[0][found].astype(np.intp), scores[0][found]
+            if exclude is not None:
+                keep = ~exclude[rows]
+                rows, scores = rows[keep], scores[keep]
+            # faiss returns hits best first; keep the first row of each group
+            _, first = np.unique(groups[rows], return_index=True)
+            first.sort()
+            if len(first) >= k or fetch >= self.n_rows:
+                return rows[first[:k]], scores[first[:k]]
+            fetch *= 4
+
+
+class DenseIndex:
+    """LSA vectors of one domain's TF-IDF matrix behind an ANN index"""
+    def __init__(self, tfidf_matrix, n_components=DEFAULT_COMPONENTS, method='auto', n_probe=DEFAULT_N_PROBE):
+        if method not in ANN_METHODS:
+            raise ValueError(f"unknown ANN method {method!r}, expected one of {ANN_METHODS}")
+        if method == 'auto':
+            method = 'hnsw' if faiss is not None else 'ivf'
+        self.method = method
+        self.n_rows = tfidf_matrix.shape[0]
+        self.projection = LsaProjection(n_components)
+        self.vectors = self.projection.fit_transform(tfidf_matrix)
+        self.ann = HnswIndex(self.vectors) if method == 'hnsw' else IvfIndex(self.vectors, n_probe=n_probe)
+
+    def top_k(self, query_vec, k, groups=None, exclude=None):
+        """Approximate best k rows for a TF-IDF query as (rows, scores), as PostingsIndex.top_k"""
+        return self._search(self.projection.transform(query_vec)[0], k, groups, exclude)
+
+    def score_rows(self, query_vec, rows):
+        """Exact LSA cosine of the given rows for a TF-IDF query, as used by filtered_top_k"""
+        return (self.vectors[rows] @ self.projection.transform(query_vec)[0]).astype(np.float64)
+
+    def top_k_batch(self, query_matrix, k, groups=None):
+        """top_k for every row of a (queries x terms) matrix, projected in one product"""
+        return [self._search(query, k, groups) for query in self.projection.transform(query_matrix)]
+
+    def _search(self, query, k, groups, exclude=None):
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        if not query.any():
+            # No known terms: nothing is similar, fall back to position order like the sparse path
+            rows = fill_by_position(np.empty(0, dtype=np.intp), k, self.n_rows, groups, exclude)
+            return rows, np.zeros(len(rows))
+        rows, scores = self.ann.search(query, k, groups, exclude)
+        return rows, scores.astype(np.float64)
+
+
+def _unit_rows(matrix):
+    # Plain numpy rather than sklearn's normalize, whose input checks dominate for one query
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.ascontiguousarray(matrix / np.where(norms > 0, norms, 1))
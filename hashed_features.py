@@ -0,0 +1,90 @@
+"""
+Hashed TF-IDF features: a fit-free vocabulary of a fixed number of buckets.
+
+TfidfVectorizer(max_features=2000) counts every 1-3-gram of the domain in
+a Python dict before keeping the 2000 most frequent, so fitting holds the
+whole n-gram vocabulary in memory, and the rarer, more discriminative
+n-grams it drops can never match a query. HashedTfidfVectorizer hashes
+each n-gram (same analyzer: lowercase, English stop words, 1-3-grams)
+straight into one of n_features buckets, so nothing is truncated and there
+is no vocabulary to build or look terms up in; memory is fixed by
+n_features, at the cost of unrelated n-grams colliding in a bucket.
+
+The IDF is kept separately as a document count per bucket plus the number
+of documents, so partial_fit can add documents in batches (streaming fit)
+and the weights follow. Weighting matches TfidfVectorizer's defaults: raw
+counts times smoothed IDF, rows l2-normalized.
+
+As a vocabulary ignores terms it has not seen, transform drops buckets no
+fitted document has: a query's unseen n-grams cannot match and would only
+lower its scores. transform_new keeps them, for rows added to an index
+before their n-grams are counted (see catalog_updates.refresh_idf).
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+DEFAULT_HASH_BUCKETS = 2 ** 18
+
+
+class HashedTfidfVectorizer:
+    """TF-IDF over hashed n-grams, with the fit/transform interface of TfidfVectorizer"""
+    def __init__(self, n_features=DEFAULT_HASH_BUCKETS, stop_words='english', ngram_range=(1, 3), smooth_idf=True,
+                 norm='l2'):
+        self.n_features = n_features
+        self.stop_words = stop_words
+        self.ngram_range = tuple(ngram_range)
+        self.smooth_idf = smooth_idf
+        self.norm = norm
+        self.hasher = HashingVectorizer(n_features=n_features, stop_words=stop_words, ngram_range=self.ngram_range,
+                                        alternate_sign=False, norm=None)
+        self.set_document_counts(np.zeros(n_features, dtype=np.int64), 0)
+
+    def get_params(self):
+        """Constructor arguments, e.g. for persisting the vectorizer"""
+        return {'n_features': self.n_features, 'stop_words': self.stop_words, 'ngram_range': self.ngram_range,
+                'smooth_idf': self.smooth_idf, 'norm': self.norm}
+
+    def set_document_counts(self, doc_freq, n_docs):
+        """Set the documents per bucket and the document total the IDF is computed from"""
+        self.doc_freq = doc_freq
+        self.n_docs = n_docs
+        smooth = int(self.smooth_idf)
+        self.idf_ = np.log((n_docs + smooth) / (doc_freq + smooth)) + 1
+        self._seen_idf = np.where(doc_freq > 0, self.idf_, 0.0)
+
+    def partial_fit(self, documents):
+        """Add a batch of documents to the IDF counts"""
+        self._count(self.hasher.transform(documents))
+        return self
+
+    def fit(self, documents):
+        self.set_document_counts(np.zeros(self.n_features, dtype=np.int64), 0)
+        return self.partial_fit(documents)
+
+    def fit_transform(self, documents):
+        self.set_document_counts(np.zeros(self.n_features, dtype=np.int64), 0)
+        counts = self.hasher.transform(documents)
+        self._count(counts)
+        return self._weight(counts, self.idf_)
+
+    def transform(self, documents):
+        return self._weight(self.hasher.transform(documents), self._seen_idf)
+
+    def transform_new(self, documents):
+        """transform, keeping n-grams in buckets no fitted document has, weighted by the IDF of a zero count"""
+        return self._weight(self.hasher.transform(documents), self.idf_)
+
+    def _count(self, counts):
+        # Buckets are distinct within a row, so a count per bucket is its document frequency
+        doc_freq = self.doc_freq + np.bincount(counts.indices, minlength=self.n_features)
+        self.set_document_counts(doc_freq, self.n_docs + counts.shape[0])
+
+    def _weight(self, counts, idf):
+        # Scaling the stored counts costs O(nnz), where a diagonal product would cost O(n_features)
+        weighted = sp.csr_matrix(counts, dtype=np.float64)
+        weighted.data *= idf[weighted.indices]
+        weighted.eliminate_zeros()
+        return normalize(weighted, norm=self.norm, copy=False)
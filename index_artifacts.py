@@ -0,0 +1,204 @@
+"""
+Persisted TF-IDF index artifacts for AdvancedRecommender.
+
+The build step writes, per domain, the fitted vocabulary, the IDF vector,
+the CSR matrix arrays and the column-major postings arrays. Artifacts are
+keyed by a fingerprint of the source catalog and the vectorizer settings,
+so a stale index is never served: a mismatch means rebuild. The combined
+text the models are fitted on is not stored, as nothing reads it once they
+are.
+
+Every array is a raw .npy file (the format pads its header so the data
+starts 64-byte aligned) and is opened memory-mapped and read-only: several
+worker processes serving the same index share one page-cache copy, and
+opening does not read the arrays, so it costs the same for any catalog
+size. The vocabulary terms are a fixed-width unicode array, read once
+into the dict the vectorizer looks terms up in: that dict is the only part
+private to each process, and it is bounded by max_features. Domains with hashed
+features have no vocabulary; their per-bucket document counts are stored
+instead.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from hashed_features import HashedTfidfVectorizer
+
+ARTIFACT_VERSION = 4
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index_artifacts')
+
+
+def _settings_digest(vectorizer_params):
+    """Stable JSON form of the vectorizer settings used in fingerprints"""
+    return json.dumps(
+        {'version': ARTIFACT_VERSION, 'params': _params_to_json(vectorizer_params)},
+        sort_keys=True
+    ).encode('utf-8')
+
+
+def _params_to_json(params):
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in params.items()}
+
+
+def _params_from_json(params):
+    return {key: tuple(value) if key == 'ngram_range' else value for key, value in params.items()}
+
+
+def fingerprint_files(paths, vectorizer_params):
+    """Fingerprint the raw source CSV files (domain -> path) and vectorizer settings"""
+    digest = hashlib.sha256(_settings_digest(vectorizer_params))
+    for domain in sorted(paths):
+        digest.update(domain.encode('utf-8'))
+        with open(paths[domain], 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_frames(frames, vectorizer_params):
+    """Fingerprint already-loaded DataFrames (domain -> df) and vectorizer settings"""
+    digest = hashlib.sha256(_settings_digest(vectorizer_params))
+    for domain in sorted(frames):
+        df = frames[domain]
+        digest.update(domain.encode('utf-8'))
+        digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _array_path(index_dir, domain, name):
+    return os.path.join(index_dir, f"{domain}.{name}.npy")
+
+
+def save_index_artifacts(index_dir, fingerprint, vectorizer_params, vectorizers, matrices, postings):
+    """Write all domain artifacts to index_dir, replacing any previous build.
+
+    postings maps each domain to the PostingsIndex built over its matrix.
+    """
+    tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    domains = {}
+    for domain, vectorizer in vectorizers.items():
+        matrix = sp.csr_matrix(matrices[domain])
+        index = postings[domain]
+        arrays = {
+            'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+            'postings_data': index.weights, 'postings_indices': index.rows, 'postings_indptr': index.indptr,
+            'max_weights': index.max_weights, 'idf': vectorizer.idf_,
+        }
+        domains[domain] = {'n_rows': matrix.shape[0], 'n_features': matrix.shape[1]}
+        if isinstance(vectorizer, HashedTfidfVectorizer):
+            arrays['doc_freq'] = vectorizer.doc_freq
+            domains[domain]['hashing'] = {'params': _params_to_json(vectorizer.get_params()),
+                                          'n_docs': int(vectorizer.n_docs)}
+        else:
+            vocabulary = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+            arrays['vocab'] = np.array(vocabulary, dtype=str)
+        for name, array in arrays.items():
+            np.save(_array_path(tmp_dir, domain, name), np.ascontiguousarray(array))
+
+    # The manifest is written last so a partially written build never validates
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'fingerprint': fingerprint,
+        'vectorizer_params': _params_to_json(vectorizer_params),
+        'domains': domains,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Processes still mapping the previous build keep reading its unlinked files
+    old_dir = f"{index_dir}.old-{os.getpid()}"
+    if os.path.exists(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_manifest(index_dir):
+    """Return the artifact manifest, or None if there is no usable build"""
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != ARTIFACT_VERSION:
+        return None
+    return manifest
+
+
+def restore_vectorizer(vectorizer_params, vocabulary, idf):
+    """Rebuild a fitted TfidfVectorizer from its vocabulary and IDF vector without refitting"""
+    vectorizer = TfidfVectorizer(**vectorizer_params)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(vocabulary)}
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+def load_index_artifacts(index_dir, fingerprint):
+    """Open artifacts matching fingerprint, memory-mapped.
+
+    Returns a dict with 'vectorizers', 'matrices' and 'postings' keyed by
+    domain, or None when the build is missing, corrupt or was made from
+    different sources/settings. Arrays are read-only views of the files.
+    """
+    from postings import PostingsIndex
+
+    manifest = read_manifest(index_dir)
+    if manifest is None or manifest.get('fingerprint') != fingerprint:
+        return None
+
+    vectorizer_params = _params_from_json(manifest['vectorizer_params'])
+    artifacts = {'vectorizers': {}, 'matrices': {}, 'postings': {}}
+    try:
+        for domain, sizes in manifest['domains'].items():
+            arrays = {
+                name: np.load(_array_path(index_dir, domain, name), mmap_mode='r')
+                for name in ('data', 'indices', 'indptr', 'postings_data', 'postings_indices', 'postings_indptr',
+                             'max_weights', 'idf')
+            }
+            shape = (sizes['n_rows'], sizes['n_features'])
+            artifacts['matrices'][domain] = sp.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']), shape=shape, copy=False
+            )
+            artifacts['postings'][domain] = PostingsIndex.from_arrays(
+                arrays['postings_data'], arrays['postings_indices'], arrays['postings_indptr'], shape,
+                arrays['max_weights']
+            )
+            hashing = sizes.get('hashing')
+            if hashing is None:
+                vocabulary = np.load(_array_path(index_dir, domain, 'vocab')).tolist()
+                vectorizer = restore_vectorizer(vectorizer_params, vocabulary, arrays['idf'])
+            else:
+                vectorizer = HashedTfidfVectorizer(**_params_from_json(hashing['params']))
+                vectorizer.set_document_counts(np.load(_array_path(index_dir, domain, 'doc_freq'), mmap_mode='r'),
+                                               hashing['n_docs'])
+            artifacts['vectorizers'][domain] = vectorizer
+    except (OSError, KeyError, ValueError):
+        return None
+    return artifacts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build persisted TF-IDF index artifacts")
+    parser.add_argument('--data-path', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    args = parser.parse_args()
+
+    from recommender_core import OptimizedMultiDomainRecommendationSystem
+
+    system = OptimizedMultiDomainRecommendationSystem(data_path=args.data_path, index_dir=args.index_dir)
+    system.build_index()
+    print(f"Index artifacts written to {args.index_dir}")
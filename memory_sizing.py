@@ -0,0 +1,120 @@
+"""
+Resident memory of the recommender's data structures.
+
+sys.getsizeof counts only an object's own header, so MemorySizer sums
+everything reachable from an object: containers, instance attributes and
+slots, numpy arrays (by the buffer they view), scipy sparse matrices through
+their arrays, pandas objects (memory_usage(deep=True)) and Arrow tables by
+their buffers. Each object is counted once per sizer, so structures that
+share data (a retriever wrapping the postings, a view of a matrix) are
+charged to whichever was sized first.
+
+Bytes mapped from files are kept apart from resident bytes: numpy arrays
+opened with mmap_mode (the index artifacts) and read-only Arrow buffers
+(the memory-mapped display columns). Their pages are file-backed, shared by
+every process mapping the same files and reclaimable by the kernel, so they
+do not weigh on a container's memory limit the way parsed frames and fitted
+models do. Native extension objects (spatial trees, HNSW graphs) count only
+their shallow size unless they expose their arrays through get_arrays().
+"""
+
+import mmap
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depends on the deployment image
+    pa = None
+
+# Code, not data: walking them would reach module globals and class hierarchies
+SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _buffer_owner(array):
+    """The array owning the memory a view refers to"""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _slots(obj):
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+class MemorySizer:
+    """Resident and file-mapped bytes reachable from objects, each object counted once"""
+    def __init__(self):
+        # id -> object; holding on to the objects keeps their ids from being reused
+        self.seen = {}
+        self.seen_buffers = set()
+
+    def size(self, *objects):
+        """(resident, mapped) bytes reachable from objects that this sizer has not counted yet"""
+        resident = mapped = 0
+        stack = list(objects)
+        while stack:
+            obj = stack.pop()
+            if obj is None or isinstance(obj, SKIPPED_TYPES) or id(obj) in self.seen:
+                continue
+            self.seen[id(obj)] = obj
+            if isinstance(obj, np.ndarray):
+                owner = _buffer_owner(obj)
+                if owner is not obj and id(owner) in self.seen:
+                    continue
+                self.seen[id(owner)] = owner
+                if isinstance(owner.base, mmap.mmap):
+                    mapped += owner.nbytes
+                else:
+                    resident += owner.nbytes
+                if owner.dtype.hasobject:
+                    stack.extend(owner.ravel().tolist())
+            elif isinstance(obj, pd.DataFrame):
+                resident += int(obj.memory_usage(deep=True).sum())
+            elif isinstance(obj, (pd.Series, pd.Index)):
+                resident += int(obj.memory_usage(deep=True))
+            elif pa is not None and isinstance(obj, (pa.Table, pa.RecordBatch, pa.ChunkedArray, pa.Array)):
+                arrow_resident, arrow_mapped = self._arrow_bytes(obj)
+                resident += arrow_resident
+                mapped += arrow_mapped
+            elif isinstance(obj, dict):
+                resident += sys.getsizeof(obj)
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                resident += sys.getsizeof(obj)
+                stack.extend(obj)
+            else:
+                resident += sys.getsizeof(obj)
+                stack.append(getattr(obj, '__dict__', None))
+                stack.extend(getattr(obj, slot, None) for slot in _slots(obj))
+                get_arrays = getattr(obj, 'get_arrays', None)
+                if callable(get_arrays):
+                    stack.extend(get_arrays())
+        return resident, mapped
+
+    def _arrow_bytes(self, obj):
+        # Buffers allocated by Arrow are mutable; those of a memory-mapped IPC file are not
+        if isinstance(obj, (pa.Table, pa.RecordBatch)):
+            obj = obj.columns
+        elif isinstance(obj, pa.ChunkedArray):
+            obj = obj.chunks
+        else:
+            obj = [obj]
+        resident = mapped = 0
+        for column in obj:
+            for array in column.chunks if isinstance(column, pa.ChunkedArray) else [column]:
+                for buffer in array.buffers():
+                    if buffer is None or (buffer.address, buffer.size) in self.seen_buffers:
+                        continue
+                    self.seen_buffers.add((buffer.address, buffer.size))
+                    if buffer.is_mutable:
+                        resident += buffer.size
+                    else:
+                        mapped += buffer.size
+        return resident, mapped
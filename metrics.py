@@ -0,0 +1,168 @@
+"""
+Per-stage latency histograms and fallback counters for the recommender.
+
+Stages are timed with `with metrics.stage('vectorize', domain):`. When
+metrics are disabled stage() returns a shared no-op context, so the
+instrumentation costs one method call per stage. When enabled, durations
+go into fixed-bucket histograms per (stage, domain), the same layout
+Prometheus uses, and counters track how often fallback paths are taken.
+
+export_prometheus() renders everything in the Prometheus text format;
+snapshot() returns the same data with estimated percentiles for
+debugging.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Histogram bucket upper bounds in seconds (Prometheus 'le' labels)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0)
+
+# Set to 1 to enable metrics in processes that do not enable them explicitly
+METRICS_ENV = 'RECOMMENDER_METRICS'
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if beyond the last bound)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.key[0], time.perf_counter() - self.start, self.key[1])
+        return False
+
+
+class Metrics:
+    """Stage histograms and counters, keyed by (name, domain)"""
+    def __init__(self, enabled=None, prefix='recommender'):
+        if enabled is None:
+            enabled = os.environ.get(METRICS_ENV, '') not in ('', '0')
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def stage(self, name, domain=None):
+        """Context manager timing one stage; a no-op while disabled"""
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, (name, domain or ''))
+
+    def observe(self, name, seconds, domain=None):
+        key = (name, domain or '')
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, domain=None, amount=1):
+        if not self.enabled:
+            return
+        key = (name, domain or '')
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Debug view: per stage and domain count, mean and bucketed p50/p95/p99 in ms"""
+        with self._lock:
+            stages = {
+                f"{name}[{domain}]" if domain else name: {
+                    'count': h.count,
+                    'mean_ms': round(h.sum / h.count * 1e3, 3),
+                    **{f"p{int(q * 100)}_ms": _bucket_ms(h.quantile(q)) for q in (0.5, 0.95, 0.99)},
+                }
+                for (name, domain), h in sorted(self.histograms.items())
+            }
+            counters = {f"{name}[{domain}]" if domain else name: value
+                        for (name, domain), value in sorted(self.counters.items())}
+        return {'enabled': self.enabled, 'stages': stages, 'counters': counters}
+
+    def export_prometheus(self, gauges=()):
+        """Prometheus text exposition; gauges are extra (name, labels dict, value) samples"""
+        stage_metric = f"{self.prefix}_stage_seconds"
+        counter_metric = f"{self.prefix}_events_total"
+        lines = [f"# HELP {stage_metric} Latency of recommender stages.", f"# TYPE {stage_metric} histogram"]
+        with self._lock:
+            for (name, domain), h in sorted(self.histograms.items()):
+                labels = _labels(stage=name, domain=domain)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f'{stage_metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{stage_metric}_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"{stage_metric}_sum{{{labels}}} {h.sum:.9f}")
+                lines.append(f"{stage_metric}_count{{{labels}}} {h.count}")
+            lines += [f"# HELP {counter_metric} Fallback paths and other recommender events.",
+                      f"# TYPE {counter_metric} counter"]
+            for (name, domain), value in sorted(self.counters.items()):
+                lines.append(f"{counter_metric}{{{_labels(event=name, domain=domain)}}} {value}")
+        typed = set()
+        for name, labels, value in gauges:
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{{{_labels(**labels)}}} {value}" if labels else f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _bucket_ms(seconds):
+    # None for the open-ended +Inf bucket, which has no finite bound to report
+    return round(seconds * 1e3, 3) if seconds != float('inf') else None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
@@ -0,0 +1,155 @@
+"""
+Inverted-index scoring over TF-IDF matrices.
+
+The domain matrix is L2-normalized once and stored column-major, so each
+feature's column is a posting list of (row, weight) pairs sorted by row.
+Cosine similarity with a normalized query is then a sum over the query's
+posting lists only, with no pass over the whole catalog.
+
+Top-k retrieval uses term-at-a-time MaxScore pruning. Terms are processed
+in decreasing order of their maximum possible contribution. Once the k-th
+best score exceeds what the remaining terms could add, new rows can no
+longer qualify. Candidates that cannot catch up are dropped, and the
+remaining posting lists are probed only at the surviving rows.
+
+Batches of queries are scored together with one sparse matrix product
+and ranked with one sort over all of their scores.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from ranking import batch_top_k_unique, fill_by_position, top_k_unique
+
+# Upper bound on queries x rows scored densely at once by top_k_batch
+DENSE_BATCH_CELLS = 1 << 22
+
+
+class PostingsIndex:
+    """Column-major posting lists over one domain's TF-IDF matrix"""
+    def __init__(self, tfidf_matrix):
+        matrix = sp.csc_matrix(normalize(sp.csr_matrix(tfidf_matrix), norm='l2', copy=True))
+        matrix.sort_indices()
+        self._attach(matrix)
+
+    @classmethod
+    def from_arrays(cls, data, indices, indptr, shape, max_weights=None):
+        """Index over the column-major arrays of an already built index, used in place.
+
+        The arrays must come from a PostingsIndex (normalized, rows sorted);
+        memory-mapped arrays stay mapped, so processes opening the same files
+        share one copy.
+        """
+        matrix = sp.csc_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+        # Known sorted: scipy would otherwise sort read-only arrays in place
+        matrix.has_sorted_indices = True
+        index = cls.__new__(cls)
+        index._attach(matrix, max_weights)
+        return index
+
+    def _attach(self, matrix, max_weights=None):
+        self.matrix = matrix
+        self.n_rows, self.n_terms = matrix.shape
+        self.indptr = matrix.indptr
+        self.rows = matrix.indices
+        self.weights = matrix.data
+        if max_weights is None:
+            # Largest weight in each posting list, the per-term MaxScore upper bound
+            max_weights = np.zeros(self.n_terms)
+            nonempty = np.diff(self.indptr) > 0
+            max_weights[nonempty] = np.maximum.reduceat(self.weights, self.indptr[:-1][nonempty])
+        self.max_weights = max_weights
+
+    def postings(self, term):
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.rows[start:end], self.weights[start:end]
+
+    def score(self, query_vec):
+        """Exhaustive scores for every row sharing a term with the query, as (rows, scores)"""
+        query_vec = sp.csr_matrix(query_vec)
+        parts = [self.postings(term) for term in query_vec.indices]
+        if not parts:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        rows = np.concatenate([p[0] for p in parts])
+        contributions = np.concatenate([p[1] * weight for p, weight in zip(parts, query_vec.data)])
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        return candidates, np.bincount(inverse, weights=contributions)
+
+    def top_k(self, query_vec, k, groups=None, exclude=None):
+        """Best k rows for the query as (rows, scores), best first.
+
+        groups gives a group id per row (e.g. a title code) so that at most one
+        row per group is returned; exclude is a boolean mask of rows to skip.
+        When fewer than k rows match, the result is padded with unscored rows
+        in position order, the same order a full sort gives tied zero scores.
+        """
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        query_vec = sp.csr_matrix(query_vec)
+        terms, query_weights = query_vec.indices, query_vec.data
+        bounds = query_weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, query_weights, bounds = terms[order], query_weights[order], bounds[order]
+        # remaining[i] is the most that terms i.. can still add to any row
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1], 0.0)
+
+        cand_rows = np.empty(0, dtype=self.rows.dtype)
+        cand_scores = np.empty(0)
+        threshold = 0.0
+        for i, (term, query_weight) in enumerate(zip(terms, query_weights)):
+            rows, weights = self.postings(term)
+            if threshold > remaining[i]:
+                # No unseen row can reach the top k any more: probe survivors only
+                pos = np.searchsorted(rows, cand_rows)
+                hit = pos < len(rows)
+                hit[hit] = rows[pos[hit]] == cand_rows[hit]
+                cand_scores[hit] += query_weight * weights[pos[hit]]
+            else:
+                if exclude is not None:
+                    keep = ~exclude[rows]
+                    rows, weights = rows[keep], weights[keep]
+                merged_rows = np.concatenate([cand_rows, rows])
+                merged_scores = np.concatenate([cand_scores, query_weight * weights])
+                cand_rows, inverse = np.unique(merged_rows, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=merged_scores, minlength=len(cand_rows))
+
+            if len(cand_rows) >= k and remaining[i + 1] > 0:
+                best = top_k_unique(cand_scores, k, groups[cand_rows])
+                if len(best) == k:
+                    threshold = cand_scores[best[-1]]
+                    survivors = cand_scores + remaining[i + 1] >= threshold
+                    cand_rows, cand_scores = cand_rows[survivors], cand_scores[survivors]
+
+        best = top_k_unique(cand_scores, k, groups[cand_rows])
+        rows, scores = cand_rows[best], cand_scores[best]
+        if len(rows) < k:
+            rows = fill_by_position(rows, k, self.n_rows, groups, exclude)
+            scores = np.concatenate([scores, np.zeros(len(rows) - len(scores))])
+        return rows, scores
+
+    def top_k_batch(self, query_matrix, k, groups=None):
+        """top_k for every row of a (queries x terms) matrix, as a list of (rows, scores).
+
+        No rows are excluded; zero-score padding follows top_k.
+        """
+        if groups is None:
+            groups = np.arange(self.n_rows)
+        query_matrix = sp.csr_matrix(query_matrix)
+        # Queries per product, so the dense score block stays within DENSE_BATCH_CELLS
+        chunk = max(1, DENSE_BATCH_CELLS // max(self.n_rows, 1))
+        results = []
+        for start in range(0, query_matrix.shape[0], chunk):
+            queries = query_matrix[start:start + chunk]
+            scores = (queries @ self.matrix.T).toarray()
+            for i, ranked in enumerate(batch_top_k_unique(scores, k, groups)):
+                if ranked is None:
+                    # Too many rows share a title for the batch pool: rank alone
+                    results.append(self.top_k(queries[i], k, groups))
+                    continue
+                rows, row_scores = ranked
+                if len(rows) < k:
+                    rows = fill_by_position(rows, k, self.n_rows, groups)
+                    row_scores = np.concatenate([row_scores, np.zeros(len(rows) - len(row_scores))])
+                results.append((rows, row_scores))
+        return results
@@ -0,0 +1,91 @@
+"""
+Result caches for repeated queries.
+
+Two layers, each a bounded LRU with a time-to-live:
+
+  plans       normalized query -> QueryPlan (domain, enhanced query, filters, direct)
+  candidates  (domain, query text, filters) -> best-first (rows, scores), one row per title
+
+Candidates are cached before any per-session filtering: they rank the whole
+catalog, and callers drop already-recommended titles afterwards. Both
+layers must be cleared when the index they were computed from is rebuilt.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_PLANS = 1024
+DEFAULT_MAX_CANDIDATES = 1024
+DEFAULT_TTL = 600.0  # seconds
+# Candidates cached per query, so most repeat visitors still find enough unseen titles
+DEFAULT_CANDIDATE_POOL = 32
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace; TF-IDF and domain detection ignore both"""
+    return ' '.join(query.lower().split())
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional TTL and hit/miss counters"""
+    def __init__(self, max_entries, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            expires = self.clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+class QueryCache:
+    """Query plan and candidate caches for one recommender"""
+    def __init__(self, max_plans=DEFAULT_MAX_PLANS, max_candidates=DEFAULT_MAX_CANDIDATES, ttl=DEFAULT_TTL,
+                 candidate_pool=DEFAULT_CANDIDATE_POOL, clock=time.monotonic):
+        self.plans = LRUCache(max_plans, ttl, clock)
+        self.candidates = LRUCache(max_candidates, ttl, clock)
+        self.candidate_pool = candidate_pool
+
+    def invalidate(self):
+        """Drop everything, e.g. after the index was rebuilt"""
+        self.plans.clear()
+        self.candidates.clear()
+
+    def stats(self):
+        return {'plans': self.plans.stats(), 'candidates': self.candidates.stats()}
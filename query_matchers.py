@@ -0,0 +1,242 @@
+"""
+Multi-pattern matchers built once from the recommender's keyword tables
+and catalog entities.
+
+KeywordAutomaton is an Aho-Corasick automaton that reports every occurrence
+of every keyword in a single left-to-right pass over the text. It includes
+overlapping occurrences such as 'tv' inside 'tv show'. DomainKeywordScorer
+uses it to reproduce detect_domain's scoring without compiling or running
+one regex per keyword. EntityMatcher runs the same automaton over word
+tokens to find multi-word names (artists, directors, cast, authors), and
+keeps a postings list of catalog rows per name, so a named entity resolves
+to its rows without scanning the catalog.
+"""
+
+import re
+from collections import deque
+
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+# Separators between people listed in one catalog field, e.g. "Tom Hanks and Brad Pitt"
+_PEOPLE_SPLIT_RE = re.compile(r'\s+and\s+|\s*[,;&]\s*')
+
+
+def _is_word_char(ch):
+    """Same character class as the regex \\w used by detect_domain"""
+    return ch.isalnum() or ch == '_'
+
+
+def is_word_bounded(text, start, end):
+    """True if text[start:end] has regex \\b boundaries on both sides"""
+    before = _is_word_char(text[start - 1]) if start > 0 else False
+    after = _is_word_char(text[end]) if end < len(text) else False
+    return (before != _is_word_char(text[start])) and (_is_word_char(text[end - 1]) != after)
+
+
+def split_people(value):
+    """Single names from a field listing several people"""
+    return [part for part in _PEOPLE_SPLIT_RE.split(str(value)) if part]
+
+
+def tokenize(text):
+    """Lowercased word and punctuation tokens, whitespace dropped"""
+    return tuple(_TOKEN_RE.findall(text.lower()))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed list of keywords.
+
+    Keywords and text may be strings (character level) or token tuples.
+    """
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(keyword_id)
+
+        # Breadth-first failure links; outputs of the failure state are inherited
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find_all(self, text):
+        """Yield (start, end, keyword_id) for every occurrence of every keyword"""
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for keyword_id in self.output[state]:
+                yield end - len(self.keywords[keyword_id]), end, keyword_id
+
+
+class DomainKeywordScorer:
+    """Scores text against per-domain keyword lists in one pass.
+
+    Each list entry adds 2 to its domain when it occurs with word boundaries,
+    otherwise 1 when it is longer than 3 characters and occurs as a substring.
+    Repeated entries in a list count once per repetition.
+    """
+    def __init__(self, domain_keywords):
+        self.domains = list(domain_keywords)
+        keyword_ids = {}
+        self.multiplicity = []
+        for domain_index, keywords in enumerate(domain_keywords.values()):
+            for keyword in keywords:
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(keyword_ids)
+                    self.multiplicity.append([0] * len(self.domains))
+                self.multiplicity[keyword_ids[keyword]][domain_index] += 1
+        self.automaton = KeywordAutomaton(keyword_ids)
+
+    def score(self, text):
+        """Return {domain: score} for text, with domains in table order"""
+        found = {}
+        for start, end, keyword_id in self.automaton.find_all(text):
+            if not found.get(keyword_id):
+                found[keyword_id] = is_word_bounded(text, start, end)
+
+        scores = [0] * len(self.domains)
+        for keyword_id, bounded in found.items():
+            if bounded:
+                points = 2
+            elif len(self.automaton.keywords[keyword_id]) > 3:
+                points = 1
+            else:
+                continue
+            for domain_index, count in enumerate(self.multiplicity[keyword_id]):
+                scores[domain_index] += points * count
+        return dict(zip(self.domains, scores))
+
+
+class EntityMatcher:
+    """Token-level trie (Aho-Corasick) over catalog entity names.
+
+    Entities are (domain, field, name) triples. find() returns every entity
+    whose token sequence occurs in the query, in one pass over its tokens,
+    so the cost does not grow with the number of known entities. postings
+    optionally maps (domain, field, lowercase name) to the row ids holding
+    that name, which rows() returns.
+    """
+    def __init__(self, entities, postings=None):
+        self.postings = postings or {}
+        self.entities = {}
+        for domain, field, name in entities:
+            tokens = tokenize(name)
+            if tokens:
+                self.entities.setdefault(tokens, []).append((domain, field, name.lower()))
+        self.automaton = KeywordAutomaton(self.entities)
+
+    @classmethod
+    def from_frames(cls, frames, entity_columns, split_fields=('cast',), order_by=None):
+        """Build from domain frames; entity_columns maps domain -> catalog fields holding names.
+
+        Values of split_fields list several people and are split into single names.
+        Each name's rows are indexed, matched case-insensitively, in row order or,
+        for domains in order_by (domain -> numeric column), highest value first.
+        """
+        entities = []
+        postings = {}
+        import numpy as np
+        import pandas as pd
+        for domain, fields in entity_columns.items():
+            df = frames.get(domain)
+            if df is None:
+                continue
+            rank = None
+            if order_by and order_by.get(domain) in df.columns:
+                rank = -df[order_by[domain]].to_numpy(dtype=np.float64)
+            for field in fields:
+                if field not in df.columns:
+                    continue
+                # Rows grouped by distinct value, so each value is split only once
+                codes, uniques = pd.factorize(df[field])
+                order = np.argsort(codes, kind='stable')
+                starts = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+                rows_by_name = {}
+                for code, value in enumerate(uniques):
+                    names = split_people(value) if field in split_fields else [str(value)]
+                    for name in names:
+                        rows_by_name.setdefault(name, []).append(order[starts[code]:starts[code + 1]])
+                entities.extend((domain, field, name) for name in sorted(rows_by_name))
+
+                merged = {}
+                for name, parts in rows_by_name.items():
+                    merged.setdefault(name.lower(), []).extend(parts)
+                for name, parts in merged.items():
+                    rows = np.sort(np.concatenate(parts)).astype(np.intp)
+                    if rank is not None:
+                        # A stable sort keeps row order among ties
+                        rows = rows[np.argsort(rank[rows], kind='stable')]
+                    postings[(domain, field, name)] = rows
+        return cls(entities, postings)
+
+    def extend(self, frames, entity_columns, starts, split_fields=('cast',), order_by=None):
+        """Index rows appended to frames since they were indexed; starts maps a domain to its first new row.
+
+        The other arguments are those of from_frames. Posting lists keep their
+        order, and the automaton is rebuilt only when new names appear.
+        """
+        import numpy as np
+        added = EntityMatcher.from_frames({domain: frames[domain].iloc[start:] for domain, start in starts.items()},
+                                          entity_columns, split_fields, order_by)
+        ranks = {}
+        for key, rows in added.postings.items():
+            domain = key[0]
+            rows = rows + starts[domain]
+            if key in self.postings:
+                rows = np.concatenate([self.postings[key], rows])
+                if order_by and order_by.get(domain) in frames[domain].columns:
+                    if domain not in ranks:
+                        ranks[domain] = -frames[domain][order_by[domain]].to_numpy(dtype=np.float64)
+                    # New rows come last among ties, as in row order
+                    rows = rows[np.argsort(ranks[domain][rows], kind='stable')]
+            self.postings[key] = rows
+        new_names = False
+        for tokens, entities in added.entities.items():
+            known = self.entities.setdefault(tokens, [])
+            for entity in entities:
+                if entity not in known:
+                    known.append(entity)
+                    new_names = True
+        if new_names:
+            self.automaton = KeywordAutomaton(self.entities)
+
+    def find(self, text, domain=None, field=None):
+        """Distinct (domain, field, name) mentions in text, in order of first occurrence"""
+        found = []
+        tokens = tokenize(text)
+        for _, _, keyword_id in self.automaton.find_all(tokens):
+            for entity in self.entities[self.automaton.keywords[keyword_id]]:
+                if entity in found:
+                    continue
+                if (domain is None or entity[0] == domain) and (field is None or entity[1] == field):
+                    found.append(entity)
+        return found
+
+    def rows(self, domain, field, name):
+        """Catalog rows whose field holds the (lowercase) name, in index order; empty if unknown"""
+        rows = self.postings.get((domain, field, name))
+        if rows is None:
+            import numpy as np
+            rows = np.empty(0, dtype=np.intp)
+        return rows
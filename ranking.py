@@ -0,0 +1,141 @@
+"""
+Top-k selection over score arrays.
+
+Selection uses np.partition instead of a full sort, so picking k results
+out of n rows costs O(n) rather than O(n log n). Excluded rows are masked
+out before selection and ties are broken by row position, which keeps
+results deterministic.
+"""
+
+import numpy as np
+
+
+def top_k(scores, k, exclude=None):
+    """Positions of the k highest scores, best first.
+
+    exclude is an optional boolean mask of rows that must never be returned.
+    """
+    scores = np.asarray(scores)
+    if exclude is not None:
+        scores = np.where(exclude, -np.inf, scores)
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        threshold = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        top = np.concatenate([above, ties])
+    else:
+        top = np.arange(n)
+
+    top = top[np.lexsort((top, -scores[top]))]
+    if exclude is not None:
+        top = top[scores[top] > -np.inf]
+    return top
+
+
+def top_k_unique(scores, k, groups, exclude=None):
+    """Like top_k, but returns at most one row (the best scoring) per group id.
+
+    Used to return distinct titles when a catalog repeats a title across rows.
+    The candidate pool grows geometrically until k distinct groups are found.
+    """
+    want = k
+    while True:
+        top = top_k(scores, want, exclude)
+        _, first = np.unique(groups[top], return_index=True)
+        if len(first) >= k or len(top) < want:
+            return top[np.sort(first)][:k]
+        want *= 4
+
+
+def fill_by_position(selected, k, n_rows, groups, exclude=None):
+    """Pad a best-first selection up to k rows with unscored rows in position order.
+
+    Rows from groups that are already selected, and excluded rows, are skipped,
+    matching how top_k_unique orders zero-score ties.
+    """
+    need = k - len(selected)
+    if need <= 0:
+        return selected
+    taken = groups[selected]
+    chunk = max(4 * k, 256)
+    extra = []
+    for start in range(0, n_rows, chunk):
+        rows = np.arange(start, min(start + chunk, n_rows))
+        if exclude is not None:
+            rows = rows[~exclude[rows]]
+        rows = rows[~np.isin(rows, selected) & ~np.isin(groups[rows], taken)]
+        _, first = np.unique(groups[rows], return_index=True)
+        rows = rows[np.sort(first)][:need]
+        extra.append(rows)
+        taken = np.concatenate([taken, groups[rows]])
+        need -= len(rows)
+        if need <= 0:
+            break
+    return np.concatenate([selected] + extra)
+
+
+
+def batch_top_k_unique(scores, k, groups):
+    """top_k_unique over every row of a dense (queries x rows) score matrix.
+
+    Each query's candidates are its positive scores at or above its 4k-th
+    largest score, found with one partition over the whole batch; one sort
+    over all candidates then orders them by query, score and position, and
+    the first row of each group per query is kept. Returns (rows, scores)
+    per query, best first, possibly shorter than k if the query has fewer
+    positive scores. A query whose candidates hold fewer than k groups
+    although lower scores exist gets None and must be ranked on its own.
+    """
+    n_queries, n_rows = scores.shape
+    pool = min(n_rows, 4 * k)
+    if pool == 0:
+        return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in range(n_queries)]
+    thresholds = np.partition(scores, n_rows - pool, axis=1)[:, n_rows - pool]
+    thresholds = np.maximum(thresholds, np.nextafter(0, 1))
+    query_ids, rows = np.nonzero(scores >= thresholds[:, None])
+    # Queries with positive scores below their threshold may need a deeper pool
+    truncated = np.count_nonzero(scores > 0, axis=1) > np.bincount(query_ids, minlength=n_queries)
+    values = scores[query_ids, rows]
+    order = np.lexsort((rows, -values, query_ids))
+    query_ids, rows, values = query_ids[order], rows[order], values[order]
+
+    # First occurrence of each (query, group) pair in ranked order
+    n_groups = int(groups.max()) + 1 if len(groups) else 1
+    _, first = np.unique(query_ids.astype(np.int64) * n_groups + groups[rows], return_index=True)
+    first.sort()
+    query_ids, rows, values = query_ids[first], rows[first], values[first]
+
+    bounds = np.searchsorted(query_ids, np.arange(n_queries + 1))
+    results = []
+    for i in range(n_queries):
+        start, end = bounds[i], min(bounds[i + 1], bounds[i] + k)
+        if end - start < k and truncated[i]:
+            results.append(None)
+        else:
+            results.append((rows[start:end], values[start:end]))
+    return results
+
+
+def grouped_top_k(scores, k, partitions, groups=None):
+    """Best k positions within each partition (e.g. each domain) from one sort.
+
+    partitions holds a non-negative partition id per position. With groups,
+    at most one position (the best) is kept per (partition, group) pair.
+    Returns {partition: positions best first} for every partition present;
+    ties are broken by position as in top_k.
+    """
+    scores = np.asarray(scores)
+    order = np.lexsort((np.arange(len(scores)), -scores, partitions))
+    if groups is not None and len(order):
+        keys = partitions[order].astype(np.int64) * (int(groups.max()) + 1) + groups[order]
+        _, first = np.unique(keys, return_index=True)
+        order = order[np.sort(first)]
+    parts = partitions[order]
+    starts = np.flatnonzero(np.diff(parts, prepend=-1))
+    ends = np.append(starts[1:], len(order))
+    return {int(parts[start]): order[start:min(end, start + k)] for start, end in zip(starts, ends)}
@@ -0,0 +1,364 @@
+"""
+Headless HTTP service around the recommender.
+
+A small HTTP/1.1 server on asyncio streams, with no dependencies beyond
+the recommender itself:
+
+  GET  /health            liveness plus batching counters
+  GET  /metrics           stage latencies and counters, Prometheus text format
+  GET  /debug/metrics     the same with percentiles, cache and session stats, as JSON
+  POST /recommend         {"query": "...", "k": 3}
+  POST /recommend/batch   {"queries": ["...", ...], "k": 3}
+
+Concurrent /recommend requests go through a MicroBatcher, which collects
+them for up to max_wait_ms (or until max_batch_size) and scores them with
+one recommend_batch call, grouped per domain by the recommender. Scoring
+runs on a single worker thread so the event loop keeps accepting requests
+while a batch is being ranked.
+
+The recommender is served through a SnapshotManager: every batch is ranked
+and rendered from one pinned snapshot, and when the catalog CSVs change a
+new snapshot is built in the background and swapped in without a restart.
+
+    python recommendation_service.py --port 8000 --max-batch-size 64 --max-wait-ms 5 --reload-interval 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from snapshots import DEFAULT_POLL_INTERVAL, SnapshotManager
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_K = 3
+MAX_K = 50
+MAX_BODY_BYTES = 1 << 20
+
+# Stage name under which each route's request latency is recorded
+ROUTE_STAGES = {'/health': 'http_health', '/metrics': 'http_metrics', '/debug/metrics': 'http_debug_metrics',
+                '/recommend': 'http_recommend', '/recommend/batch': 'http_recommend_batch'}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_value(value):
+    """Plain JSON value for a catalog cell (numpy scalars, NaN, categoricals)"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        # float32 catalog columns would otherwise serialize with round-off noise
+        return round(value, 6) if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def records(recs):
+    """Recommendation rows as JSON-ready dicts"""
+    return [{column: _json_value(value) for column, value in row.items()} for row in recs.to_dict('records')]
+
+
+class MicroBatcher:
+    """Collects concurrent requests and runs them through one batch call.
+
+    handler receives a list of items and returns one result per item; it is
+    run on executor. A batch is dispatched when max_batch_size items are
+    waiting or max_wait_ms after its first item arrived, whichever is first.
+    """
+    def __init__(self, handler, executor, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 metrics=None):
+        self.handler = handler
+        self.executor = executor
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _, _ in batch]
+            if self.metrics is not None and self.metrics.enabled:
+                dispatched = time.perf_counter()
+                for _, _, queued in batch:
+                    self.metrics.observe('queue_wait', dispatched - queued)
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+            except Exception as e:  # fail the whole batch, keep serving
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class RecommendationService:
+    """HTTP endpoints over an AdvancedRecommender, or over the snapshots of a SnapshotManager"""
+    def __init__(self, recommender, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 metrics=True):
+        if not isinstance(recommender, SnapshotManager):
+            recommender = SnapshotManager(recommender=recommender)
+        self.snapshots = recommender
+        # Snapshots built by the manager share the first one's Metrics
+        self.metrics = recommender.current.metrics
+        self.metrics.enable(metrics)
+        # One scoring thread: the recommender's caches are not shared across threads
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommend')
+        self.batcher = MicroBatcher(self._recommend_items, self.executor, max_batch_size, max_wait_ms, self.metrics)
+        self.started = time.time()
+
+    def _recommend_items(self, items):
+        """Batch handler: items are (query, k) pairs, ranked from one snapshot"""
+        with self.snapshots.acquire() as recommender:
+            return self._rank_items(recommender, items)
+
+    @staticmethod
+    def _rank_items(recommender, items):
+        # One rank_batch call per k
+        ranked = [None] * len(items)
+        by_k = {}
+        for i, (query, k) in enumerate(items):
+            by_k.setdefault(k, []).append(i)
+        for k, positions in by_k.items():
+            for i, result in zip(positions, recommender.rank_batch([items[i][0] for i in positions], k)):
+                ranked[i] = result
+
+        # Rows are fetched and converted once per domain for the whole batch
+        results = [{'query': query, 'domain': None, 'recommendations': []} for query, _ in items]
+        by_domain = {}
+        for i, (domain, _, _) in enumerate(ranked):
+            if domain is not None:
+                by_domain.setdefault(domain, []).append(i)
+        for domain, positions in by_domain.items():
+            recs, bounds = recommender.take_ranked(domain, [ranked[i][1:] for i in positions])
+            rows = records(recs)
+            for i, start, end in zip(positions, bounds[:-1], bounds[1:]):
+                results[i].update(domain=domain, recommendations=rows[start:end])
+        return results
+
+    def _batch_response(self, queries, k):
+        return {'results': self._recommend_items([(query, k) for query in queries])}
+
+    @staticmethod
+    def _parse_k(payload):
+        k = payload.get('k', DEFAULT_K)
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= MAX_K:
+            raise HTTPError(400, f"k must be an integer between 1 and {MAX_K}")
+        return k
+
+    async def handle(self, method, path, body):
+        """Route one request; returns (status, payload), where a str payload is sent as plain text"""
+        with self.metrics.stage(ROUTE_STAGES.get(path, 'http_unrouted')):
+            return await self._route(method, path, body)
+
+    async def _route(self, method, path, body):
+        if path in ('/metrics', '/debug/metrics'):
+            if method != 'GET':
+                raise HTTPError(405, 'use GET')
+            with self.snapshots.acquire() as recommender:
+                if path == '/metrics':
+                    return 200, recommender.metrics_text()
+                snapshot = recommender.metrics_snapshot()
+            snapshot['snapshots'] = self.snapshots.stats()
+            return 200, snapshot
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, 'use GET')
+            return 200, {'status': 'ok', 'uptime_s': round(time.time() - self.started, 3),
+                         'queued': self.batcher.queue.qsize(), 'batches': self.batcher.batches,
+                         'batched_requests': self.batcher.items, 'snapshot': self.snapshots.version}
+        if path not in ROUTE_STAGES:
+            raise HTTPError(404, f"no route for {path}")
+        if method != 'POST':
+            raise HTTPError(405, 'use POST')
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, 'body must be JSON')
+        if not isinstance(payload, dict):
+            raise HTTPError(400, 'body must be a JSON object')
+        k = self._parse_k(payload)
+
+        if path == '/recommend':
+            query = payload.get('query')
+            if not isinstance(query, str) or not query.strip():
+                raise HTTPError(400, 'query must be a non-empty string')
+            return 200, await self.batcher.submit((query, k))
+
+        queries = payload.get('queries')
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            raise HTTPError(400, 'queries must be a list of strings')
+        loop = asyncio.get_running_loop()
+        return 200, await loop.run_in_executor(self.executor, self._batch_response, queries, k)
+
+    async def _read_request(self, reader):
+        """Parse one request; returns (method, path, version, headers, body) or None at end of stream"""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'malformed request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, 'request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target.split('?', 1)[0], version, headers, body
+
+    async def serve_connection(self, reader, writer):
+        """Serve requests on one connection, keeping it alive unless asked to close"""
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, version, headers, body = request
+                    connection = headers.get('connection', '').lower()
+                    if version == 'HTTP/1.0':
+                        keep_alive = connection == 'keep-alive'
+                    else:
+                        keep_alive = connection != 'close'
+                    status, payload = await self.handle(method, path, body)
+                except HTTPError as e:
+                    status, payload, keep_alive = e.status, {'error': str(e)}, False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, payload, keep_alive = 500, {'error': f"{type(e).__name__}: {e}"}, False
+
+                if isinstance(payload, str):
+                    data, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000, ready=None):
+        """Run until cancelled; ready, if given, is an asyncio.Event set once listening"""
+        self.batcher.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        try:
+            if ready is not None:
+                ready.set()
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+            self.snapshots.stop()
+
+
+def load_recommender(data_path=None):
+    """Headless recommender over the local catalogs, reusing the persisted index"""
+    from catalog_store import DATA_DIR
+    from recommender_core import OptimizedMultiDomainRecommendationSystem
+    system = OptimizedMultiDomainRecommendationSystem(data_path=data_path or DATA_DIR)
+    if not system.load_preprocessed_data():
+        raise SystemExit(f"could not load the catalogs from {system.data_path}")
+    return system.recommender
+
+
+def load_snapshots(data_path=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """SnapshotManager over the local catalogs, watching them for changes when poll_interval is set"""
+    from catalog_store import DATA_DIR
+    from recommender_core import OptimizedMultiDomainRecommendationSystem
+    system = OptimizedMultiDomainRecommendationSystem(data_path=data_path or DATA_DIR)
+    snapshots = system.snapshots(poll_interval)
+    if snapshots.current is None:
+        raise SystemExit(f"could not load the catalogs from {system.data_path}")
+    snapshots.start()
+    return snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data-path', default=None, help='directory holding the domain CSVs')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--no-metrics', action='store_true', help='disable per-stage latency metrics')
+    parser.add_argument('--reload-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='seconds between checks for changed catalog CSVs, 0 to never reload')
+    args = parser.parse_args()
+
+    service = RecommendationService(load_snapshots(args.data_path, args.reload_interval), args.max_batch_size,
+                                    args.max_wait_ms, metrics=not args.no_metrics)
+    print(f"serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
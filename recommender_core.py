@@ -0,0 +1,1509 @@
+"""
+Recommendation engine: domain detection, spelling correction, query
+enhancement and TF-IDF retrieval over the five domain catalogs.
+
+This module has no UI and no import-time side effects, so workers, batch
+jobs and tests can use it without Streamlit. pandas, numpy, scikit-learn
+and the index modules are imported on first use, which keeps
+`import recommender_core` cheap; the Streamlit front end lives in
+recommendation_app.py.
+"""
+
+import importlib
+import os
+import re
+from collections import namedtuple
+
+from metrics import Metrics
+from query_cache import QueryCache, normalize_query
+from query_matchers import DomainKeywordScorer, EntityMatcher, tokenize
+
+
+class _LazyModule:
+    """Module proxy that imports the module on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+pd = _LazyModule('pandas')
+np = _LazyModule('numpy')
+
+
+# Domains in the order their catalogs are passed to AdvancedRecommender
+DOMAINS = ('movies', 'books', 'food', 'music', 'tv_shows')
+
+# TF-IDF settings shared by training and the persisted index fingerprint
+TFIDF_PARAMS = {'max_features': 2000, 'stop_words': 'english', 'ngram_range': (1, 3)}
+
+# Queries scored per sparse matrix product in recommend_batch
+BATCH_SIZE = 256
+
+# Retrieval per domain: exact TF-IDF cosine over postings, dense LSA vectors
+# searched through an approximate nearest-neighbour index, or TF-IDF over
+# the rows of the clusters nearest the query (*_processed.csv clusters)
+RETRIEVAL_MODES = ('tfidf', 'lsa', 'cluster')
+
+# TF-IDF features per domain: a fitted vocabulary of the TFIDF_PARAMS
+# max_features most frequent n-grams, or every n-gram hashed into a fixed
+# number of buckets (hashed_features.py)
+FEATURE_MODES = ('vocabulary', 'hashing')
+
+def create_sample_data():
+    """Create sample data for demonstration if CSV files are not available"""
+    # Sample movies data
+    movies_data = {
+        'title': ['The Shawshank Redemption', 'The Godfather', 'The Dark Knight', 
+                 'Pulp Fiction', 'Forrest Gump', 'Inception', 'The Matrix'],
+        'genre': ['Drama', 'Crime', 'Action', 'Crime', 'Drama', 'Sci-Fi', 'Action'],
+        'mood': ['Inspiring', 'Intense', 'Thrilling', 'Edgy', 'Heartwarming', 'Mind-bending', 'Exciting'],
+        'keywords': ['prison hope redemption', 'mafia family power', 'superhero villain chaos',
+                    'crime nonlinear storytelling', 'life journey love', 'dreams reality layers',
+                    'simulation action philosophy'],
+        'rating': [9.3, 9.2, 9.0, 8.9, 8.8, 8.8, 8.7],
+        'description': [
+            'Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.',
+            'The aging patriarch of an organized crime dynasty transfers control of his clandestine empire to his reluctant son.',
+            'When the menace known as the Joker wreaks havoc and chaos on the people of Gotham, Batman must accept one of the greatest psychological and physical tests of his ability to fight injustice.',
+            'The lives of two mob hitmen, a boxer, a gangster and his wife, and a pair of diner bandits intertwine in four tales of violence and redemption.',
+            'The presidencies of Kennedy and Johnson, the events of Vietnam, Watergate, and other historical events unfold through the perspective of an Alabama man with an IQ of 75.',
+            'A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a C.E.O.',
+            'A computer hacker learns from mysterious rebels about the true nature of his reality and his role in the war against its controllers.'
+        ]
+    }
+    
+    # Sample books data
+    books_data = {
+        'title': ['To Kill a Mockingbird', '1984', 'Pride and Prejudice', 
+                 'The Great Gatsby', 'The Hobbit', 'The Catcher in the Rye'],
+        'author': ['Harper Lee', 'George Orwell', 'Jane Austen', 
+                  'F. Scott Fitzgerald', 'J.R.R. Tolkien', 'J.D. Salinger'],
+        'genre': ['Fiction', 'Dystopian', 'Romance', 'Fiction', 'Fantasy', 'Fiction'],
+        'mood': ['Thought-provoking', 'Dark', 'Romantic', 'Tragic', 'Adventurous', 'Coming-of-age'],
+        'keywords': ['racism justice childhood', 'totalitarianism surveillance rebellion', 
+                    'love class society', 'american dream jazz age', 'quest fantasy adventure',
+                    'teenage angst identity'],
+        'average_rating': [4.7, 4.6, 4.5, 4.3, 4.8, 4.2],
+        'description': [
+            'The story of young Scout Finch and her father, a lawyer who defends a black man accused of raping a white woman in the Depression-era South.',
+            'A dystopian social science fiction novel that examines the consequences of totalitarianism, mass surveillance, and repressive regimentation.',
+            'A romantic novel of manners that depicts the emotional development of protagonist Elizabeth Bennet.',
+            'A story of Jay Gatsby, a self-made millionaire, and his pursuit of Daisy Buchanan, a wealthy young woman whom he loved in his youth.',
+            'A fantasy novel about the adventures of hobbit Bilbo Baggins, who is hired as a burglar by a group of dwarves on a quest to reclaim their mountain home from a dragon.',
+            'A story about Holden Caulfield and his experiences in New York City after being expelled from prep school.'
+        ]
+    }
+    
+    # Sample food data
+    food_data = {
+        'name': ['Spaghetti Carbonara', 'Chicken Tikka Masala', 'Vegetable Stir Fry', 
+                'Chocolate Chip Cookies', 'Avocado Toast', 'Greek Salad'],
+        'cuisine_type': ['Italian', 'Indian', 'Asian', 'American', 'International', 'Greek'],
+        'mood': ['Comforting', 'Spicy', 'Healthy', 'Sweet', 'Fresh', 'Refreshing'],
+        'keywords': ['pasta bacon egg cheese', 'chicken creamy tomato spicy', 'vegetables quick healthy',
+                    'chocolate sweet baked', 'avocado bread simple', 'cucumber tomato feta'],
+        'rating': [4.8, 4.5, 4.2, 4.7, 4.0, 4.3],
+        'ingredients': ['Spaghetti, eggs, cheese, pancetta, black pepper', 
+                       'Chicken, yogurt, spices, tomato sauce, cream',
+                       'Mixed vegetables, soy sauce, garlic, ginger, oil',
+                       'Flour, butter, sugar, chocolate chips, eggs',
+                       'Bread, avocado, salt, pepper, olive oil',
+                       'Cucumber, tomato, red onion, feta cheese, olives, olive oil'],
+        'description': [
+            'A classic Italian pasta dish with a creamy egg-based sauce, pancetta, and cheese.',
+            'A popular Indian dish featuring grilled chicken in a spiced tomato and cream sauce.',
+            'A quick and healthy dish with fresh vegetables stir-fried with Asian flavors.',
+            'Classic homemade cookies with chunks of chocolate throughout.',
+            'Simple yet delicious toast topped with mashed avocado and seasonings.',
+            'A refreshing salad with Mediterranean ingredients and a tangy dressing.'
+        ]
+    }
+    
+    # Sample music data
+    music_data = {
+        'title': ['Bohemian Rhapsody', 'Hotel California', 'Blinding Lights', 
+                 'Shape of You', 'Sweet Child O\' Mine', 'Billie Jean'],
+        'artist': ['Queen', 'Eagles', 'The Weeknd', 
+                  'Ed Sheeran', 'Guns N\' Roses', 'Michael Jackson'],
+        'genre': ['Rock', 'Rock', 'Pop', 'Pop', 'Rock', 'Pop'],
+        'mood': ['Epic', 'Mysterious', 'Energetic', 'Catchy', 'Nostalgic', 'Iconic'],
+        'keywords': ['opera rock epic', 'california hotel mystery', 'synthwave retro upbeat',
+                    'pop catchy dance', 'rock guitar riff nostalgic', 'pop iconic dance'],
+        'lyrics': [
+            'Is this the real life? Is this just fantasy? Caught in a landslide...',
+            'On a dark desert highway, cool wind in my hair...',
+            'I been tryna call, I been on my own for long enough...',
+            'The club isn\'t the best place to find a lover...',
+            'She\'s got a smile that it seems to me, reminds me of childhood memories...',
+            'She was more like a beauty queen from a movie scene...'
+        ]
+    }
+    
+    # Sample TV shows data
+    tv_shows_data = {
+        'title': ['Breaking Bad', 'Game of Thrones', 'Friends', 
+                 'Stranger Things', 'The Office', 'The Crown'],
+        'genre': ['Drama', 'Fantasy', 'Comedy', 'Sci-Fi', 'Comedy', 'Drama'],
+        'mood': ['Intense', 'Epic', 'Funny', 'Nostalgic', 'Quirky', 'Regal'],
+        'keywords': ['chemistry crime transformation', 'fantasy politics dragons', 'friendship comedy relationships',
+                    '80s supernatural mystery', 'workplace mockumentary comedy', 'royalty history drama'],
+        'rating': [9.5, 9.2, 8.9, 8.7, 8.9, 8.6],
+        'description': [
+            'A high school chemistry teacher diagnosed with cancer turns to manufacturing and selling methamphetamine to secure his family\'s future.',
+            'Nine noble families fight for control over the lands of Westeros, while an ancient enemy returns after being dormant for millennia.',
+            'Follows the personal and professional lives of six twenty to thirty-something-year-old friends living in Manhattan.',
+            'When a young boy vanishes, a small town uncovers a mystery involving secret experiments, terrifying supernatural forces and one strange little girl.',
+            'A mockumentary on a group of typical office workers, where the workday consists of ego clashes, inappropriate behavior, and tedium.',
+            'Follows the political rivalries and romance of Queen Elizabeth II\'s reign and the events that shaped the second half of the 20th century.'
+        ]
+    }
+    
+    return (
+        pd.DataFrame(movies_data),
+        pd.DataFrame(books_data),
+        pd.DataFrame(food_data),
+        pd.DataFrame(music_data),
+        pd.DataFrame(tv_shows_data)
+    )
+
+# Single word domain mapping
+SINGLE_WORD_DOMAINS = {
+    'movies': ['movie', 'film', 'cinema', 'romcom', 'thriller', 'comedy', 'drama', 'action'],
+    'tv_shows': ['tv', 'show', 'series', 'sitcom', 'kdrama'],
+    'music': ['music', 'song', 'track', 'album', 'jazz', 'rock', 'pop'],
+    'books': ['book', 'novel', 'read', 'fiction', 'fantasy', 'romance'],
+    'food': ['food', 'recipe', 'dish', 'cooking', 'meal', 'pasta', 'pizza']
+}
+
+# Comprehensive domain mapping with extensive keyword matching
+DOMAIN_KEYWORDS = {
+    'movies': [
+        # General movie terms
+        'movie', 'film', 'cinema', 'watch', 'thriller', 'funny', 'mysterious', 'romance', 'comedy', 'drama',
+        'animated', 'holiday', 'courtroom', 'family', 'sports', 'sci-fi', 'tearjerker', 'classic',
+        'time-travel', 'bollywood', 'realistic', 'iconic', 'cinephile', 'romcom','rom-com', 'notting hill',
+        'inception', 'dark knight', 'black-and-white', 'slow-burn', 'feel-good', 'underrated',
+        'powerful', 'inspirational', 'character depth', 'rewatch', 'award-winning', 'epic',
+        'oscar', 'director', 'actor', 'actress', 'screenplay', 'plot', 'scene', 'sequel', 'prequel',
+        # Specific genres and themes
+        'action', 'adventure', 'fantasy', 'horror', 'mystery', 'suspense', 'crime', 'documentary',
+        'biography', 'historical', 'war', 'western', 'musical', 'superhero', 'independent', 'foreign',
+        'art house', 'blockbuster', 'cult classic', 'love story', 'romantic', 'plot', 'storyline',
+        'great plots', 'love movies', 'funny', 'mysterious','action movies'
+    ],
+    'tv_shows': [
+        'tv show', 'series', 'sitcom', 'k-drama', 'episode', 'season', 'binge', 'netflix', 'hulu',
+        'hbo', 'streaming', 'mini-series', 'reality show', 'detective', 'medical drama', 'gilmore girls',
+        'friends', 'game of thrones', 'breaking bad', 'sherlock', 'binge-worthy', 'twists',
+        'character development', 'family-friendly', 'heartbreak', 'fantasy', 'limited series',
+        'female leads', 'crime drama', 'animated series', 'wholesome', 'detective', 'medical',
+        'high school', 'hidden gems', 'reality', 'tv', 'television', 'stream', 'watch'
+    ],
+    'music': [
+        'music', 'song', 'track', 'album', 'jazz', 'rock', 'pop', 'lo-fi', 'lyrics', 'acoustic',
+        'indie', 'classical', 'electronic', 'soundtrack', 'k-pop', 'meditation', 'piano', 'duet',
+        'taylor swift', 'bts', 'cozy', 'iconic', 'upbeat', 'calm', 'powerful', 'studying', 'working out',
+        'rainy days', 'underrated', 'golden classics', 'modern', 'electronic', 'classical', 'bollywood',
+        'meditation', 'dance', 'live performances', 'soothing', 'nostalgic', 'road trip', 'mood lift',
+        'artist', 'band', 'singer', 'composer', 'concert', 'playlist', 'genre', 'beat', 'rhythm', 'melody'
+    ],
+    'books': [
+        'book', 'novel', 'read', 'fantasy', 'romance', 'historical', 'self-improvement', 'thriller',
+        'biography', 'dystopian', 'short story', 'ya novel', 'classic', 'horror', 'philosophical',
+        'gone girl', 'harry potter', 'hunger games', 'plot twist', 'character arcs', 'rich detail',
+        'must-read', 'poetic', 'non-fiction', 'motivational', 'emotional depth', 'literary classics',
+        'scary', 'female protagonists', 'light-hearted', 'philosophical', 'epic', 'trilogy', 'saga',
+        'cozy', 'winter read', 'author', 'funny', 'mysterious','chapter', 'page', 'story', 'narrative', 'fiction', 'nonfiction'
+    ],
+    'food': [
+        # General food terms
+        'food', 'recipe', 'dish', 'cuisine', 'cooking', 'cook', 'meal', 'eat', 'dining', 'dinner',
+        'lunch', 'breakfast', 'supper', 'snack', 'appetizer', 'main course', 'side dish', 'course',
+
+        # Food types and categories
+        'vegetarian', 'vegan', 'gluten-free', 'low-carb', 'keto', 'paleo', 'healthy', 'comfort food',
+        'indulgent', 'gourmet', 'homemade', 'world cuisine', 'street food', 'iconic food', 'global cuisine',
+
+        # Specific foods
+        'taco', 'burger', 'pizza', 'noodles', 'sushi', 'pasta', 'rice', 'chicken', 'beef', 'pork',
+        'seafood', 'fish', 'vegetable', 'fruit', 'salad', 'soup', 'stew', 'curry', 'sauce', 'dressing',
+        'marinade', 'spread', 'dip', 
+
+        # Cooking methods
+        'bake', 'grill', 'fry', 'steam', 'roast', 'boil', 'simmer', 'saute', 'broil', 'barbecue', 'bbq',
+
+        # Desserts and sweets
+        'dessert', 'sweet', 'cake', 'pie', 'pastry', 'cookie', 'biscuit', 'brownie', 'pudding', 'custard',
+        'ice cream', 'gelato', 'sorbet', 'chocolate', 'candy', 'confection', 'treat', 'bakery', 'baking',
+        'muffin', 'cupcake', 'cheesecake', 'tiramisu', 'creme brulee', 'souffle', 'tart', 'donut', 'doughnut',
+
+        # Drinks and beverages
+        'drink', 'beverage', 'cocktail', 'smoothie', 'juice', 'coffee', 'tea', 'milkshake', 'soda', 'lemonade',
+        'mocktail', 'shake', 'frappe', 'latte', 'cappuccino', 'espresso', 'brew', 'infusion', 'refresher',
+
+        # Ingredients
+        'egg', 'eggs', 'flour', 'sugar', 'butter', 'oil', 'spice', 'herb', 'garlic', 'onion', 'tomato',
+        'cheese', 'milk', 'cream', 'yogurt', 'bread', 'grain', 'nut', 'seed', 'bean', 'lentil',
+
+        # Cuisine types
+        'italian', 'mexican', 'chinese', 'indian', 'japanese', 'french', 'thai', 'mediterranean', 'american',
+        'fusion', 'spanish', 'greek', 'lebanese', 'vietnamese', 'korean', 'caribbean', 'brazilian',
+
+        # Meal contexts
+        'quick', 'easy', 'simple', 'fast', '30-minute', 'quick and easy', 'one-pot', 'one pan', 'sheet pan',
+        'meal prep', 'make ahead', 'freezer friendly', 'batch cooking', 'party', 'gathering', 'celebration',
+        'holiday', 'festive', 'special occasion', 'weeknight', 'weekend', 'brunch', 'picnic', 'potluck',
+
+        # Descriptive terms
+        'spicy', 'mild', 'savory', 'sweet', 'tangy', 'sour', 'bitter', 'umami', 'rich', 'light', 'fresh',
+        'crispy', 'crunchy', 'creamy', 'chewy', 'tender', 'juicy', 'flavorful', 'aromatic', 'hearty',
+        'refreshing', 'satisfying', 'comforting', 'wholesome', 'nutritious', 'decadent', 'elegant', 'rustic',
+
+        # Specific queries
+        'pasta recipes', 'pasta dish', 'pasta meal'
+    ]
+}
+
+# Common domain terms that misspelled query words are corrected towards
+SPELLING_TERMS = ['movie', 'movies', 'film', 'book', 'books', 'music', 'song',
+                  'food', 'recipe', 'tv', 'show', 'shows', 'romcom', 'romantic', 'comedy']
+
+# Catalog fields whose words are added to the spelling index when catalog_spelling is on
+SPELLING_VOCABULARY_COLUMNS = ['title', 'name', 'artist', 'author', 'director', 'genre']
+
+# Catalog fields holding people's names, matched as entities in queries
+ENTITY_COLUMNS = {
+    'music': ['artist'],
+    'movies': ['director', 'cast'],
+    'tv_shows': ['creator', 'director', 'cast'],
+    'books': ['author'],
+}
+
+# "songs like X", "tracks similar to X by Y": answered from audio features
+SIMILAR_TRACK_RE = re.compile(
+    r'\b(?:songs?|tracks?|music)\s+(?:like|similar to)\s+(?P<title>.+?)(?:\s+by\s+(?P<artist>.+?))?[\s?.!]*$'
+)
+
+# Words that may surround a name in a direct entity query ("Taylor Swift songs",
+# "Movies starring Brad Pitt"); anything else is ranked by text similarity
+DIRECT_QUERY_WORDS = frozenset([
+    'song', 'songs', 'track', 'tracks', 'music', 'album', 'albums', 'movie', 'movies', 'film', 'films',
+    'book', 'books', 'novel', 'novels', 'show', 'shows', 'series', 'tv', 'by', 'with', 'starring',
+    'featuring', 'directed', 'written', 'from', 'the', 'of', 'and', 's', 'some', 'any', 'all', 'me',
+    'recommend', 'suggest', 'find', 'give', 'list',
+])
+
+# Column that orders the rows of a direct entity lookup, most popular first
+POPULARITY_COLUMNS = {'movies': 'votes', 'books': 'ratings_count', 'food': 'review_count', 'music': 'popularity',
+                      'tv_shows': 'votes'}
+
+# What plan_query derives from a query: the domain, the enhanced query text,
+# attribute filters, and whether the query only names entities
+QueryPlan = namedtuple('QueryPlan', 'domain query filters direct')
+
+# Item id column of each catalog, which cross_domain_features.csv refers to
+ID_COLUMNS = {'movies': 'movie_id', 'books': 'book_id', 'food': 'recipe_id', 'music': 'track_id',
+              'tv_shows': 'show_id'}
+
+# Catalog fields joined, in order, into the text each domain's TF-IDF model indexes
+COMBINED_TEXT_COLUMNS = {
+    'movies': ['title', 'genre', 'mood', 'keywords', 'director', 'cast', 'setting', 'time_period'],
+    'books': ['title', 'genre', 'mood', 'keywords', 'author', 'setting', 'time_period'],
+    # Food - Enhanced with more features
+    'food': ['name', 'cuisine_type', 'mood', 'keywords', 'ingredients', 'description', 'meal_type', 'dish_type',
+             'tags', 'category'],
+    'music': ['title', 'artist', 'genre', 'mood', 'keywords', 'album', 'year', 'instrumentation'],
+    'tv_shows': ['title', 'genre', 'mood', 'keywords', 'creator', 'setting', 'time_period'],
+}
+
+def _text_column(df, column):
+    """String view of a catalog column for concatenation, '' if the column is absent"""
+    if column not in df.columns:
+        return ''
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        return df[column].astype('string')
+    return df[column]
+
+def _combined_text(df, columns):
+    """The columns joined with spaces; a row with any missing value gets ''"""
+    text = _text_column(df, columns[0])
+    for column in columns[1:]:
+        text = text + ' ' + _text_column(df, column)
+    return text.fillna('')
+
+def _display_number(value):
+    """Render a catalog number without float32 round-off noise"""
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 6)
+    return value
+
+class AdvancedRecommender:
+    def __init__(self, movies_df, books_df, food_df, music_df, tv_shows_df, index_dir=None, fingerprint=None,
+                 catalog=None, catalog_spelling=False, sessions=None, metrics=None, retrieval=None,
+                 cross_domain_path=None, cluster_path=None, features=None, hash_buckets=None):
+        # Declared catalog dtypes (categoricals, compact ints, float32) for frames
+        # parsed without them; CatalogCache frames already have them
+        from catalog_store import compact_frame
+        self.movies_df = compact_frame(movies_df, 'movies')
+        self.books_df = compact_frame(books_df, 'books')
+        self.food_df = compact_frame(food_df, 'food')
+        self.music_df = compact_frame(music_df, 'music')
+        self.tv_shows_df = compact_frame(tv_shows_df, 'tv_shows')
+        
+        # Per-stage latency histograms and fallback counters; no-ops unless enabled
+        self.metrics = metrics if metrics is not None else Metrics()
+        
+        # Columnar catalog that serves display-only columns for rendered rows;
+        # None when the frames already carry every column
+        self.catalog = catalog
+        
+        # Token trie over artists, directors, cast, authors and creators, used
+        # for artist filtering and entity lookups
+        self.entity_matcher = EntityMatcher.from_frames(self.domain_frames(), ENTITY_COLUMNS,
+                                                        order_by=POPULARITY_COLUMNS)
+        
+        # For tracking recommendations to avoid duplicates: per-session bitmaps
+        # of seen titles, bounded in sessions and bytes
+        if sessions is None:
+            from session_state import SessionStore
+            sessions = SessionStore()
+        self.sessions = sessions
+        # Per-domain (codes, unique titles) used to turn seen-title bitmaps into a row mask
+        self.title_codes = {}
+        
+        # Query plans and ranked candidates for repeated queries; cleared
+        # whenever the postings are rebuilt
+        self.query_cache = QueryCache()
+        
+        # Retrieval mode per domain, one mode name for all domains or a dict;
+        # domains not listed use exact TF-IDF
+        if isinstance(retrieval, str):
+            retrieval = dict.fromkeys(DOMAINS, retrieval)
+        self.retrieval = dict(retrieval or {})
+        for mode in self.retrieval.values():
+            if mode not in RETRIEVAL_MODES:
+                raise ValueError(f"unknown retrieval mode {mode!r}, expected one of {RETRIEVAL_MODES}")
+        # Feature mode per domain, given like retrieval; domains not listed use
+        # a vocabulary. hash_buckets defaults to DEFAULT_HASH_BUCKETS
+        if isinstance(features, str):
+            features = dict.fromkeys(DOMAINS, features)
+        self.features = dict(features or {})
+        for mode in self.features.values():
+            if mode not in FEATURE_MODES:
+                raise ValueError(f"unknown feature mode {mode!r}, expected one of {FEATURE_MODES}")
+        self.hash_buckets = hash_buckets
+        
+        # Shared index over cross_domain_features.csv for mixed-domain queries,
+        # built on first use
+        self.cross_domain_path = cross_domain_path
+        self.cross_domain = None
+        # Audio-feature k-NN index over the music catalog, built on first use
+        self.audio = None
+        # Per-domain sorted indexes and value postings for attribute filters, built on first use
+        self.attribute_indexes = {}
+        # Directory of the *_processed.csv files whose clusters 'cluster' retrieval uses
+        self.cluster_path = cluster_path
+        # Per-domain tombstone masks over rows, and item id -> live row maps,
+        # created by the first upsert or delete in a domain
+        self.deleted = {}
+        self.item_rows = {}
+        
+        # Reuse persisted TF-IDF artifacts when they match the catalog, otherwise
+        # prepare data, precompute TF-IDF models and persist them for next start
+        self.index_dir = index_dir
+        self.index_fingerprint = fingerprint
+        if index_dir and self.index_fingerprint is None:
+            from index_artifacts import fingerprint_frames
+            self.index_fingerprint = fingerprint_frames(self.domain_frames(), self._vectorizer_settings())
+        if not self.load_index():
+            self.train_tfidf_models(self.prepare_domain_data())
+            self.build_postings()
+            self.save_index()
+        
+        # Domain detection tables compiled once: a word -> domain lookup (first
+        # domain listing the word wins) and a keyword automaton over all domains
+        self.single_word_domain = {}
+        for domain, words in SINGLE_WORD_DOMAINS.items():
+            for word in words:
+                self.single_word_domain.setdefault(word, domain)
+        self.domain_keyword_scorer = DomainKeywordScorer(DOMAIN_KEYWORDS)
+        
+        # Common misspellings mapping
+        self.common_misspellings = {
+            'romcom': 'romcom',
+            'romcoms': 'romcom',
+            'romcom mobies': 'romcom movies',
+            'romcom moveis': 'romcom movies',
+            'romcom moives': 'romcom movies',
+            'mobies': 'movies',
+            'moveis': 'movies',
+            'moives': 'movies',
+            'muvi': 'movie',
+            'muvies': 'movies',
+            'bok': 'book',
+            'boks': 'books',
+            'recepie': 'recipe',
+            'recipie': 'recipe',
+            'reciepe': 'recipe',
+            'musik': 'music',
+            'muzik': 'music',
+            'musick': 'music',
+            'tvshow': 'tv show',
+            'tvshows': 'tv shows',
+            'television': 'tv'
+        }
+        from spelling import SpellingCorrector
+        self.spelling = SpellingCorrector(
+            SPELLING_TERMS, self.common_misspellings,
+            catalog_terms=self._catalog_vocabulary() if catalog_spelling else None
+        )
+    
+    def domain_frames(self):
+        """Map each domain name to its DataFrame"""
+        return {domain: getattr(self, f"{domain}_df") for domain in DOMAINS}
+    
+    def memory_report(self):
+        """Bytes held by the catalog, models and indexes, by domain and component.
+        
+        Returns {'resident': {domain or 'shared': {component: bytes}},
+        'mapped': {domain: {component: bytes}}, 'resident_total': bytes,
+        'mapped_total': bytes}. A domain's components are its frame, display
+        columns, vocabulary (vectorizer terms and IDF, or bucket counts), TF-IDF
+        matrix, postings, retrieval (other indexes it is scored with), filters
+        (attribute indexes), lookups (title codes, item ids, tombstones) and
+        seen (session bitmaps). 'mapped' holds the bytes of memory-mapped
+        artifact and display files, which are shared between processes and not
+        counted as resident (see memory_sizing). Each object is counted once,
+        in the first component that reaches it.
+        """
+        from memory_sizing import MemorySizer
+        sizer = MemorySizer()
+        display = self.catalog.loaded_display_tables() if self.catalog is not None else {}
+        seen = self.sessions.domain_bytes()
+        resident, mapped = {}, {}
+        for domain, df in self.domain_frames().items():
+            components = {
+                'frame': [df],
+                'display': [display.get(domain)],
+                'vocabulary': [self.tfidf_vectorizers.get(domain)],
+                'matrix': [self.tfidf_matrices.get(domain)],
+                'postings': [self.postings.get(domain)],
+                'retrieval': [self.retrievers.get(domain), self.dense_indexes.get(domain),
+                              self.cluster_indexes.get(domain), self.audio if domain == 'music' else None],
+                'filters': [self.attribute_indexes.get(domain)],
+                'lookups': [self.title_codes.get(domain), self.item_rows.get(domain), self.deleted.get(domain)],
+            }
+            resident[domain], mapped[domain] = {}, {}
+            for component, objects in components.items():
+                resident[domain][component], mapped[domain][component] = sizer.size(*objects)
+            resident[domain]['seen'] = seen.get(domain, 0)
+        resident['shared'] = {
+            'entities': sizer.size(self.entity_matcher)[0],
+            'cross_domain': sizer.size(self.cross_domain)[0],
+            'query_cache': sizer.size(self.query_cache)[0],
+            'spelling': sizer.size(self.spelling)[0],
+            'domain_detection': sizer.size(self.single_word_domain, self.domain_keyword_scorer)[0],
+            'sessions': self.sessions.nbytes - sum(seen.values()),
+        }
+        mapped = {domain: {component: size for component, size in components.items() if size}
+                  for domain, components in mapped.items()}
+        return {
+            'resident': resident,
+            'mapped': {domain: components for domain, components in mapped.items() if components},
+            'resident_total': sum(sum(components.values()) for components in resident.values()),
+            'mapped_total': sum(sum(components.values()) for components in mapped.values()),
+        }
+        
+    def load_index(self):
+        """Map TF-IDF models and postings from persisted artifacts; False if unavailable"""
+        if not self.index_dir:
+            return False
+        from index_artifacts import load_index_artifacts
+        artifacts = load_index_artifacts(self.index_dir, self.index_fingerprint)
+        if artifacts is None:
+            return False
+        from hashed_features import HashedTfidfVectorizer
+        for domain, vectorizer in artifacts['vectorizers'].items():
+            # A fingerprint computed by the caller does not cover the feature modes
+            if isinstance(vectorizer, HashedTfidfVectorizer) != (self.features.get(domain) == 'hashing'):
+                return False
+        self.tfidf_vectorizers = artifacts['vectorizers']
+        self.tfidf_matrices = artifacts['matrices']
+        self.build_postings(artifacts['postings'])
+        return True
+    
+    def save_index(self):
+        """Persist TF-IDF models and postings so the next start can skip fitting"""
+        if not self.index_dir:
+            return
+        from index_artifacts import save_index_artifacts
+        try:
+            save_index_artifacts(
+                self.index_dir,
+                self.index_fingerprint,
+                TFIDF_PARAMS,
+                self.tfidf_vectorizers,
+                self.tfidf_matrices,
+                self.postings
+            )
+        except OSError:
+            # A read-only deployment still serves from the freshly trained models
+            pass
+    
+    def prepare_domain_data(self):
+        """Combined text features of each domain, to fit the TF-IDF models on.
+        
+        They are not kept on the frames: nothing after fitting reads them, and
+        upserts combine the text of their own rows.
+        """
+        return {domain: _combined_text(df, COMBINED_TEXT_COLUMNS[domain])
+                for domain, df in self.domain_frames().items()}
+    
+    def train_tfidf_models(self, texts=None):
+        """Train TF-IDF models for each domain on texts (domain -> combined text), by default prepare_domain_data()"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        if texts is None:
+            texts = self.prepare_domain_data()
+        self.tfidf_vectorizers = {}
+        self.tfidf_matrices = {}
+        
+        for domain in DOMAINS:
+            if self.features.get(domain) == 'hashing':
+                from hashed_features import DEFAULT_HASH_BUCKETS, HashedTfidfVectorizer
+                params = {key: value for key, value in TFIDF_PARAMS.items() if key != 'max_features'}
+                vectorizer = HashedTfidfVectorizer(self.hash_buckets or DEFAULT_HASH_BUCKETS, **params)
+            else:
+                vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            tfidf_matrix = vectorizer.fit_transform(texts[domain])
+            self.tfidf_vectorizers[domain] = vectorizer
+            self.tfidf_matrices[domain] = tfidf_matrix
+    
+    def _vectorizer_settings(self):
+        """TFIDF_PARAMS, plus the hashed domains and bucket count when there are any, for index fingerprints"""
+        hashed = sorted(domain for domain, mode in self.features.items() if mode == 'hashing')
+        if not hashed:
+            return TFIDF_PARAMS
+        from hashed_features import DEFAULT_HASH_BUCKETS
+        return dict(TFIDF_PARAMS, hashing=hashed, hash_buckets=self.hash_buckets or DEFAULT_HASH_BUCKETS)
+    
+    def _catalog_vocabulary(self):
+        """Words from titles, names and genres for catalog-aware spelling correction"""
+        words = set()
+        for df in self.domain_frames().values():
+            for column in SPELLING_VOCABULARY_COLUMNS:
+                if column in df.columns:
+                    for value in df[column].dropna().unique():
+                        words.update(w for w in str(value).lower().split() if len(w) > 2 and w.isalpha())
+        return sorted(words)
+    
+    def build_postings(self, postings=None):
+        """Build the per-domain inverted indexes, plus dense indexes for domains in 'lsa' mode.
+        
+        postings, when given, are indexes already built over the current
+        matrices (the persisted ones load_index maps) and are used as they are.
+        """
+        if postings is None:
+            from postings import PostingsIndex
+            postings = {domain: PostingsIndex(matrix) for domain, matrix in self.tfidf_matrices.items()}
+        self.postings = postings
+        self.dense_indexes = {}
+        self.cluster_indexes = {}
+        # The index each domain's queries are scored with
+        self.retrievers = {domain: self._segmented(domain, index) for domain, index in self.postings.items()}
+        for domain, mode in self.retrieval.items():
+            if domain in self.retrievers:
+                self.set_retrieval(domain, mode)
+        # Their row positions refer to the frames the postings were built from
+        self.cross_domain = None
+        self.audio = None
+        self.attribute_indexes = {}
+        self.query_cache.invalidate()
+    
+    def set_retrieval(self, domain, mode, **options):
+        """Score a domain with exact TF-IDF ('tfidf'), dense LSA vectors through an ANN index ('lsa')
+        or cluster-pruned TF-IDF ('cluster').
+        
+        options go to the index: DenseIndex arguments for 'lsa' (which rebuild
+        it), n_probe for 'cluster'.
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"unknown retrieval mode {mode!r}, expected one of {RETRIEVAL_MODES}")
+        if mode == 'lsa':
+            if domain not in self.dense_indexes or options:
+                from dense_index import DenseIndex
+                self.dense_indexes[domain] = DenseIndex(self.tfidf_matrices[domain], **options)
+            index = self.dense_indexes[domain]
+        elif mode == 'cluster':
+            if domain not in self.cluster_indexes:
+                if not self.cluster_path:
+                    raise ValueError("cluster retrieval needs cluster_path, the directory of *_processed.csv")
+                from cluster_index import ClusterPrunedIndex, read_cluster_labels
+                df = getattr(self, f"{domain}_df")
+                labels = read_cluster_labels(self.cluster_path, domain, ID_COLUMNS[domain], df[ID_COLUMNS[domain]])
+                self.cluster_indexes[domain] = ClusterPrunedIndex(self.tfidf_matrices[domain], labels)
+            if 'n_probe' in options:
+                self.cluster_indexes[domain].n_probe = options['n_probe']
+            index = self.cluster_indexes[domain]
+        else:
+            index = self.postings[domain]
+        self.retrievers[domain] = self._segmented(domain, index)
+        self.retrieval[domain] = mode
+        # Cached candidates were ranked by the previous index
+        self.query_cache.invalidate()
+    
+    def _segmented(self, domain, index):
+        """index, or after updates to the domain a SegmentedIndex adding the rows appended since it was
+        built and leaving out deleted rows"""
+        deleted = self.deleted.get(domain)
+        if deleted is None:
+            return index
+        from catalog_updates import SegmentedIndex
+        return SegmentedIndex(index, self.tfidf_matrices[domain][index.n_rows:], deleted)
+    
+    def upsert(self, domain, records):
+        """Add catalog items to a domain, replacing those whose id is already in it.
+        
+        records is a DataFrame or a list of dicts with the domain's columns.
+        Only the new rows are vectorized, with the fitted vocabulary and IDF;
+        they are searched through the domain's delta segment until the next
+        merge_updates (see catalog_updates). Returns their row positions.
+        """
+        from catalog_updates import append_rows
+        import scipy.sparse as sp
+        id_column = ID_COLUMNS[domain]
+        records = pd.DataFrame(records).drop_duplicates(id_column, keep='last')
+        self._tombstone(domain, records[id_column])
+        
+        df = getattr(self, f"{domain}_df")
+        start = len(df)
+        df = append_rows(df, records)
+        setattr(self, f"{domain}_df", df)
+        rows = np.arange(start, len(df))
+        self.item_rows[domain].update(zip(df[id_column].iloc[start:], rows))
+        vectorizer = self.tfidf_vectorizers[domain]
+        with self.metrics.stage('update_vectorize', domain):
+            # Hashed features keep the rows' unseen n-grams, searchable once merge_updates counts them
+            vectorize = getattr(vectorizer, 'transform_new', vectorizer.transform)
+            matrix = vectorize(_combined_text(df.iloc[start:], COMBINED_TEXT_COLUMNS[domain]))
+        self.tfidf_matrices[domain] = sp.vstack([self.tfidf_matrices[domain], matrix], format='csr')
+        self.deleted[domain] = np.concatenate([self.deleted[domain], np.zeros(len(rows), dtype=bool)])
+        
+        # Extend what is keyed by row position; derived indexes are rebuilt on next use
+        if domain in self.title_codes:
+            self._extend_title_codes(domain, df['title' if domain != 'food' else 'name'].iloc[start:])
+        self.entity_matcher.extend(self.domain_frames(), {domain: ENTITY_COLUMNS.get(domain, ())}, {domain: start},
+                                   order_by=POPULARITY_COLUMNS)
+        if self.catalog is not None:
+            self.catalog.append_display_rows(domain, records)
+        self._updated(domain)
+        return rows
+    
+    def delete(self, domain, ids):
+        """Remove items from a domain by id; returns how many were in it"""
+        deleted = self._tombstone(domain, ids)
+        if deleted:
+            self._updated(domain)
+        return deleted
+    
+    def _tombstone(self, domain, ids):
+        """Mark the live rows of these item ids deleted; returns how many there were"""
+        if domain not in self.deleted:
+            ids_column = getattr(self, f"{domain}_df")[ID_COLUMNS[domain]]
+            self.deleted[domain] = np.zeros(len(ids_column), dtype=bool)
+            self.item_rows[domain] = dict(zip(ids_column, range(len(ids_column))))
+        item_rows = self.item_rows[domain]
+        rows = [item_rows.pop(item_id) for item_id in ids if item_id in item_rows]
+        self.deleted[domain][rows] = True
+        return len(rows)
+    
+    def _extend_title_codes(self, domain, titles):
+        """Codes for appended rows' titles, new titles getting the next codes"""
+        codes, uniques = self.title_codes[domain]
+        new_codes = uniques.get_indexer(titles)
+        unknown = new_codes < 0
+        if unknown.any():
+            added = pd.Index(pd.unique(titles[unknown]))
+            new_codes[unknown] = len(uniques) + added.get_indexer(titles[unknown])
+            uniques = uniques.append(added)
+        self.title_codes[domain] = (np.concatenate([codes, new_codes]), uniques)
+    
+    def _updated(self, domain):
+        """Republish a domain's retriever after an update, merging its delta segment once it is large"""
+        from catalog_updates import DELTA_MERGE_FRACTION, DELTA_MERGE_MIN_ROWS
+        self.attribute_indexes.pop(domain, None)
+        if domain == 'music':
+            self.audio = None
+        if self.cross_domain is not None:
+            self.cross_domain = (self.cross_domain[0], self._cross_domain_positions(self.cross_domain[0]))
+        n_base = self.postings[domain].n_rows
+        if self.tfidf_matrices[domain].shape[0] - n_base >= max(DELTA_MERGE_MIN_ROWS, DELTA_MERGE_FRACTION * n_base):
+            self.merge_updates(domain)
+        else:
+            # Also drops cached plans, whose filters depend on the catalog's values
+            self.set_retrieval(domain, self.retrieval.get(domain, 'tfidf'))
+    
+    def merge_updates(self, domain=None, refresh_idf=True):
+        """Fold the delta segment of a domain (default: every updated domain) into its main indexes.
+        
+        With refresh_idf the IDF is recomputed over the live rows first and
+        the domain's TF-IDF rows reweighted to match. Deleted rows keep their
+        positions, emptied in the rebuilt postings.
+        """
+        from catalog_updates import refresh_idf as reweight, without_rows
+        from postings import PostingsIndex
+        for domain in [domain] if domain else list(self.deleted):
+            deleted = self.deleted.get(domain)
+            with self.metrics.stage('merge_updates', domain):
+                if refresh_idf:
+                    self.tfidf_matrices[domain] = reweight(self.tfidf_vectorizers[domain],
+                                                           self.tfidf_matrices[domain], deleted)
+                self.postings[domain] = PostingsIndex(without_rows(self.tfidf_matrices[domain], deleted))
+                self.dense_indexes.pop(domain, None)
+                self.cluster_indexes.pop(domain, None)
+                self.set_retrieval(domain, self.retrieval.get(domain, 'tfidf'))
+    
+    def correct_spelling(self, query):
+        """Correct common spelling mistakes in the query"""
+        # Known misspellings first, then fuzzy matching of individual words
+        # against common domain terms through the precomputed spelling index
+        return self.spelling.correct(query)
+    
+    def detect_domain(self, query: str):
+        """Enhanced domain detection with spelling correction and single-word support"""
+        # Correct spelling first
+        with self.metrics.stage('correct_spelling'):
+            corrected_query = self.correct_spelling(query)
+        query_lower = corrected_query.lower()
+        
+        # Check for single word queries
+        if len(query_lower.split()) == 1:
+            if query_lower in self.single_word_domain:
+                return self.single_word_domain[query_lower]
+            # If single word not found in mapping, default to movies for common entertainment terms
+            if any(term in query_lower for term in ['movie', 'film', 'romcom']):
+                return 'movies'
+            elif any(term in query_lower for term in ['tv', 'show', 'series']):
+                return 'tv_shows'
+            elif any(term in query_lower for term in ['music', 'song']):
+                return 'music'
+            elif any(term in query_lower for term in ['book', 'read']):
+                return 'books'
+            elif any(term in query_lower for term in ['food', 'recipe']):
+                return 'food'
+        
+        # Score each domain based on keyword matches (word-bounded or partial)
+        # with the precompiled automaton, in a single pass over the query
+        domain_scores = self.domain_keyword_scorer.score(query_lower)
+        
+        # Find the domain with the highest score
+        best_domain = max(domain_scores, key=domain_scores.get)
+        
+        # Only return a domain if it has at least one match, otherwise default to movies
+        if domain_scores[best_domain] > 0:
+            return best_domain
+        else:
+            # Default to movies for entertainment-related single words
+            if len(query_lower.split()) == 1:
+                return 'movies'
+            return None
+    
+    def enhance_query(self, query, domain):
+        """Enhance queries with related terms for better matching"""
+        query_lower = query.lower()
+        enhanced_query = query
+        
+        # Domain-specific query enhancers
+        enhancers = {
+            'movies': {
+                'love': ['romance', 'romantic', 'relationship', 'heartfelt', 'emotional'],
+                'action': ['adventure', 'thrilling', 'exciting', 'suspenseful', 'intense'],
+                'great plots': ['story', 'narrative', 'plot twists', 'engaging', 'compelling'],
+                'movies': ['film', 'cinema', 'motion picture', 'feature'],
+                'romcom': ['romantic comedy', 'romance', 'comedy', 'love story']
+            },
+            'food': {
+                'pasta': ['noodles', 'spaghetti', 'macaroni', 'penne', 'fettuccine', 'linguine'],
+                'recipes': ['dish', 'meal', 'cooking', 'preparation'],
+                'simple': ['easy', 'quick', 'basic', 'minimal', 'straightforward'],
+                'impressive': ['elegant', 'fancy', 'gourmet', 'sophisticated', 'restaurant-quality']
+            },
+            'music': {
+                'love': ['romantic', 'heartfelt', 'emotional', 'passionate'],
+                'relaxing': ['calming', 'soothing', 'peaceful', 'tranquil'],
+                'energetic': ['upbeat', 'lively', 'dynamic', 'vibrant']
+            },
+            'books': {
+                'love': ['romance', 'relationship', 'heartfelt', 'emotional'],
+                'thriller': ['suspense', 'mystery', 'crime', 'intrigue']
+            },
+            'tv_shows': {
+                'drama': ['emotional', 'serious', 'intense', 'compelling'],
+                'comedy': ['funny', 'humorous', 'lighthearted', 'entertaining']
+            }
+        }
+        
+        if domain in enhancers:
+            for term, related_terms in enhancers[domain].items():
+                if term in query_lower:
+                    enhanced_query += ' ' + ' '.join(related_terms)
+        
+        return enhanced_query
+    
+    def plan_query(self, query: str):
+        """Detect the domain, enhance the query and parse its attribute filters.
+        
+        Returns a QueryPlan; filters include the catalog people (artists,
+        directors, cast, authors) the query names, and direct is set when the
+        query names people and nothing else but words like "songs" or "by".
+        """
+        with self.metrics.stage('detect_domain'):
+            domain = self.detect_domain(query)
+        if not domain:
+            return QueryPlan(None, None, (), False)
+        
+        # Enhance the query with related terms
+        with self.metrics.stage('enhance_query', domain):
+            enhanced_query = self.enhance_query(query, domain)
+        
+        # People from our catalog the query mentions, plus years, ratings,
+        # times and genres it constrains
+        with self.metrics.stage('entity_match', domain):
+            entities = self.entity_matcher.find(query, domain=domain)
+        with self.metrics.stage('parse_filters', domain):
+            filters = self._attribute_index(domain).parse(query, entities)
+        entity_words = {word for _, _, name in entities for word in tokenize(name)}
+        direct = any(spec.column in ENTITY_COLUMNS.get(domain, ()) for spec in filters) and all(
+            not word.isalnum() for word in set(tokenize(query)) - entity_words - DIRECT_QUERY_WORDS
+        )
+        return QueryPlan(domain, enhanced_query, filters, direct)
+    
+    def parse_query(self, query: str):
+        """Structured intent of a query, from dictionaries built once from the catalog.
+        
+        Returns a dict with the domain, the entities named (field, name and
+        how many catalog rows hold them), the genres and moods mentioned, the
+        year range and minimum rating asked for (None if not), whether it is
+        a direct entity query, and the attribute filters applied.
+        """
+        normalized_query = normalize_query(query)
+        plan = self.cached_plan(normalized_query)
+        intent = {'domain': plan.domain, 'entities': [], 'genres': [], 'moods': [], 'year_range': None,
+                  'min_rating': None, 'direct': plan.direct, 'filters': plan.filters}
+        if not plan.domain:
+            return intent
+        index = self._attribute_index(plan.domain)
+        intent['entities'] = [
+            {'field': field, 'name': name, 'rows': len(self.entity_matcher.rows(plan.domain, field, name))}
+            for _, field, name in self.entity_matcher.find(normalized_query, domain=plan.domain)
+        ]
+        intent['genres'] = list(index.mentioned('genre' if plan.domain != 'food' else 'cuisine_type',
+                                                normalized_query))
+        intent['moods'] = list(index.mentioned('mood', normalized_query))
+        for spec in plan.filters:
+            if spec.column == index.kinds.get('year'):
+                intent['year_range'] = (spec.low, spec.high)
+            elif spec.column == index.kinds.get('rating'):
+                intent['min_rating'] = spec.low
+        return intent
+    
+    def cached_plan(self, normalized_query):
+        """plan_query through the plan cache; repeated queries reuse their analysis"""
+        plan = self.query_cache.plans.get(normalized_query)
+        if plan is None:
+            plan = self.plan_query(normalized_query)
+            self.query_cache.plans.put(normalized_query, plan)
+        return plan
+    
+    def process_query(self, query: str, session_id=None):
+        """Process a user query and return recommendations not yet shown to this session"""
+        with self.metrics.stage('process_query'):
+            return self._process_query(query, session_id)
+    
+    def _process_query(self, query, session_id):
+        normalized_query = normalize_query(query)
+        
+        # "songs like X" for a track in the catalog: its nearest neighbours by sound
+        match = SIMILAR_TRACK_RE.search(normalized_query)
+        if match:
+            recs = self.similar_tracks(match.group('title'), 3, match.group('artist'), session_id=session_id)
+            if recs is not None and len(recs):
+                return f"Tracks that sound like {match.group('title').title()}:\n\n" + \
+                       self._format_recommendations(recs, 'music', True)
+        
+        domain, enhanced_query, filters, direct = self.cached_plan(normalized_query)
+        
+        if not domain:
+            self.metrics.increment('no_domain')
+            return "I can help with recommendations for movies, TV shows, music, books, and food. Please specify what you're looking for!"
+        
+        # Get recommendations for the detected domain among the rows passing its filters
+        recs, kept_filters = self.recommend_with_fallback(domain, enhanced_query, 3, session_id, filters, direct)
+        if filters and not kept_filters:
+            if domain == 'music' and any(spec.column == 'artist' for spec in filters):
+                self.metrics.increment('artist_not_found', domain)
+                return f"I couldn't find songs by that artist, but you might like these:\n\n" + \
+                       self._format_recommendations(recs, domain, False)
+            filters = ()
+        
+        # Check if we found good matches
+        if len(recs) == 0 or recs.iloc[0].get('similarity_score', 1) < 0.1:
+            # Try a broader search if no good results found
+            self.metrics.increment('broad_search', domain)
+            recs = self.get_recommendations(domain, normalized_query, 5, session_id=session_id, filters=filters)
+            if len(recs) == 0:
+                self.metrics.increment('no_results', domain)
+                return f"Sorry, I couldn't find any {domain} recommendations for '{query}'. Try a different query!"
+            else:
+                # Found some similar items but not exact matches
+                return f"I didn't find exact matches for '{query}', but here are some similar {domain} you might enjoy:\n\n" + \
+                       self._format_recommendations(recs.head(3), domain, True)
+        
+        return self._format_recommendations(recs, domain, False)
+    
+    def recommend_with_fallback(self, domain, query, n_recommendations=3, session_id=None, filters=(),
+                                direct=False):
+        """get_recommendations, retried on text matching alone when nothing the session has not seen passes
+        the filters. Returns the recommendations and the filters they were taken with (() after a retry).
+        """
+        recs = self.get_recommendations(domain, query, n_recommendations, session_id=session_id, filters=filters,
+                                        direct=direct)
+        if filters and len(recs) == 0:
+            self.metrics.increment('filter_no_match', domain)
+            filters = ()
+            recs = self.get_recommendations(domain, query, n_recommendations, session_id=session_id)
+        return recs, filters
+    
+    def get_recommendations(self, domain: str, query: str, n_recommendations: int = 3, session_id=None,
+                            filters=(), direct=False):
+        """Get recommendations using TF-IDF cosine similarity over the inverted index,
+        or through the domain's ANN or cluster-pruned index in 'lsa' or 'cluster' mode.
+        
+        Titles already recommended to the session are skipped, and the returned
+        ones are recorded for it; session_id None is one shared default session.
+        filters (from plan_query) restrict the results to the rows passing them;
+        with direct, the rows of the entities they name are returned most
+        popular first, with score 1, without scoring the query text.
+        """
+        if domain not in self.tfidf_vectorizers:
+            return pd.DataFrame()
+        
+        # Score only the rows on the query terms' posting lists and select the
+        # top N unseen items, one row per title
+        df = getattr(self, f"{domain}_df")
+        title_col = 'title' if domain != 'food' else 'name'
+        title_codes = self._title_codes(domain, df, title_col)
+        session_id = self._session_key(session_id)
+        seen = self._seen_mask(domain, title_codes, session_id)
+        with self.metrics.stage('rank', domain):
+            if direct:
+                top_indices, similarities = self._lookup_entities(domain, n_recommendations, title_codes, filters, seen)
+            else:
+                top_indices, similarities = self._top_unseen(domain, query, n_recommendations, title_codes, seen,
+                                                             filters)
+        
+        with self.metrics.stage('take', domain):
+            return self._take(domain, top_indices, similarities, session_id)
+    
+    def _take(self, domain, top_indices, similarities, session_id):
+        """Catalog rows at ranked positions with their scores, recorded as seen by the session"""
+        df = getattr(self, f"{domain}_df")
+        codes, titles = self.title_codes[domain]
+        recs = df.iloc[top_indices].assign(similarity_score=similarities)
+        self.sessions.mark(session_id, domain, codes[top_indices], len(titles))
+        if self.catalog is not None:
+            recs = self.catalog.attach_display_columns(domain, recs, top_indices)
+        return recs.reset_index(drop=True)
+    
+    def recommend_cross_domain(self, query, k=3, domains=None, session_id=None):
+        """Top k recommendations in each domain of a mixed query, from one pass over the shared index.
+        
+        domains defaults to the domains the query mentions, or all of them if it
+        mentions none. Titles already recommended to the session are skipped and
+        the returned ones recorded. Returns {domain: DataFrame}, the domain with
+        the best match first; empty if there is no cross-domain features file.
+        """
+        if not self.cross_domain_path:
+            return {}
+        index, positions = self._cross_domain_index()
+        corrected_query = self.correct_spelling(query).lower()
+        if domains is None:
+            domain_scores = self.domain_keyword_scorer.score(corrected_query)
+            domains = [domain for domain in DOMAINS if domain_scores.get(domain, 0) > 0] or list(DOMAINS)
+        
+        # Shared rows missing from the catalogs, and titles the session has seen, are skipped
+        session_id = self._session_key(session_id)
+        exclude = positions < 0
+        for domain in domains:
+            df = getattr(self, f"{domain}_df")
+            title_codes = self._title_codes(domain, df, 'title' if domain != 'food' else 'name')
+            seen = self._seen_mask(domain, title_codes, session_id)
+            if seen is not None:
+                rows = index.domain_rows(domain)
+                rows = rows[positions[rows] >= 0]
+                exclude[rows] |= seen[positions[rows]]
+        
+        with self.metrics.stage('cross_domain_score'):
+            ranked = index.search(corrected_query, k, domains, exclude)
+        results = {}
+        for domain, (rows, scores) in ranked.items():
+            with self.metrics.stage('take', domain):
+                results[domain] = self._take(domain, positions[rows], scores, session_id)
+        return results
+    
+    def similar_tracks(self, title, k=10, artist=None, text_weight=0.0, session_id=None):
+        """Tracks closest to a catalog track in audio-feature space; None if the track is unknown.
+        
+        See similar_tracks_batch.
+        """
+        return self.similar_tracks_batch([(title, artist)], k, text_weight, session_id)[0]
+    
+    def similar_tracks_batch(self, tracks, k=10, text_weight=0.0, session_id=None):
+        """similar_tracks for many seed tracks with one batched k-NN query, e.g. for a playlist.
+        
+        Each seed is a title or a (title, artist) pair; among several matching
+        tracks the most popular is used. Results are distinct titles other than
+        the seed's, skipping those the session has seen when the call starts.
+        With text_weight > 0 a larger pool of audio neighbours is re-ranked by
+        (1 - text_weight) * audio similarity + text_weight * TF-IDF cosine to
+        the seed. Returns a DataFrame per seed, None for seeds not in the catalog.
+        """
+        index = self._audio_index()[0]
+        codes = self._title_codes('music', self.music_df, 'title')
+        seeds = [self._find_track(*((track, None) if isinstance(track, str) else track)) for track in tracks]
+        found = [i for i, seed in enumerate(seeds) if seed is not None]
+        seed_rows = np.array([seeds[i] for i in found], dtype=np.intp)
+        session_id = self._session_key(session_id)
+        pool = max(4 * k, self.query_cache.candidate_pool) if text_weight else k
+        with self.metrics.stage('audio_knn', 'music'):
+            neighbours = index.query(index.vectors[seed_rows], pool, codes,
+                                     self._seen_mask('music', codes, session_id), codes[seed_rows])
+        
+        if text_weight:
+            tfidf = self.tfidf_matrices['music']
+            for j, (seed, (rows, similarities)) in enumerate(zip(seed_rows, neighbours)):
+                text_scores = (tfidf[rows] @ tfidf[seed].T).toarray().ravel()
+                similarities = (1 - text_weight) * similarities + text_weight * text_scores
+                best = np.argsort(-similarities, kind='stable')[:k]
+                neighbours[j] = (rows[best], similarities[best])
+        
+        # One take for all seeds, then split per seed
+        results = [None] * len(tracks)
+        if found:
+            with self.metrics.stage('take', 'music'):
+                recs = self._take('music', np.concatenate([rows for rows, _ in neighbours]),
+                                  np.concatenate([scores for _, scores in neighbours]), session_id)
+            bounds = np.cumsum([0] + [len(rows) for rows, _ in neighbours])
+            for i, start, end in zip(found, bounds[:-1], bounds[1:]):
+                results[i] = recs.iloc[start:end].reset_index(drop=True)
+        return results
+    
+    def _find_track(self, title, artist=None):
+        """Row of the most popular track with this title (and artist), or None"""
+        _, titles, order, starts = self._audio_index()
+        code = titles.get_indexer([title.strip().lower()])[0]
+        if code < 0:
+            return None
+        rows = order[starts[code]:starts[code + 1]]
+        if 'music' in self.deleted:
+            rows = rows[~self.deleted['music'][rows]]
+        if artist:
+            artists = self.music_df['artist'].to_numpy()[rows].astype(str)
+            rows = rows[np.char.lower(artists) == artist.strip().lower()]
+        if not len(rows):
+            return None
+        if 'popularity' in self.music_df.columns:
+            # argmax takes the first row among ties
+            return rows[np.argmax(self.music_df['popularity'].to_numpy()[rows])]
+        return rows[0]
+    
+    def _audio_index(self):
+        """The audio k-NN index, plus lowercase titles and the music rows grouped by title code"""
+        if self.audio is None:
+            from audio_index import AudioIndex
+            codes = self._title_codes('music', self.music_df, 'title')
+            # Titles matched case-insensitively: rows sorted by lowercase title,
+            # and where each title's rows start
+            title_codes, titles = pd.factorize(self.title_codes['music'][1].astype(str).str.lower())
+            row_codes = title_codes[codes]
+            order = np.argsort(row_codes, kind='stable')
+            starts = np.searchsorted(row_codes[order], np.arange(len(titles) + 1))
+            self.audio = (AudioIndex(self.music_df), pd.Index(titles), order, starts)
+        return self.audio
+    
+    def _cross_domain_index(self):
+        """The shared index and each of its rows' position in its domain frame (-1 if absent)"""
+        if self.cross_domain is None:
+            from cross_domain_index import CrossDomainIndex, read_cross_domain_features
+            index = CrossDomainIndex(read_cross_domain_features(self.cross_domain_path), DOMAINS)
+            self.cross_domain = (index, self._cross_domain_positions(index))
+        return self.cross_domain
+    
+    def _cross_domain_positions(self, index):
+        """Live row of each shared-index row's item in its domain frame, -1 if absent"""
+        positions = np.full(index.n_rows, -1, dtype=np.intp)
+        for domain in DOMAINS:
+            rows = index.domain_rows(domain)
+            ids = getattr(self, f"{domain}_df")[ID_COLUMNS[domain]]
+            deleted = self.deleted.get(domain)
+            if deleted is None:
+                positions[rows] = pd.Index(ids).get_indexer(index.ids[rows])
+                continue
+            # An upserted item's id is also on its deleted rows
+            live = np.flatnonzero(~deleted)
+            found = pd.Index(ids.to_numpy()[live]).get_indexer(index.ids[rows])
+            positions[rows] = np.where(found >= 0, live[found], -1)
+        return positions
+    
+    def rank_batch(self, queries, k=3):
+        """Ranked catalog rows for many queries, as a list of (domain, rows, scores) in query order.
+        
+        Queries are grouped by detected domain; each group is vectorized in one
+        call and scored with one sparse matrix product. Meant for offline jobs:
+        nothing is excluded or recorded as already recommended. Queries without
+        a domain get (None, empty rows, empty scores).
+        """
+        by_domain = {}
+        for i, query in enumerate(queries):
+            domain, enhanced_query, filters, direct = self.cached_plan(normalize_query(query))
+            if domain in self.tfidf_vectorizers:
+                by_domain.setdefault(domain, []).append((i, enhanced_query, filters, direct))
+        
+        results = [(None, np.empty(0, dtype=np.intp), np.empty(0))] * len(queries)
+        for domain, items in by_domain.items():
+            df = getattr(self, f"{domain}_df")
+            title_col = 'title' if domain != 'food' else 'name'
+            title_codes = self._title_codes(domain, df, title_col)
+            # Filtered queries each rank their own allowed rows
+            for i, text, filters, direct in [item for item in items if item[2]]:
+                with self.metrics.stage('batch_score', domain):
+                    if direct:
+                        results[i] = (domain, *self._lookup_entities(domain, k, title_codes, filters))
+                        continue
+                    query_vec = self.tfidf_vectorizers[domain].transform([text])
+                    results[i] = (domain, *self._score(domain, query_vec, k, title_codes, filters=filters))
+            items = [(i, text) for i, text, filters, _ in items if not filters]
+            for start in range(0, len(items), BATCH_SIZE):
+                chunk = items[start:start + BATCH_SIZE]
+                with self.metrics.stage('batch_vectorize', domain):
+                    query_matrix = self.tfidf_vectorizers[domain].transform([text for _, text in chunk])
+                with self.metrics.stage('batch_score', domain):
+                    ranked = self.retrievers[domain].top_k_batch(query_matrix, k, title_codes)
+                for (i, _), (rows, scores) in zip(chunk, ranked):
+                    results[i] = (domain, rows, scores)
+        return results
+    
+    def take_ranked(self, domain, ranked):
+        """One frame with the rows of several (rows, scores) results, plus each result's bounds in it"""
+        df = getattr(self, f"{domain}_df")
+        with self.metrics.stage('batch_take', domain):
+            top_indices = np.concatenate([rows for rows, _ in ranked])
+            recs = df.iloc[top_indices].reset_index(drop=True).assign(
+                similarity_score=np.concatenate([scores for _, scores in ranked]))
+            if self.catalog is not None:
+                recs = self.catalog.attach_display_columns(domain, recs, top_indices)
+            return recs, np.cumsum([0] + [len(rows) for rows, _ in ranked])
+    
+    def recommend_batch(self, queries, k=3):
+        """Top k recommendations for many queries, as a list of (domain, DataFrame) in query order.
+        
+        Same ranking as rank_batch; queries without a domain get (None, empty DataFrame).
+        """
+        ranked = self.rank_batch(queries, k)
+        results = [(None, pd.DataFrame())] * len(queries)
+        by_domain = {}
+        for i, (domain, _, _) in enumerate(ranked):
+            if domain is not None:
+                by_domain.setdefault(domain, []).append(i)
+        for domain, positions in by_domain.items():
+            # One take per domain, then split it per query
+            recs, bounds = self.take_ranked(domain, [ranked[i][1:] for i in positions])
+            for i, start, end in zip(positions, bounds[:-1], bounds[1:]):
+                results[i] = (domain, recs.iloc[start:end].reset_index(drop=True))
+        return results
+    
+    def _top_unseen(self, domain, query, n, title_codes, seen, filters=()):
+        """Best n rows whose titles are not in seen, served from the candidate cache when possible"""
+        key = (domain, normalize_query(query), filters)
+        cached = self.query_cache.candidates.get(key)
+        query_vec = None
+        if cached is None or cached[2] < n:
+            # Rank a pool of titles over the whole catalog, before any session filtering
+            self.metrics.increment('candidate_cache_miss', domain)
+            with self.metrics.stage('vectorize', domain):
+                query_vec = self.tfidf_vectorizers[domain].transform([query])
+            pool = max(n, self.query_cache.candidate_pool)
+            with self.metrics.stage('score', domain):
+                rows, scores = self._score(domain, query_vec, pool, title_codes, filters=filters)
+            rows.setflags(write=False)
+            scores.setflags(write=False)
+            cached = (rows, scores, pool)
+            self.query_cache.candidates.put(key, cached)
+        
+        rows, scores, pool = cached
+        if seen is not None:
+            unseen = ~seen[rows]
+            rows, scores = rows[unseen], scores[unseen]
+        # Titles are excluded whole, so the unseen part of the pool keeps its
+        # order; it is the full answer if it is long enough or the pool held every title
+        if len(rows) >= n or len(cached[0]) < pool:
+            return rows[:n], scores[:n]
+        self.metrics.increment('candidate_pool_exhausted', domain)
+        if query_vec is None:
+            with self.metrics.stage('vectorize', domain):
+                query_vec = self.tfidf_vectorizers[domain].transform([query])
+        with self.metrics.stage('score', domain):
+            return self._score(domain, query_vec, n, title_codes, seen, filters)
+    
+    def _score(self, domain, query_vec, k, title_codes, exclude=None, filters=()):
+        """Best k rows for a query vector through the domain's retriever, among the rows passing filters"""
+        deleted = self.deleted.get(domain)
+        if deleted is not None:
+            exclude = deleted if exclude is None else exclude | deleted
+        if not filters:
+            return self.retrievers[domain].top_k(query_vec, k, title_codes, exclude)
+        from attribute_filters import filtered_top_k
+        allowed = self._attribute_index(domain).mask(filters)
+        return filtered_top_k(self.retrievers[domain], self.tfidf_matrices[domain], query_vec, k, title_codes,
+                              allowed, exclude)
+    
+    def _lookup_entities(self, domain, n, title_codes, filters, seen=None):
+        """Best n rows of the entities named in filters, most popular first, one per title.
+        
+        Rows come from the entity postings (any of a field's names, every
+        field), so the cost grows with the entities' rows, not the catalog.
+        A single name's postings are already in popularity order.
+        """
+        people = [spec for spec in filters if spec.column in ENTITY_COLUMNS.get(domain, ())]
+        postings = [[self.entity_matcher.rows(domain, spec.column, name) for name in spec.values] for spec in people]
+        if len(postings) == 1 and len(postings[0]) == 1:
+            rows = postings[0][0]
+        else:
+            rows = None
+            for lists in postings:
+                field_rows = np.unique(np.concatenate(lists))
+                rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+            if rows is None:
+                rows = np.empty(0, dtype=np.intp)
+            df = getattr(self, f"{domain}_df")
+            if POPULARITY_COLUMNS[domain] in df.columns:
+                popularity = df[POPULARITY_COLUMNS[domain]].to_numpy(dtype=np.float64)[rows]
+                rows = rows[np.argsort(-popularity, kind='stable')]
+        rest = [spec for spec in filters if spec not in people]
+        if rest:
+            rows = rows[self._attribute_index(domain).passes(rows, rest)]
+        if seen is None and domain in self.deleted:
+            seen = self.deleted[domain]
+        if seen is not None:
+            rows = rows[~seen[rows]]
+        # The first (most popular) row of each title, looking only as far down as needed
+        want = 4 * n
+        while True:
+            _, first = np.unique(title_codes[rows[:want]], return_index=True)
+            if len(first) >= n or want >= len(rows):
+                break
+            want *= 4
+        rows = rows[np.sort(first)[:n]]
+        return rows, np.ones(len(rows))
+    
+    def _attribute_index(self, domain):
+        """Sorted indexes and value postings over the domain's filterable columns"""
+        if domain not in self.attribute_indexes:
+            from attribute_filters import CATEGORICAL_FILTER_COLUMNS, NUMERIC_FILTER_COLUMNS, AttributeIndex
+            self.attribute_indexes[domain] = AttributeIndex(
+                getattr(self, f"{domain}_df"), NUMERIC_FILTER_COLUMNS[domain], CATEGORICAL_FILTER_COLUMNS[domain]
+            )
+        return self.attribute_indexes[domain]
+    
+    def _title_codes(self, domain, df, title_col):
+        """Factorized title column, computed once per domain, for vectorized seen-item masks"""
+        if domain not in self.title_codes:
+            codes, uniques = pd.factorize(df[title_col], use_na_sentinel=False)
+            self.title_codes[domain] = (codes, pd.Index(uniques))
+        return self.title_codes[domain][0]
+    
+    def metrics_snapshot(self):
+        """Debug hook: stage latencies, fallback counters, cache and session stats"""
+        snapshot = self.metrics.snapshot()
+        snapshot['query_cache'] = self.query_cache.stats()
+        snapshot['sessions'] = self.sessions.stats()
+        return snapshot
+    
+    def metrics_text(self):
+        """Stage histograms, counters and cache/session gauges in Prometheus text format"""
+        gauges = []
+        for layer, stats in self.query_cache.stats().items():
+            for name, value in stats.items():
+                gauges.append((f"query_cache_{name}", {'layer': layer}, value))
+        for name, value in self.sessions.stats().items():
+            gauges.append((f"session_store_{name}", {}, value))
+        return self.metrics.export_prometheus(gauges)
+    
+    @staticmethod
+    def _session_key(session_id):
+        if session_id is None:
+            from session_state import DEFAULT_SESSION
+            return DEFAULT_SESSION
+        return session_id
+    
+    def reset_session(self, session_id=None, domain=None):
+        """Forget which titles were recommended to a session, in one domain or all"""
+        self.sessions.reset(self._session_key(session_id), domain)
+    
+    def _seen_mask(self, domain, title_codes, session_id):
+        """Boolean mask of rows whose title was already recommended to the session, or deleted; or None"""
+        seen_titles = self.sessions.seen(session_id, domain, len(self.title_codes[domain][1]))
+        deleted = self.deleted.get(domain)
+        if seen_titles is None:
+            return deleted
+        if deleted is None:
+            return seen_titles[title_codes]
+        return seen_titles[title_codes] | deleted
+    
+    def _format_recommendations(self, recs, domain, is_similar=False):
+        """Format recommendations based on domain"""
+        with self.metrics.stage('format', domain):
+            return self._format_domain_recommendations(recs, domain, is_similar)
+    
+    def _format_domain_recommendations(self, recs, domain, is_similar):
+        if domain == 'movies' or domain == 'tv_shows':
+            return self._format_movie_tv_recommendations(recs, domain, is_similar)
+        elif domain == 'music':
+            return self._format_music_recommendations(recs, is_similar)
+        elif domain == 'books':
+            return self._format_book_recommendations(recs, is_similar)
+        elif domain == 'food':
+            return self._format_food_recommendations(recs, is_similar)
+    
+    def _format_movie_tv_recommendations(self, recs, domain, is_similar=False):
+        """Format movie or TV show recommendations"""
+        response = f"Here are some {domain} recommendations for you:\n\n"
+        for i, row in recs.iterrows():
+            response += f"**{row['title']}** ({row['genre']}) - Rating: {_display_number(row['rating'])}, Mood: {row['mood']}\n"
+            response += f"Description: {row['description'][:100]}...\n\n"
+        return response
+    
+    def _format_music_recommendations(self, recs, is_similar=False):
+        """Format music recommendations"""
+        response = "Here are some music recommendations for you:\n\n"
+        for i, row in recs.iterrows():
+            response += f"**{row['title']}** by {row['artist']} ({row['genre']}) - Mood: {row['mood']}\n"
+            if pd.notna(row['lyrics']) and len(str(row['lyrics'])) > 0:
+                response += f"Lyrics excerpt: {str(row['lyrics'])[:50]}...\n\n"
+            else:
+                response += "\n"
+        return response
+    
+    def _format_book_recommendations(self, recs, is_similar=False):
+        """Format book recommendations"""
+        response = "Here are some book recommendations for you:\n\n"
+        for i, row in recs.iterrows():
+            response += f"**{row['title']}** by {row['author']} ({row['genre']}) - Rating: {_display_number(row['average_rating'])}, Mood: {row['mood']}\n"
+            response += f"Description: {row['description'][:100]}...\n\n"
+        return response
+    
+    def _format_food_recommendations(self, recs, is_similar=False):
+        """Format food recommendations with detailed recipe information"""
+        response = "Here are some recipe recommendations for you:\n\n"
+        for i, row in recs.iterrows():
+            response += f"**{row['name']}** ({row['cuisine_type']}) - Rating: {_display_number(row['rating'])}, Mood: {row['mood']}\n"
+            response += f"Ingredients: {row['ingredients']}\n"
+            response += f"Preparation: {row['description']}\n"
+            
+            # Add cooking time and difficulty
+            cooking_time = row.get('cooking_time', 'N/A')
+            difficulty = row.get('difficulty_level', 'N/A')
+            response += f"Cooking time: {cooking_time} minutes, Difficulty: {difficulty}\n\n"
+        return response
+
+class OptimizedMultiDomainRecommendationSystem:
+    """Headless entry point over the local CSVs, backed by the persisted TF-IDF index"""
+    def __init__(self, data_path='./', index_dir=None, cache_dir=None):
+        from catalog_store import CatalogCache
+        self.data_path = data_path
+        self.index_dir = index_dir or os.path.join(data_path, 'index_artifacts')
+        self.catalog = CatalogCache(data_path, cache_dir)
+        self.recommender = None
+    
+    def load_preprocessed_data(self):
+        """Load the catalog and restore the index from artifacts, rebuilding them if stale"""
+        recommender = self.open_recommender()
+        if recommender is None:
+            return False
+        self.recommender = recommender
+        self.catalog = recommender.catalog
+        return True
+    
+    def open_recommender(self, metrics=None):
+        """A new AdvancedRecommender over the current source files, or None if they cannot be read.
+        
+        Each one gets its own CatalogCache, so it keeps its display files
+        mapped while a newer recommender rebuilds the cache.
+        """
+        from catalog_store import CatalogCache
+        from index_artifacts import fingerprint_files
+        catalog = CatalogCache(self.data_path, self.catalog.cache_dir)
+        try:
+            stamp = catalog.source_stamp()
+            fingerprint = fingerprint_files(catalog.source_paths(), TFIDF_PARAMS)
+            frames = catalog.load()
+            if catalog.source_stamp() != stamp:
+                # A source was rewritten mid-load, so the fingerprint may not match the frames
+                return None
+        except OSError:
+            return None
+        return AdvancedRecommender(*frames, index_dir=self.index_dir, fingerprint=fingerprint, catalog=catalog,
+                                   metrics=metrics, cross_domain_path=self._cross_domain_path(),
+                                   cluster_path=self.data_path)
+    
+    def snapshots(self, poll_interval=None, metrics=None):
+        """A SnapshotManager serving this catalog, rebuilt and swapped when the source CSVs change.
+        
+        The first snapshot is built before returning (manager.current is None
+        if the sources cannot be read); call start() to watch for changes.
+        All snapshots record into one Metrics.
+        """
+        from snapshots import DEFAULT_POLL_INTERVAL, SnapshotManager
+        metrics = metrics if metrics is not None else Metrics()
+        manager = SnapshotManager(lambda: self.open_recommender(metrics), stamp=self.catalog.source_stamp,
+                                  poll_interval=DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval)
+        manager.reload()
+        return manager
+    
+    def build_index(self):
+        """Force a rebuild of the columnar cache and the persisted index artifacts"""
+        from index_artifacts import fingerprint_files
+        fingerprint = fingerprint_files(self.catalog.source_paths(), TFIDF_PARAMS)
+        self.catalog.build()
+        self.recommender = AdvancedRecommender(*self.catalog.load(), fingerprint=fingerprint, catalog=self.catalog,
+                                               cross_domain_path=self._cross_domain_path(),
+                                               cluster_path=self.data_path)
+        self.recommender.index_dir = self.index_dir
+        self.recommender.save_index()
+    
+    def _cross_domain_path(self):
+        from cross_domain_index import CROSS_DOMAIN_FILE
+        path = os.path.join(self.data_path, CROSS_DOMAIN_FILE)
+        return path if os.path.exists(path) else None
+    
+    def get_recommendations(self, query, n_recommendations=5):
+        """Return recommendations for a free-text query as a list of dicts"""
+        if self.recommender is None and not self.load_preprocessed_data():
+            return []
+        plan = self.recommender.cached_plan(normalize_query(query))
+        if not plan.domain:
+            return []
+        recs, _ = self.recommender.recommend_with_fallback(plan.domain, plan.query, n_recommendations,
+                                                           filters=plan.filters, direct=plan.direct)
+        # float32 catalog columns would otherwise come back with round-off noise, as in _format_*
+        return [{column: _display_number(value) for column, value in row.items()} for row in recs.to_dict('records')]
+    
+    def parse_query(self, query):
+        """Structured intent of a query (see AdvancedRecommender.parse_query); {} if the data cannot load"""
+        if self.recommender is None and not self.load_preprocessed_data():
+            return {}
+        return self.recommender.parse_query(query)
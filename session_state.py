@@ -0,0 +1,141 @@
+"""
+Per-session record of the titles already recommended.
+
+Each session keeps one packed bitmap per domain over that domain's title
+codes (one bit per distinct title), so a session costs a fixed number of
+bytes however many recommendations it received, and the engine reads it
+back as a vectorized mask.
+
+Sessions live in an LRU with an idle timeout. The store also enforces a
+session count and a total byte budget; when either is exceeded the least
+recently used sessions are dropped, so memory stays bounded under any
+number of concurrent users.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_SESSION = 'default'
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_IDLE_TIMEOUT = 1800.0  # seconds
+DEFAULT_MAX_BYTES = 64 << 20
+# Rough per-session bookkeeping (dict entries, ids) on top of the bitmaps
+SESSION_OVERHEAD_BYTES = 256
+
+
+class SessionState:
+    """Seen-title bitmaps of one session, keyed by domain"""
+    __slots__ = ('bitmaps', 'last_used')
+
+    def __init__(self, now):
+        self.bitmaps = {}
+        self.last_used = now
+
+    def nbytes(self):
+        return SESSION_OVERHEAD_BYTES + sum(bits.nbytes for bits in self.bitmaps.values())
+
+
+class SessionStore:
+    """Bounded LRU of SessionState with idle expiry and a total byte budget"""
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 max_bytes=DEFAULT_MAX_BYTES, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+        self.nbytes = 0
+        self.evictions = 0
+
+    def _evict(self, now):
+        # Oldest first: expired sessions, then whatever exceeds the count or byte budget
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            idle = self.idle_timeout is not None and now - state.last_used > self.idle_timeout
+            if not (idle or len(self._sessions) > self.max_sessions or self.nbytes > self.max_bytes):
+                break
+            del self._sessions[session_id]
+            self.nbytes -= state.nbytes()
+            self.evictions += 1
+
+    def _get(self, session_id, create):
+        now = self.clock()
+        state = self._sessions.get(session_id)
+        if state is not None and self.idle_timeout is not None and now - state.last_used > self.idle_timeout:
+            self.reset(session_id)
+            state = None
+        if state is None:
+            if not create:
+                return None
+            state = SessionState(now)
+            self._sessions[session_id] = state
+            self.nbytes += state.nbytes()
+        state.last_used = now
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+        return state
+
+    def seen(self, session_id, domain, n_titles):
+        """Boolean array over title codes of titles this session has seen, or None if none"""
+        with self._lock:
+            state = self._get(session_id, create=False)
+            bits = state.bitmaps.get(domain) if state is not None else None
+            if bits is None:
+                return None
+            return np.unpackbits(bits, count=n_titles).view(bool)
+
+    def mark(self, session_id, domain, codes, n_titles):
+        """Record the titles with the given codes as seen by this session.
+
+        The domain's bitmap grows when titles were added since it was created.
+        """
+        codes = np.asarray(codes, dtype=np.intp)
+        with self._lock:
+            state = self._get(session_id, create=True)
+            bits = state.bitmaps.get(domain)
+            if bits is None or len(bits) < (n_titles + 7) // 8:
+                grown = np.zeros((n_titles + 7) // 8, dtype=np.uint8)
+                if bits is not None:
+                    grown[:len(bits)] = bits
+                    self.nbytes -= bits.nbytes
+                bits = grown
+                state.bitmaps[domain] = bits
+                self.nbytes += bits.nbytes
+            np.bitwise_or.at(bits, codes >> 3, (128 >> (codes & 7)).astype(np.uint8))
+            self._evict(self.clock())
+
+    def reset(self, session_id, domain=None):
+        """Forget what a session has seen, in one domain or in all of them"""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return
+            if domain is None:
+                del self._sessions[session_id]
+                self.nbytes -= state.nbytes()
+            elif domain in state.bitmaps:
+                self.nbytes -= state.bitmaps.pop(domain).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def domain_bytes(self):
+        """Bytes of seen-title bitmaps per domain, over all sessions"""
+        totals = {}
+        with self._lock:
+            for state in self._sessions.values():
+                for domain, bits in state.bitmaps.items():
+                    totals[domain] = totals.get(domain, 0) + bits.nbytes
+        return totals
+
+    def stats(self):
+        return {'sessions': len(self._sessions), 'bytes': self.nbytes, 'evictions': self.evictions}
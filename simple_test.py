@@ -6,7 +6,7 @@ Simple test for the enhanced recommendation system
 print("Starting test...")
 
 try:
-    from recommendation_app import OptimizedMultiDomainRecommendationSystem
+    from recommender_core import OptimizedMultiDomainRecommendationSystem
     print("✅ Import successful")
     
     # Initialize system
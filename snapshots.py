@@ -0,0 +1,174 @@
+"""
+Hot catalog reload through atomic snapshot swaps.
+
+A snapshot is one AdvancedRecommender: the catalog frames, the fitted
+vectorizers, the TF-IDF matrices and every index derived from them. Once
+published it is never rebuilt in place; its query cache and seen-title
+sessions belong to it, since both refer to its row positions and title
+codes.
+
+SnapshotManager publishes the current snapshot. A request pins it with
+acquire(), which counts the reference for as long as the request runs, so
+everything the request ranks and takes comes from one catalog. reload()
+builds a new snapshot next to the serving one, without blocking queries,
+and swaps the reference under a lock; start() runs reload() on a
+background thread whenever the source stamp (sizes and mtimes of the
+CSVs) changes. The manager drops a snapshot retired by a swap as soon as
+its last in-flight request finishes, so two catalogs are resident only
+while the new one is built and the old one drains.
+
+Sessions start empty on a new snapshot: their bitmaps index the old
+catalog's titles.
+"""
+
+import threading
+from contextlib import contextmanager
+
+# Seconds between checks of the source stamp by the watcher thread
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class Snapshot:
+    """One published recommender and the requests currently holding it"""
+    __slots__ = ('recommender', 'version', 'stamp', 'refs', 'retired')
+
+    def __init__(self, recommender, version, stamp):
+        self.recommender = recommender
+        self.version = version
+        self.stamp = stamp
+        self.refs = 0
+        self.retired = False
+
+
+class SnapshotManager:
+    """The current recommender snapshot, swapped atomically when the catalog changes.
+
+    build() returns a new AdvancedRecommender over the current sources, or
+    None when they cannot be read; stamp() returns a value that changes
+    whenever they do (None disables change detection). recommender, when
+    given, is published as the first snapshot without calling build.
+    """
+    def __init__(self, build=None, stamp=None, poll_interval=DEFAULT_POLL_INTERVAL, recommender=None):
+        self.build = build
+        self.stamp = stamp
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # Held for a whole rebuild, so concurrent reloads build one snapshot
+        self._reload_lock = threading.Lock()
+        self._current = None
+        # Snapshots swapped out while requests still hold them
+        self._draining = []
+        self._version = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.failures = 0
+        self.releases = 0
+        if recommender is not None:
+            self._publish(recommender, self._read_stamp())
+
+    @property
+    def current(self):
+        """The recommender new requests are served from, or None before the first build"""
+        snapshot = self._current
+        return snapshot.recommender if snapshot is not None else None
+
+    @property
+    def version(self):
+        return self._current.version if self._current is not None else 0
+
+    @contextmanager
+    def acquire(self):
+        """Pin the current snapshot for one request: `with manager.acquire() as recommender:`"""
+        with self._lock:
+            snapshot = self._current
+            if snapshot is None:
+                raise RuntimeError("no snapshot has been built yet")
+            snapshot.refs += 1
+        try:
+            yield snapshot.recommender
+        finally:
+            self._release(snapshot)
+
+    def _read_stamp(self):
+        if self.stamp is None:
+            return None
+        try:
+            return self.stamp()
+        except OSError:
+            # A source file is being replaced; the next poll sees the new one
+            return None
+
+    def reload(self, force=False):
+        """Build a snapshot from the current sources and swap it in.
+
+        Returns True when a new snapshot was published; False when the
+        sources are unchanged (unless force) or the build failed, in which
+        case the current snapshot keeps serving.
+        """
+        with self._reload_lock:
+            # Read before building: a change made during the build triggers the next reload
+            stamp = self._read_stamp()
+            current = self._current
+            if not force and current is not None and (stamp is None or stamp == current.stamp):
+                return False
+            try:
+                recommender = self.build()
+            except Exception:
+                recommender = None
+            if recommender is None:
+                self.failures += 1
+                return False
+            self._publish(recommender, stamp)
+            self.reloads += 1
+            return True
+
+    def _publish(self, recommender, stamp):
+        with self._lock:
+            self._version += 1
+            previous, self._current = self._current, Snapshot(recommender, self._version, stamp)
+            if previous is None:
+                return
+            previous.retired = True
+            if previous.refs:
+                self._draining.append(previous)
+                return
+        self._free(previous)
+
+    def _release(self, snapshot):
+        with self._lock:
+            snapshot.refs -= 1
+            if not (snapshot.retired and snapshot.refs == 0):
+                return
+            self._draining.remove(snapshot)
+        self._free(snapshot)
+
+    def _free(self, snapshot):
+        # The last reference to the recommender: its frames, models and indexes are freed here
+        snapshot.recommender = None
+        self.releases += 1
+
+    def start(self):
+        """Watch the sources on a daemon thread and reload when they change"""
+        if self._thread is not None or self.stamp is None or not self.poll_interval:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='snapshot-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread, waiting for a rebuild in progress"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+    def stats(self):
+        with self._lock:
+            return {'version': self.version, 'draining': len(self._draining), 'reloads': self.reloads,
+                    'failures': self.failures, 'releases': self.releases}
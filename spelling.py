@@ -0,0 +1,136 @@
+"""
+Spelling correction with difflib's scoring, without scanning every term.
+
+Query words are matched with SequenceMatcher's ratio and the same cutoff
+and tie-breaking as get_close_matches. The domain terms are a short list,
+so a word is compared only with the terms whose length can reach the
+cutoff, each screened by real_quick_ratio and quick_ratio before the full
+ratio. That returns exactly what get_close_matches returns over the list.
+
+The catalog vocabulary is too large to scan per word, so it is a
+symmetric-delete (SymSpell-style) index: every term is indexed under the
+strings obtained by deleting up to max_deletes characters from it, and a
+word is looked up under its own deletions, capped at the same depth, so
+the cost per word is bounded whatever its length. Corrections are memoized
+per token in a bounded LRU cache.
+"""
+
+import math
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from query_matchers import KeywordAutomaton
+
+
+def _deletes(word, max_deletes):
+    """All strings obtained from word by deleting up to max_deletes characters"""
+    variants = {word}
+    level = {word}
+    for _ in range(min(max_deletes, len(word))):
+        level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+        variants |= level
+    return variants
+
+
+class SpellingIndex:
+    """Terms matched to a word as by get_close_matches(word, terms, n=1, cutoff).
+
+    Without max_deletes, the terms of a compatible length are compared with
+    the word directly, which finds every match. With max_deletes, candidates
+    come from a symmetric-delete index of that depth on both sides, which
+    bounds the work for large vocabularies (e.g. the whole catalog) but can
+    miss a term more than max_deletes deletions away on either side.
+    """
+    def __init__(self, terms, cutoff=0.7, max_deletes=None):
+        self.terms = list(dict.fromkeys(terms))
+        self.cutoff = cutoff
+        self.max_deletes = max_deletes
+        self.terms_by_length = {}
+        for term in self.terms:
+            self.terms_by_length.setdefault(len(term), []).append(term)
+        self.index = None
+        if max_deletes is not None:
+            self.index = {}
+            for term in self.terms:
+                for variant in _deletes(term, max_deletes):
+                    self.index.setdefault(variant, []).append(term)
+
+    def _length_compatible(self, la, lb):
+        # real_quick_ratio: 2 * min(la, lb) / (la + lb) must reach the cutoff
+        # (with float slack, since over-generating candidates is harmless)
+        return 2 * min(la, lb) >= self.cutoff * (la + lb) - 1e-9
+
+    def _max_unmatched(self, own, other):
+        # ratio >= cutoff needs M >= cutoff * (own + other) / 2 matched characters,
+        # so at most own - M characters of this side are left out of the match
+        return own - math.ceil(self.cutoff * (own + other) / 2 - 1e-9)
+
+    def _word_deletes(self, la):
+        bound = max(
+            [self._max_unmatched(la, lb) for lb in self.terms_by_length if self._length_compatible(la, lb)],
+            default=-1
+        )
+        return min(bound, self.max_deletes)
+
+    def candidates(self, word):
+        """Terms of a length compatible with word or, with a delete index, sharing a deletion variant with it"""
+        if self.index is None:
+            return [term for length, terms in self.terms_by_length.items()
+                    if self._length_compatible(len(word), length) for term in terms]
+        bound = self._word_deletes(len(word))
+        if bound < 0:
+            return set()
+        found = set()
+        for variant in _deletes(word, bound):
+            found.update(self.index.get(variant, ()))
+        return found
+
+    def best_match(self, word):
+        """Same result as get_close_matches(word, terms, n=1, cutoff)[0], or None"""
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        best = None
+        for term in self.candidates(word):
+            matcher.set_seq1(term)
+            if matcher.real_quick_ratio() >= self.cutoff and matcher.quick_ratio() >= self.cutoff:
+                ratio = matcher.ratio()
+                if ratio >= self.cutoff and (best is None or (ratio, term) > best):
+                    best = (ratio, term)
+        return best[1] if best else None
+
+
+class SpellingCorrector:
+    """Query spelling correction: known misspellings, then per-word fuzzy matching.
+
+    Words are corrected against the domain terms first; if a catalog index is
+    given, words the domain terms leave untouched are corrected against it.
+    """
+    def __init__(self, domain_terms, misspellings, catalog_terms=None, cache_size=4096):
+        self.misspellings = dict(misspellings)
+        self.misspelling_automaton = KeywordAutomaton(self.misspellings)
+        self.domain_index = SpellingIndex(domain_terms)
+        self.catalog_index = SpellingIndex(catalog_terms, max_deletes=2) if catalog_terms else None
+        self.correct_word = lru_cache(maxsize=cache_size)(self._correct_word)
+
+    def _correct_word(self, word):
+        if len(word) <= 2:  # Skip very short words
+            return word
+        match = self.domain_index.best_match(word)
+        if match is None and self.catalog_index is not None:
+            match = self.catalog_index.best_match(word)
+        return match or word
+
+    def replace_misspellings(self, query_lower):
+        """Apply the known-misspellings table in order, as substring replacements"""
+        # One automaton pass decides whether any rule can fire; rules only fire
+        # on text that was already present, so a miss means nothing changes
+        if next(self.misspelling_automaton.find_all(query_lower), None) is None:
+            return query_lower
+        for misspelling, correction in self.misspellings.items():
+            if misspelling in query_lower:
+                query_lower = query_lower.replace(misspelling, correction)
+        return query_lower
+
+    def correct(self, query):
+        query_lower = self.replace_misspellings(query.lower())
+        return ' '.join(self.correct_word(word) for word in query_lower.split())
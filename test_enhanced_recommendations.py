@@ -7,7 +7,52 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from recommendation_app import OptimizedMultiDomainRecommendationSystem
+import pandas as pd
+
+from recommender_core import ID_COLUMNS, OptimizedMultiDomainRecommendationSystem
+
+# Test queries for direct entity searches (also the benchmark corpus)
+TEST_QUERIES = [
+    # Direct artist searches
+    "Taylor Swift songs",
+    "Coldplay music",
+    "Imagine Dragons tracks",
+    "Ariana Grande albums",
+    
+    # Direct actor searches
+    "Leonardo DiCaprio movies",
+    "Brad Pitt films",
+    "Jennifer Lawrence shows",
+    "Tom Hanks movies",
+    
+    # Direct director searches
+    "Christopher Nolan movies",
+    "Steven Spielberg films",
+    "Quentin Tarantino movies",
+    "Martin Scorsese films",
+    
+    # Direct author searches
+    "J.K. Rowling books",
+    "Agatha Christie novels",
+    "Ernest Hemingway books",
+    "Jane Austen novels",
+    
+    # Mixed queries
+    "Romantic movies with Leonardo DiCaprio",
+    "Action movies by Christopher Nolan",
+    "Taylor Swift songs for workout",
+    "J.K. Rowling fantasy books",
+    
+    # Complex queries
+    "Movies starring Brad Pitt from 2000s",
+    "Taylor Swift songs with high ratings",
+    "Books by Agatha Christie with mystery genre",
+    "Christopher Nolan movies with high ratings"
+]
+
+# Rating column of each domain that has one
+RATING_COLUMNS = {'movies': 'rating', 'books': 'average_rating', 'food': 'rating', 'tv_shows': 'rating'}
+
 
 def test_direct_entity_searches():
     """Test the enhanced system with direct entity searches"""
@@ -25,49 +70,11 @@ def test_direct_entity_searches():
     
     print("✅ Data loaded successfully!")
     
-    # Test queries for direct entity searches
-    test_queries = [
-        # Direct artist searches
-        "Taylor Swift songs",
-        "Coldplay music",
-        "Imagine Dragons tracks",
-        "Ariana Grande albums",
-        
-        # Direct actor searches
-        "Leonardo DiCaprio movies",
-        "Brad Pitt films",
-        "Jennifer Lawrence shows",
-        "Tom Hanks movies",
-        
-        # Direct director searches
-        "Christopher Nolan movies",
-        "Steven Spielberg films",
-        "Quentin Tarantino movies",
-        "Martin Scorsese films",
-        
-        # Direct author searches
-        "J.K. Rowling books",
-        "Agatha Christie novels",
-        "Ernest Hemingway books",
-        "Jane Austen novels",
-        
-        # Mixed queries
-        "Romantic movies with Leonardo DiCaprio",
-        "Action movies by Christopher Nolan",
-        "Taylor Swift songs for workout",
-        "J.K. Rowling fantasy books",
-        
-        # Complex queries
-        "Movies starring Brad Pitt from 2000s",
-        "Taylor Swift songs with high ratings",
-        "Books by Agatha Christie with mystery genre",
-        "Christopher Nolan movies with high ratings"
-    ]
     
     print("\n🔍 Testing Direct Entity Searches:")
     print("=" * 50)
     
-    for i, query in enumerate(test_queries, 1):
+    for i, query in enumerate(TEST_QUERIES, 1):
         print(f"\n{i:2d}. Query: '{query}'")
         print("-" * 40)
         
@@ -105,5 +112,23 @@ def test_direct_entity_searches():
     
     print("\n✅ Testing completed!")
 
+def test_ratings_match_catalog():
+    """Ratings returned by get_recommendations are the catalog's CSV values, without float32 round-off"""
+    rec_system = OptimizedMultiDomainRecommendationSystem(data_path='./')
+    assert rec_system.load_preprocessed_data()
+    ratings = {
+        domain: pd.read_csv(f"{domain}.csv", dtype={ID_COLUMNS[domain]: str}).set_index(ID_COLUMNS[domain])[column]
+        for domain, column in RATING_COLUMNS.items()
+    }
+    checked = 0
+    for query in TEST_QUERIES:
+        for rec in rec_system.get_recommendations(query):
+            for domain, column in RATING_COLUMNS.items():
+                if ID_COLUMNS[domain] in rec:
+                    assert rec[column] == ratings[domain][rec[ID_COLUMNS[domain]]], (query, rec)
+                    checked += 1
+    assert checked > 0
+
+
 if __name__ == "__main__":
     test_direct_entity_searches()